@@ -0,0 +1,143 @@
+"""Content-addressed storage for large text fields of workspace entities."""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional
+from config import BLOB_DIR, BLOB_CACHE_BYTES, LAZY_TEXT_MIN_CHARS
+
+# Entity fields that are moved out of the record once they grow past LAZY_TEXT_MIN_CHARS
+LAZY_TEXT_FIELDS = ("content", "notes", "description", "outline")
+
+BLOB_REF_KEY = "$blob"
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Return True if a stored field value is a reference to a blob."""
+    return isinstance(value, dict) and BLOB_REF_KEY in value
+
+
+class BlobStore:
+    """Stores text bodies as files named by their hash, with a size-bounded LRU cache."""
+
+    def __init__(self, root: str = BLOB_DIR, cache_bytes: int = BLOB_CACHE_BYTES,
+                 min_chars: int = LAZY_TEXT_MIN_CHARS):
+        self.root = root
+        self.cache_bytes = cache_bytes
+        self.min_chars = min_chars
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.txt")
+
+    def ref(self, text: str) -> Dict[str, Any]:
+        """Return the reference for `text` without writing it."""
+        key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return {BLOB_REF_KEY: key, "length": len(text)}
+
+    def put(self, text: str) -> Dict[str, Any]:
+        """Store `text` durably (if not already stored) and return its reference."""
+        ref = self.ref(text)
+        path = self._path(ref[BLOB_REF_KEY])
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        self._remember(ref[BLOB_REF_KEY], text)
+        return ref
+
+    def get(self, ref: Dict[str, Any]) -> str:
+        """Return the text behind a reference, reading it from disk on a cache miss."""
+        key = ref[BLOB_REF_KEY]
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError as e:
+            print(f"Warning: Missing text blob {key}: {e}")
+            return ""
+
+        self._remember(key, text)
+        return text
+
+    def _remember(self, key: str, text: str):
+        """Add a blob to the LRU cache, evicting the least recently used ones past the budget."""
+        size = len(text)
+        if size > self.cache_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return
+            self._cache[key] = text
+            self._cached_bytes += size
+            while self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+
+    def matches(self, ref: Dict[str, Any], text: str) -> bool:
+        """Whether `text` is the text behind `ref`, hashing it only when neither its length
+        nor the cached copy can tell."""
+        if ref.get("length") != len(text):
+            return False
+        with self._lock:
+            cached = self._cache.get(ref[BLOB_REF_KEY])
+        if cached is not None:
+            return cached is text or cached == text
+        return self.ref(text)[BLOB_REF_KEY] == ref[BLOB_REF_KEY]
+
+    def matches_stored(self, stored: Optional[Dict[str, Any]], record: Dict[str, Any]) -> bool:
+        """Whether `record` holds the same values as a stored record whose long text fields are references."""
+        if stored is None or stored.keys() != record.keys():
+            return False
+        for field, value in record.items():
+            current = stored[field]
+            if is_blob_ref(current) and isinstance(value, str):
+                if not self.matches(current, value):
+                    return False
+            elif current != value:
+                return False
+        return True
+
+    def externalize(self, record: Dict[str, Any], write: bool = True) -> Dict[str, Any]:
+        """Return `record` with long text fields replaced by blob references."""
+        if self.min_chars <= 0:
+            return record
+        stubbed = None
+        for field in LAZY_TEXT_FIELDS:
+            value = record.get(field)
+            if isinstance(value, str) and len(value) >= self.min_chars:
+                if stubbed is None:
+                    stubbed = dict(record)
+                stubbed[field] = self.put(value) if write else self.ref(value)
+        return stubbed if stubbed is not None else record
+
+    def collect_garbage(self, live_refs: Iterable[Dict[str, Any]]) -> int:
+        """Delete blobs that are not referenced anymore; returns the number removed."""
+        live = {ref[BLOB_REF_KEY] for ref in live_refs}
+        removed = 0
+        if not os.path.isdir(self.root):
+            return 0
+        for bucket in os.listdir(self.root):
+            bucket_path = os.path.join(self.root, bucket)
+            for name in os.listdir(bucket_path):
+                key, _ = os.path.splitext(name)
+                if key not in live:
+                    os.remove(os.path.join(bucket_path, name))
+                    removed += 1
+        return removed
+
+
+# Global blob store instance; existing references stay readable even if externalizing is disabled
+blob_store = BlobStore()
@@ -0,0 +1,266 @@
+"""Bulk import of stories, characters, world elements and chapters from JSONL or CSV files."""
+
+import csv
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator
+from config import EMBEDDING_BATCH_SIZE
+from document_store import document_store, StorageError
+
+# Accepted values of a record's "type" column/key, mapped to workspace collections
+IMPORT_TYPES = {
+    "story": "stories", "stories": "stories",
+    "character": "characters", "characters": "characters",
+    "world_element": "world_elements", "world_elements": "world_elements",
+    "chapter": "chapters", "chapters": "chapters",
+}
+
+REQUIRED_FIELDS = {
+    "stories": "title",
+    "characters": "name",
+    "world_elements": "name",
+    "chapters": "title",
+}
+
+# Fields holding lists; in CSV files their items are separated by ";"
+LIST_FIELDS = {
+    "characters": ("traits",),
+    "world_elements": ("tags",),
+    "chapters": ("characters",),
+}
+
+INT_FIELDS = {
+    "chapters": ("act_number", "block_number", "chapter_number"),
+}
+
+CHAPTER_STATUSES = ("Not Started", "Draft", "In Progress", "Done")
+
+
+def read_records(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, raw record) pairs from a .jsonl or .csv file."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if extension == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {k: v for k, v in row.items() if k is not None}
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    raw = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"line {line_number}: {e}")
+                if not isinstance(raw, dict):
+                    raise ValueError(f"line {line_number}: expected a JSON object")
+                yield line_number, raw
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value).split(";") if item.strip()]
+
+
+def _build_record(collection: str, raw: Dict[str, Any], story_titles: Dict[str, str], story_ids: Dict[str, str],
+                  now: str) -> Tuple[str, Dict[str, Any]]:
+    """Validate a raw row and turn it into a stored entity; raises ValueError if it is invalid.
+
+    `story_titles` maps the known story ids to titles, `story_ids` their lowercased titles to ids.
+    """
+    required = REQUIRED_FIELDS[collection]
+    if not str(raw.get(required) or "").strip():
+        raise ValueError(f"missing required field '{required}'")
+
+    # Empty values (e.g. blank CSV cells) fall back to the same defaults the create_* functions use
+    record = {
+        key: value for key, value in raw.items()
+        if key not in ("type", "id", "story", "version") and value not in (None, "")
+    }
+    for field in LIST_FIELDS.get(collection, ()):
+        record[field] = _as_list(record.get(field))
+    for field in INT_FIELDS.get(collection, ()):
+        if field in record:
+            try:
+                record[field] = int(record[field])
+            except (TypeError, ValueError):
+                raise ValueError(f"'{field}' must be a whole number, got {record[field]!r}")
+    for field, value in list(record.items()):
+        if isinstance(value, str):
+            record[field] = value.strip()
+
+    entity_id = str(raw.get("id") or "").strip() or str(uuid.uuid4())
+    record.setdefault("created_at", now)
+    record["updated_at"] = now
+
+    if collection == "stories":
+        record.setdefault("description", "")
+        record.setdefault("content", "")
+    elif collection == "characters":
+        record.setdefault("description", "")
+        record.setdefault("notes", "")
+    elif collection == "world_elements":
+        element_type = raw.get("element_type") or (raw.get("type") if raw.get("type") not in IMPORT_TYPES else None)
+        record["type"] = str(element_type or "location").strip()
+        record.pop("element_type", None)
+        record.setdefault("description", "")
+        record.setdefault("notes", "")
+    elif collection == "chapters":
+        story_id = record.get("story_id") or story_ids.get(str(raw.get("story") or "").strip().lower(), "")
+        if raw.get("story") and not story_id:
+            raise ValueError(f"unknown story '{raw['story']}'")
+        if story_id and story_id not in story_titles:
+            raise ValueError(f"unknown story_id '{story_id}'")
+        record["id"] = entity_id
+        record["story_id"] = story_id
+        record.setdefault("act_number", 1)
+        record.setdefault("block_number", 1)
+        record.setdefault("status", "Not Started")
+        if record["status"] not in CHAPTER_STATUSES:
+            raise ValueError(f"unknown status '{record['status']}'")
+        for field in ("outline", "content", "location", "notes"):
+            record.setdefault(field, "")
+        record.setdefault("scenes", [])
+
+    return entity_id, record
+
+
+def bulk_import(path: str, default_type: Optional[str] = None, skip_invalid: bool = False,
+                batch_size: int = EMBEDDING_BATCH_SIZE,
+                progress: Callable[[str], None] = print) -> Tuple[str, Dict[str, Any]]:
+    """Import entities from a JSONL or CSV file.
+
+    Each record names its kind in a "type" field (story, character, world_element, chapter),
+    or `default_type` applies. Chapters may point to a story by "story_id" or by "story"
+    title, including stories from the same file. Records with an "id" replace existing
+    entities. All records are validated first and written in one transaction; their text
+    is then embedded in batches of `batch_size`. Invalid records abort the import unless
+    `skip_invalid` is set.
+    """
+    started = time.time()
+    now = datetime.now().isoformat()
+    default_collection = IMPORT_TYPES.get((default_type or "").strip().lower())
+    if default_type and not default_collection:
+        return f"❌ Unknown import type '{default_type}'.", {}
+
+    try:
+        rows = list(read_records(path))
+    except (OSError, ValueError) as e:
+        return f"❌ Could not read {path}: {e}", {}
+
+    # Stories may be referenced by title from chapters in the same file, so place them first
+    def collection_of(raw):
+        return IMPORT_TYPES.get(str(raw.get("type") or "").strip().lower(), default_collection)
+    rows.sort(key=lambda row: collection_of(row[1]) != "stories")
+
+    story_titles = {story_id: story["title"] for story_id, story in document_store.list_entities("stories").items()}
+    story_ids = {title.lower(): story_id for story_id, title in story_titles.items()}
+
+    records: List[Tuple[str, str, Dict[str, Any]]] = []
+    errors: List[str] = []
+    for line_number, raw in rows:
+        collection = collection_of(raw)
+        if collection is None:
+            errors.append(f"line {line_number}: unknown or missing type {raw.get('type')!r}")
+            continue
+        try:
+            entity_id, record = _build_record(collection, raw, story_titles, story_ids, now)
+        except ValueError as e:
+            errors.append(f"line {line_number}: {e}")
+            continue
+        records.append((collection, entity_id, record))
+        if collection == "stories":
+            story_titles[entity_id] = record["title"]
+            story_ids[record["title"].lower()] = entity_id
+
+    progress(f"Validated {len(rows)} records in {time.time() - started:.1f}s ({len(errors)} invalid)")
+    if errors and not skip_invalid:
+        shown = "; ".join(errors[:5]) + (f"; ... and {len(errors) - 5} more" if len(errors) > 5 else "")
+        return f"❌ Import aborted, invalid records: {shown}", {"errors": errors}
+    if not records:
+        return "❌ Nothing to import.", {"errors": errors}
+
+    # Imported chapters are ranked after the existing chapters of their block, ordered by
+    # their "chapter_number" if the file has one, otherwise by their position in the file
+    blocks: Dict[Tuple[str, int, int], List[Dict[str, Any]]] = {}
+    for collection, _, record in records:
+        if collection == "chapters":
+            key = (record["story_id"], record["act_number"], record["block_number"])
+            blocks.setdefault(key, []).append(record)
+
+    saving = time.time()
+    try:
+        from chapter_index import chapter_index, ranks_between
+        with document_store.transaction(label=f"Import {os.path.basename(path)}") as txn:
+            for (story_id, act_number, block_number), chapters in blocks.items():
+                chapters.sort(key=lambda c: c.get("chapter_number", float("inf")))
+                last, _ = chapter_index.slot_ranks(story_id, act_number, block_number,
+                                                   exclude={c["id"] for c in chapters})
+                for chapter, rank in zip(chapters, ranks_between(last, None, len(chapters))):
+                    chapter["rank"] = rank
+                    chapter.pop("chapter_number", None)
+            for collection, entity_id, record in records:
+                txn.put(collection, entity_id, record)
+    except StorageError as e:
+        return f"❌ Error saving imported records: {e}", {"errors": errors}
+    save_seconds = time.time() - saving
+    progress(f"Saved {len(records)} entities in {save_seconds:.1f}s ({len(records) / max(save_seconds, 1e-6):.0f}/s)")
+
+    # One batched pass through the vector index
+    embedding = time.time()
+    embedded_chunks = 0
+    try:
+        from rag_services import rag_service
+        from database_models import rag_item
+
+        def report(done: int, total: int):
+            nonlocal embedded_chunks
+            embedded_chunks = done
+            elapsed = time.time() - embedding
+            progress(f"Embedded {done}/{total} chunks ({done / max(elapsed, 1e-6):.0f} chunks/s)")
+
+        rag_service.add_contents(
+            [
+                rag_item(collection, entity_id, record, story_titles.get(record.get("story_id"), ""),
+                         chapter_index.display_number(entity_id) if collection == "chapters" else None)
+                for collection, entity_id, record in records
+            ],
+            batch_size=batch_size, progress=report, parallel=True
+        )
+    except Exception as e:
+        print(f"Warning: Could not update RAG index: {e}")
+
+    counts = Counter(collection for collection, _, _ in records)
+    elapsed = time.time() - started
+    stats = {
+        "imported": dict(counts),
+        "errors": errors,
+        "chunks": embedded_chunks,
+        "seconds": round(elapsed, 2),
+        "entities_per_second": round(len(records) / max(elapsed, 1e-6), 1),
+    }
+    summary = ", ".join(f"{count} {collection.replace('_', ' ')}" for collection, count in counts.items())
+    skipped = f" ({len(errors)} invalid records skipped)" if errors else ""
+    return f"✅ Imported {summary} in {elapsed:.1f}s{skipped}", stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import ScriptVoice entities from a JSONL or CSV file.")
+    parser.add_argument("path", help="file to import (.jsonl or .csv)")
+    parser.add_argument("--type", dest="default_type", help="entity type for records without a 'type' field")
+    parser.add_argument("--skip-invalid", action="store_true", help="import the valid records even if some are invalid")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="chunks per embedding batch")
+    args = parser.parse_args()
+
+    message, _ = bulk_import(args.path, args.default_type, args.skip_invalid, args.batch_size)
+    print(message)
+    document_store.flush()
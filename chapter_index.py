@@ -0,0 +1,273 @@
+"""Ordered chapter index used for paged chapter listings, plus fractional rank helpers."""
+
+import string
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Any, Collection, List, Optional, Tuple
+from config import CHAPTER_INDEX_FILE
+from entity_index import EntityIndex
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+# Rank digits in ascending ASCII order, so ranks compare correctly as plain strings
+RANK_DIGITS = string.digits + string.ascii_uppercase + string.ascii_lowercase
+_RANK_BASE = len(RANK_DIGITS)
+
+
+def rank_between(before: Optional[str] = None, after: Optional[str] = None) -> str:
+    """Return a rank that sorts strictly between `before` and `after` (None = open end).
+
+    Ranks are base-62 fractions; the result never ends in "0", so there is always room
+    for another rank on either side of it. Appending (`after` is None) steps the first
+    free digit by one rather than halving, so ranks grow slowly when chapters are added
+    at the end one after another.
+    """
+    before = before or ""
+    appending = after is None and bool(before)
+    if after is not None and after <= before:
+        raise ValueError(f"No rank between {before!r} and {after!r}")
+
+    rank = []
+    position = 0
+    while True:
+        low = RANK_DIGITS.index(before[position]) if position < len(before) else 0
+        high = RANK_DIGITS.index(after[position]) if after is not None else _RANK_BASE
+        if high - low > 1:
+            rank.append(RANK_DIGITS[low + 1 if appending else (low + high) // 2])
+            return "".join(rank)
+        rank.append(RANK_DIGITS[low])
+        if high - low == 1:
+            # Anything longer than this prefix is already below `after`
+            after = None
+        position += 1
+
+
+def ranks_between(before: Optional[str], after: Optional[str], count: int) -> List[str]:
+    """Return `count` ascending ranks between `before` and `after`, kept as short as possible."""
+    if count <= 0:
+        return []
+    if after is None:
+        ranks = []
+        for _ in range(count):
+            before = rank_between(before, None)
+            ranks.append(before)
+        return ranks
+    middle = count // 2
+    rank = rank_between(before, after)
+    return ranks_between(before, rank, middle) + [rank] + ranks_between(rank, after, count - middle - 1)
+
+
+def legacy_rank(chapter_number: Any) -> str:
+    """Rank equivalent of an integer chapter number, for chapters created before ranks existed."""
+    number = max(_as_int(chapter_number), 0)
+    digits = ""
+    while number:
+        number, digit = divmod(number, _RANK_BASE)
+        digits = RANK_DIGITS[digit] + digits
+    return digits.rjust(4, "0") + "V"
+
+
+def chapter_rank(chapter: Dict[str, Any]) -> str:
+    """The rank a chapter is ordered by within its block."""
+    return chapter.get("rank") or legacy_rank(chapter.get("chapter_number"))
+
+
+def chapter_sort_key(chapter_id: str, chapter: Dict[str, Any]) -> Tuple[str, int, int, str, str]:
+    """Default chapter ordering: story, act, block, rank (id breaks ties)."""
+    return (
+        chapter.get("story_id") or "",
+        _as_int(chapter.get("act_number")),
+        _as_int(chapter.get("block_number")),
+        chapter_rank(chapter),
+        chapter_id,
+    )
+
+
+class ChapterIndex(EntityIndex):
+    """Chapters kept sorted in the default display order, plus counts per filter combination.
+
+    Because the order starts with (story, act), the chapters of a story or of one act are
+    a contiguous slice found by bisection, which serves chapter numbering and per-story
+    listings. A page is read by walking the sorted keys and stops once the page is full;
+    totals come from counts per (story, status, act), so neither needs to touch every chapter.
+    """
+
+    collections = ("chapters",)
+    format_version = 2
+
+    def __init__(self, path: Optional[str] = CHAPTER_INDEX_FILE, **kwargs):
+        super().__init__(path=path, **kwargs)
+
+    def _reset(self):
+        self._order: List[Tuple[str, int, int, str, str]] = []
+        self._keys: Dict[str, Tuple[str, int, int, str, str]] = {}
+        self._filters: Dict[str, Tuple[str, str, int]] = {}
+        self._counts: Counter = Counter()
+
+    def _add(self, collection: str, entity_id: str, record: Dict[str, Any]):
+        key = chapter_sort_key(entity_id, record)
+        insort(self._order, key)
+        self._keys[entity_id] = key
+        combo = (key[0], record.get("status", "Not Started"), key[1])
+        self._filters[entity_id] = combo
+        self._counts[combo] += 1
+
+    def _remove(self, collection: str, entity_id: str):
+        key = self._keys.pop(entity_id, None)
+        if key is None:
+            return
+        position = bisect_left(self._order, key)
+        if position < len(self._order) and self._order[position] == key:
+            del self._order[position]
+        combo = self._filters.pop(entity_id)
+        self._counts[combo] -= 1
+        if not self._counts[combo]:
+            del self._counts[combo]
+
+    def _get_state(self):
+        return self._order, self._keys, self._filters, self._counts
+
+    def _set_state(self, state):
+        self._order, self._keys, self._filters, self._counts = state
+
+    def _range(self, story_id: Optional[str], act_number: Optional[int],
+               block_number: Optional[int] = None) -> Tuple[int, int]:
+        """Slice of the sorted keys holding a story (and act, and block), or everything."""
+        if story_id is None:
+            return 0, len(self._order)
+        if act_number is None:
+            return (bisect_left(self._order, (story_id,)),
+                    bisect_left(self._order, (story_id, float("inf"))))
+        act_number = _as_int(act_number)
+        if block_number is None:
+            return (bisect_left(self._order, (story_id, act_number)),
+                    bisect_left(self._order, (story_id, act_number + 1)))
+        block_number = _as_int(block_number)
+        return (bisect_left(self._order, (story_id, act_number, block_number)),
+                bisect_left(self._order, (story_id, act_number, block_number + 1)))
+
+    def _matches(self, entity_id: str, story_id: Optional[str], status: Optional[str],
+                 act_number: Optional[int]) -> bool:
+        combo_story, combo_status, combo_act = self._filters[entity_id]
+        return ((story_id is None or combo_story == story_id) and
+                (status is None or combo_status == status) and
+                (act_number is None or combo_act == act_number))
+
+    def ids(self, story_id: Optional[str] = None, status: Optional[str] = None,
+            act_number: Optional[int] = None, descending: bool = False) -> List[str]:
+        """Return all matching chapter ids in display order."""
+        with self._lock:
+            self.sync()
+            start, stop = self._range(story_id, act_number)
+            ids = [
+                key[-1] for key in self._order[start:stop]
+                if self._matches(key[-1], story_id, status, act_number)
+            ]
+        if descending:
+            ids.reverse()
+        return ids
+
+    def page(self, story_id: Optional[str] = None, status: Optional[str] = None,
+             act_number: Optional[int] = None, offset: int = 0, limit: Optional[int] = None,
+             descending: bool = False) -> List[str]:
+        """Return one page of matching chapter ids in display order."""
+        with self._lock:
+            self.sync()
+            start, stop = self._range(story_id, act_number)
+            if status is None and (act_number is None or story_id is not None):
+                # The range holds exactly the matches, so the page can be sliced out directly
+                size = stop - start - offset if limit is None else min(limit, stop - start - offset)
+                if size <= 0:
+                    return []
+                if descending:
+                    first = stop - 1 - offset
+                    return [self._order[position][-1] for position in range(first, first - size, -1)]
+                first = start + offset
+                return [key[-1] for key in self._order[first:first + size]]
+
+            positions = range(stop - 1, start - 1, -1) if descending else range(start, stop)
+            page, skipped = [], 0
+            for position in positions:
+                entity_id = self._order[position][-1]
+                if not self._matches(entity_id, story_id, status, act_number):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                if limit is not None and len(page) >= limit:
+                    break
+                page.append(entity_id)
+            return page
+
+    def chapter_ids(self, story_id: str, act_number: Optional[int] = None) -> List[str]:
+        """Ordered ids of the chapters in a story, or in one act of it."""
+        with self._lock:
+            self.sync()
+            start, stop = self._range(story_id, act_number)
+            return [key[-1] for key in self._order[start:stop]]
+
+    def act_size(self, story_id: str, act_number: int) -> int:
+        """Number of chapters in one act of a story."""
+        with self._lock:
+            self.sync()
+            start, stop = self._range(story_id, act_number)
+            return stop - start
+
+    def last_rank(self, story_id: str, act_number: int, block_number: int) -> Optional[str]:
+        """Rank of the last chapter in a block, or None if the block is empty."""
+        with self._lock:
+            self.sync()
+            start, stop = self._range(story_id, act_number, block_number)
+            return self._order[stop - 1][3] if stop > start else None
+
+    def slot_ranks(self, story_id: str, act_number: int, block_number: int,
+                   before_id: Optional[str] = None, after_id: Optional[str] = None,
+                   exclude: Collection[str] = ()) -> Tuple[Optional[str], Optional[str]]:
+        """Ranks bounding a new position in a block: right after `after_id`, right before
+        `before_id`, or at the end. Chapters being moved (`exclude`) are skipped over.
+        """
+        with self._lock:
+            self.sync()
+            start, stop = self._range(story_id, act_number, block_number)
+            keys = [key for key in self._order[start:stop] if key[-1] not in exclude]
+            anchor = after_id or before_id
+            if anchor is None:
+                return (keys[-1][3] if keys else None), None
+            position = next((i for i, key in enumerate(keys) if key[-1] == anchor), None)
+            if position is None:
+                raise KeyError(f"Chapter {anchor} is not in act {act_number}, block {block_number}")
+            if after_id is not None:
+                return keys[position][3], (keys[position + 1][3] if position + 1 < len(keys) else None)
+            return (keys[position - 1][3] if position > 0 else None), keys[position][3]
+
+    def display_number(self, chapter_id: str) -> Optional[int]:
+        """1-based position of a chapter within its act, as shown to the user."""
+        with self._lock:
+            self.sync()
+            key = self._keys.get(chapter_id)
+            if key is None:
+                return None
+            start, _ = self._range(key[0], key[1])
+            return bisect_left(self._order, key) - start + 1
+
+    def count(self, story_id: Optional[str] = None, status: Optional[str] = None,
+              act_number: Optional[int] = None) -> int:
+        """Number of chapters matching the filters."""
+        with self._lock:
+            self.sync()
+            return sum(
+                count for (combo_story, combo_status, combo_act), count in self._counts.items()
+                if (story_id is None or combo_story == story_id)
+                and (status is None or combo_status == status)
+                and (act_number is None or combo_act == act_number)
+            )
+
+
+# Global chapter index instance
+chapter_index = ChapterIndex()
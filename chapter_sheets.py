@@ -0,0 +1,216 @@
+"""Spreadsheet (CSV/XLSX) export and import of the chapter table."""
+
+import csv
+import os
+import tempfile
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+from bulk_import import CHAPTER_STATUSES
+from chapter_index import chapter_index
+from document_store import document_store
+
+SHEET_COLUMNS = ["ID", "Story", "Act", "Block", "Chapter", "Title", "Outline", "Characters", "Location", "Status", "Notes"]
+
+# Sheet columns that map onto chapter fields on import; "Chapter" is a display number and is not imported
+SHEET_FIELDS = {
+    "Act": "act_number",
+    "Block": "block_number",
+    "Title": "title",
+    "Outline": "outline",
+    "Characters": "characters",
+    "Location": "location",
+    "Status": "status",
+    "Notes": "notes",
+}
+
+
+def iter_chapter_rows(story_id: Optional[str] = None, status: Optional[str] = None,
+                      act_number: Optional[int] = None) -> Iterator[List[Any]]:
+    """Yield sheet rows for the matching chapters in display order, one chapter at a time."""
+    stories = document_store.list_entities("stories")
+    for chapter_id in chapter_index.ids(story_id, status, act_number):
+        chapter = document_store.get_entity("chapters", chapter_id)
+        if chapter is None:
+            continue
+        story = stories.get(chapter.get("story_id") or "")
+        yield [
+            chapter_id,
+            story["title"] if story else "",
+            chapter.get("act_number", 1),
+            chapter.get("block_number", 1),
+            chapter_index.display_number(chapter_id) or chapter.get("chapter_number", 1),
+            chapter.get("title", ""),
+            chapter.get("outline", ""),
+            ", ".join(chapter.get("characters", [])),
+            chapter.get("location", ""),
+            chapter.get("status", "Not Started"),
+            chapter.get("notes", ""),
+        ]
+
+
+def export_chapters(file_format: str = "csv", story_id: Optional[str] = None, status: Optional[str] = None,
+                    act_number: Optional[int] = None) -> Tuple[Optional[str], str]:
+    """Write the matching chapters to a temporary .csv or .xlsx file, streaming row by row."""
+    file_format = (file_format or "csv").strip().lower()
+    if file_format not in ("csv", "xlsx"):
+        return None, f"❌ Unknown export format '{file_format}'."
+
+    try:
+        count = 0
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=f".{file_format}",
+                                         prefix="chapters_", encoding='utf-8', newline='') as tmp_file:
+            path = tmp_file.name
+            if file_format == "csv":
+                writer = csv.writer(tmp_file)
+                writer.writerow(SHEET_COLUMNS)
+                for row in iter_chapter_rows(story_id, status, act_number):
+                    writer.writerow(row)
+                    count += 1
+
+        if file_format == "xlsx":
+            try:
+                from openpyxl import Workbook
+            except ImportError:
+                os.remove(path)
+                return None, "❌ XLSX export needs openpyxl (install with: pip install openpyxl)."
+            # A write-only workbook streams rows to disk instead of keeping the sheet in memory
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet("Chapters")
+            sheet.append(SHEET_COLUMNS)
+            for row in iter_chapter_rows(story_id, status, act_number):
+                sheet.append(row)
+                count += 1
+            workbook.save(path)
+
+        return path, f"✅ Exported {count} chapters. Click download below."
+
+    except Exception as e:
+        print(f"Error exporting chapters: {e}")
+        return None, f"❌ Error exporting chapters: {str(e)}"
+
+
+def _cell(value: Any) -> str:
+    """Normalize a CSV or XLSX cell to a stripped string."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_sheet_rows(path: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (row number, column -> cell) pairs from a .csv or .xlsx sheet, one row at a time."""
+    if os.path.splitext(path)[1].lower() == ".xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("XLSX import needs openpyxl (install with: pip install openpyxl)")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [_cell(value) for value in next(rows, ())]
+            for row_number, row in enumerate(rows, 2):
+                if any(value not in (None, "") for value in row):
+                    yield row_number, dict(zip(header, (_cell(value) for value in row)))
+        finally:
+            workbook.close()
+        return
+
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if any(row.values()):
+                yield reader.line_num, {key.strip(): _cell(value) for key, value in row.items() if key is not None}
+
+
+def _stored(chapter: Dict[str, Any], field: str) -> Any:
+    """A chapter field as it would read back from a sheet cell."""
+    value = chapter.get(field)
+    if field == "characters":
+        return list(value or [])
+    if field in ("act_number", "block_number"):
+        return value if value is not None else 1
+    return value if value is not None else ""
+
+
+def _sheet_values(row: Dict[str, str], story_ids: Dict[str, str]) -> Dict[str, Any]:
+    """Chapter fields given by a sheet row; raises ValueError if a cell is invalid."""
+    fields: Dict[str, Any] = {}
+    for column, field in SHEET_FIELDS.items():
+        if column not in row:
+            continue
+        value = row[column]
+        if field in ("act_number", "block_number"):
+            try:
+                value = int(value or 1)
+            except ValueError:
+                raise ValueError(f"'{column}' must be a whole number, got {value!r}")
+        elif field == "characters":
+            value = [name.strip() for name in value.replace(";", ",").split(",") if name.strip()]
+        elif field == "status":
+            value = value or "Not Started"
+            if value not in CHAPTER_STATUSES:
+                raise ValueError(f"unknown status '{value}'")
+        fields[field] = value
+
+    if "Story" in row:
+        story_title = row["Story"]
+        if story_title and story_title.lower() not in story_ids:
+            raise ValueError(f"unknown story '{story_title}'")
+        fields["story_id"] = story_ids.get(story_title.lower(), "")
+    return fields
+
+
+def import_chapter_sheet(path: str, skip_invalid: bool = False) -> Tuple[str, Dict[str, Any]]:
+    """Sync chapters from an edited sheet (as written by export_chapters).
+
+    Rows are read one at a time and compared with the stored chapter of the same ID; only
+    the cells that differ become updates. Rows without an ID become new chapters. Columns
+    missing from the sheet are left alone. All changes are saved with one
+    apply_chapter_changes call. Invalid rows abort the import unless `skip_invalid` is set.
+    """
+    from database_models import apply_chapter_changes
+
+    story_ids = {story["title"].lower(): story_id for story_id, story in document_store.list_entities("stories").items()}
+    updates: Dict[str, Dict[str, Any]] = {}
+    new_chapters: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    unchanged = 0
+
+    try:
+        for row_number, row in read_sheet_rows(path):
+            try:
+                fields = _sheet_values(row, story_ids)
+                chapter_id = row.get("ID", "")
+                if not chapter_id:
+                    if not fields.get("title"):
+                        raise ValueError("missing required field 'Title'")
+                    new_chapters.append(fields)
+                    continue
+                chapter = document_store.get_entity("chapters", chapter_id)
+                if chapter is None:
+                    raise ValueError(f"unknown chapter ID '{chapter_id}'")
+                if "title" in fields and not fields["title"]:
+                    raise ValueError("missing required field 'Title'")
+            except ValueError as e:
+                errors.append(f"row {row_number}: {e}")
+                continue
+
+            changed = {field: value for field, value in fields.items() if _stored(chapter, field) != value}
+            if changed:
+                updates[chapter_id] = changed
+            else:
+                unchanged += 1
+    except (OSError, ValueError, csv.Error) as e:
+        return f"❌ Could not read {os.path.basename(path)}: {e}", {}
+
+    if errors and not skip_invalid:
+        shown = "; ".join(errors[:5]) + (f"; ... and {len(errors) - 5} more" if len(errors) > 5 else "")
+        return f"❌ Import aborted, invalid rows: {shown}", {"errors": errors}
+    if not updates and not new_chapters:
+        return f"✅ Nothing to change ({unchanged} chapters already up to date).", {"unchanged": unchanged, "errors": errors}
+
+    message, stats = apply_chapter_changes(updates, new_chapters)
+    stats = dict(stats, unchanged=unchanged, errors=errors)
+    if errors:
+        message += f" ({len(errors)} invalid rows skipped)"
+    return message, stats
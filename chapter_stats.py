@@ -0,0 +1,106 @@
+"""Chapter statistics kept as running totals instead of being recounted on every render."""
+
+from collections import Counter
+from typing import Dict, Any, Optional, Tuple
+from config import CHAPTER_STATS_FILE
+from entity_index import EntityIndex
+
+# Chapter fields whose words count towards a story's word count
+WORD_COUNT_FIELDS = ("outline", "content")
+
+
+def count_words(record: Dict[str, Any]) -> int:
+    """Number of words in a chapter's written text."""
+    return sum(
+        len(value.split()) for value in (record.get(field) for field in WORD_COUNT_FIELDS)
+        if isinstance(value, str)
+    )
+
+
+class ChapterStatistics(EntityIndex):
+    """Chapter counts by status, story and act, plus word counts and progress per story.
+
+    Each chapter's contribution is remembered, so an edit only subtracts its old row and
+    adds the new one; reading the totals never walks the chapters.
+    """
+
+    collections = ("chapters",)
+
+    def __init__(self, path: Optional[str] = CHAPTER_STATS_FILE, **kwargs):
+        super().__init__(path=path, **kwargs)
+
+    def _reset(self):
+        self._rows: Dict[str, Tuple[str, str, Any, int]] = {}
+        self._by_status: Counter = Counter()
+        self._by_act: Counter = Counter()
+        self._story_chapters: Counter = Counter()
+        self._story_done: Counter = Counter()
+        self._story_words: Counter = Counter()
+
+    def _count(self, row: Tuple[str, str, Any, int], sign: int):
+        story_id, status, act_number, words = row
+        for counter, key, amount in (
+            (self._by_status, status, 1),
+            (self._by_act, act_number, 1),
+            (self._story_chapters, story_id, 1),
+            (self._story_done, story_id, 1 if status == "Done" else 0),
+            (self._story_words, story_id, words),
+        ):
+            counter[key] += sign * amount
+            if not counter[key]:
+                del counter[key]
+
+    def _add(self, collection: str, entity_id: str, record: Dict[str, Any]):
+        row = (record.get("story_id") or "", record.get("status", "Not Started"),
+               record.get("act_number", "Unknown"), count_words(record))
+        self._rows[entity_id] = row
+        self._count(row, 1)
+
+    def _remove(self, collection: str, entity_id: str):
+        row = self._rows.pop(entity_id, None)
+        if row is not None:
+            self._count(row, -1)
+
+    def _get_state(self):
+        return (self._rows, self._by_status, self._by_act,
+                self._story_chapters, self._story_done, self._story_words)
+
+    def _set_state(self, state):
+        (self._rows, self._by_status, self._by_act,
+         self._story_chapters, self._story_done, self._story_words) = state
+
+    def totals(self) -> Dict[str, Any]:
+        """Chapter counts by status and act, and per-story chapters, done chapters and words."""
+        with self._lock:
+            self.sync()
+            return {
+                "total": len(self._rows),
+                "words": sum(self._story_words.values()),
+                "by_status": dict(self._by_status),
+                "by_act": dict(self._by_act),
+                "stories": {
+                    story_id: {
+                        "chapters": chapters,
+                        "done": self._story_done.get(story_id, 0),
+                        "words": self._story_words.get(story_id, 0),
+                    }
+                    for story_id, chapters in self._story_chapters.items()
+                },
+            }
+
+    def story_totals(self, story_id: str) -> Dict[str, Any]:
+        """Chapters, done chapters, words and progress (0-100) of one story."""
+        with self._lock:
+            self.sync()
+            chapters = self._story_chapters.get(story_id, 0)
+            done = self._story_done.get(story_id, 0)
+            return {
+                "chapters": chapters,
+                "done": done,
+                "words": self._story_words.get(story_id, 0),
+                "progress": done / chapters * 100 if chapters else 0.0,
+            }
+
+
+# Global chapter statistics instance
+chapter_stats = ChapterStatistics()
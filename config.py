@@ -5,9 +5,55 @@ import os
 
 # File paths
 PROJECTS_FILE = "projects.json"
+SQLITE_DB_FILE = "projects.db"
+JOURNAL_FILE = "projects.journal.jsonl"
+WORKSPACE_DIR = "workspace"
+WORKSPACE_LOCK_FILE = "projects.lock"
+BLOB_DIR = "blobs"
+REVISIONS_DIR = "revisions"
+EMBEDDING_CACHE_DIR = "embedding_cache"
+SEARCH_INDEX_FILE = "search_index.pkl"
+SUBSTRING_INDEX_FILE = "substring_index.pkl"
+CHAPTER_INDEX_FILE = "chapter_index.pkl"
+CHAPTER_STATS_FILE = "chapter_stats.pkl"
+SCENE_INDEX_FILE = "scene_index.pkl"
 AUDIO_FOLDER = "audio_output"
 TEMP_FOLDER = "temp"
 
+# Workspace storage backend: "json" (single projects.json file), "journal"
+# (projects.json snapshot plus an append-only change journal), "sharded"
+# (one file per entity under WORKSPACE_DIR) or "sqlite"
+STORAGE_BACKEND = os.getenv("SCRIPTVOICE_STORAGE_BACKEND", "json").strip().lower()
+
+# Saves arriving within this window are coalesced into a single write (0 = write immediately)
+SAVE_DEBOUNCE_MS = int(os.getenv("SCRIPTVOICE_SAVE_DEBOUNCE_MS", "250"))
+
+# Text fields (content, notes, long descriptions) at least this long are kept in the
+# blob store and loaded on access (0 = keep everything inline)
+LAZY_TEXT_MIN_CHARS = int(os.getenv("SCRIPTVOICE_LAZY_TEXT_MIN_CHARS", "2048"))
+BLOB_CACHE_BYTES = 32 * 1024 * 1024
+
+# Journal size at which it is folded back into the projects.json snapshot
+JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
+
+# Number of Gradio events processed concurrently; mutations are serialized by the workspace lock
+GRADIO_CONCURRENCY_LIMIT = int(os.getenv("SCRIPTVOICE_CONCURRENCY_LIMIT", "1"))
+
+# Rows per page in the Database tab's chapter table
+CHAPTER_PAGE_SIZE = 50
+
+# Chapter search: results returned, and the reciprocal rank fusion constant used to
+# merge the keyword (BM25) and semantic rankings
+SEARCH_TOP_K = int(os.getenv("SCRIPTVOICE_SEARCH_TOP_K", "50"))
+RRF_K = 60
+
+# Script revision history: every Nth saved revision is stored whole, the rest as
+# compressed line deltas, so reading any revision replays at most N-1 deltas
+REVISION_SNAPSHOT_INTERVAL = int(os.getenv("SCRIPTVOICE_REVISION_SNAPSHOT_INTERVAL", "20"))
+
+# Number of workspace operations kept for undo/redo per browser session
+UNDO_LOG_SIZE = int(os.getenv("SCRIPTVOICE_UNDO_LOG_SIZE", "50"))
+
 # IONOS AI Model Hub settings (primary)
 IONOS_API_TOKEN = os.getenv("IONOS_API_TOKEN", "").strip()
 IONOS_MODEL_NAME = "meta-llama/Meta-Llama-3.1-8B-Instruct"
@@ -40,6 +86,19 @@ VECTOR_DB_CHUNK_OVERLAP = 50
 # Model settings
 SENTENCE_TRANSFORMER_MODEL = "all-MiniLM-L6-v2"
 
+# Chunks per model.encode call when many texts are embedded at once (bulk import, rebuilds)
+EMBEDDING_BATCH_SIZE = 64
+
+# On-disk cache of chunk embeddings, keyed by model and chunk text: its size bound and
+# the precision vectors are kept at ("float16" halves the size, "float32" is exact)
+EMBEDDING_CACHE_MB = int(os.getenv("SCRIPTVOICE_EMBEDDING_CACHE_MB", "256"))
+EMBEDDING_CACHE_DTYPE = os.getenv("SCRIPTVOICE_EMBEDDING_CACHE_DTYPE", "float16")
+
+# Worker processes for embedding during index rebuilds and bulk imports (below 2 = embed
+# in-process), and the torch threads each worker runs on its own cores
+EMBEDDING_WORKERS = int(os.getenv("SCRIPTVOICE_EMBEDDING_WORKERS", "0"))
+EMBEDDING_THREADS_PER_WORKER = int(os.getenv("SCRIPTVOICE_EMBEDDING_THREADS_PER_WORKER", "1"))
+
 # AI Provider validation
 def is_ionos_configured():
     """Check if IONOS is properly configured."""
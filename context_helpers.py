@@ -2,7 +2,7 @@
 """Helper functions to get context from story elements."""
 
 import json
-from models import load_projects
+from models import get_entity
 
 def get_story_context(story_id):
     """Get story context for image generation."""
@@ -10,9 +10,7 @@ def get_story_context(story_id):
         return ""
     
     try:
-        data = load_projects()
-        stories = data.get("stories", {})
-        story = stories.get(story_id, {})
+        story = get_entity("stories", story_id) or {}
         
         title = story.get("title", "")
         description = story.get("description", "")
@@ -27,9 +25,7 @@ def get_character_context(character_id):
         return ""
     
     try:
-        data = load_projects()
-        characters = data.get("characters", {})
-        character = characters.get(character_id, {})
+        character = get_entity("characters", character_id) or {}
         
         name = character.get("name", "")
         description = character.get("description", "")
@@ -44,9 +40,7 @@ def get_world_context(world_id):
         return ""
     
     try:
-        data = load_projects()
-        world_elements = data.get("world_elements", {})
-        element = world_elements.get(world_id, {})
+        element = get_entity("world_elements", world_id) or {}
         
         name = element.get("name", "")
         description = element.get("description", "")
@@ -3,13 +3,15 @@
 
 import gradio as gr
 import pandas as pd
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from database_models import (
     get_all_chapters, get_chapters_for_story, create_chapter, 
-    update_chapter, delete_chapter, search_chapters, 
-    get_chapter_statistics, bulk_update_chapters
+    update_chapter, delete_chapter, search_chapters, rank_chapters,
+    get_chapter_statistics, bulk_update_chapters, query_chapters,
+    get_chapter_index
 )
-from models import load_projects
+from models import list_entities
+from config import CHAPTER_PAGE_SIZE
 
 
 def create_database_interface():
@@ -60,9 +62,10 @@ def create_database_interface():
                     value="All"
                 )
         
-        # Main chapters table
+        # Main chapters table (one page at a time)
+        initial_table, _, initial_page_info = load_chapter_page(None, "All", "All", 1, CHAPTER_PAGE_SIZE)
         chapters_table = gr.DataFrame(
-            value=_format_chapters_for_display(get_all_chapters()),
+            value=initial_table,
             headers=["ID", "Story", "Act", "Block", "Chapter", "Title", "Outline", "Characters", "Location", "Status", "Progress"],
             datatype=["str", "str", "number", "number", "number", "str", "str", "str", "str", "str", "str"],
             interactive=True,
@@ -70,12 +73,32 @@ def create_database_interface():
             elem_id="chapters-table"
         )
         
+        # Pagination controls
+        with gr.Row():
+            prev_page_btn = gr.Button("◀ Previous", variant="secondary", size="sm")
+            page_number = gr.Number(value=1, label="Page", minimum=1, precision=0)
+            page_size = gr.Dropdown(choices=[25, 50, 100, 200], value=CHAPTER_PAGE_SIZE, label="Rows per page")
+            next_page_btn = gr.Button("Next ▶", variant="secondary", size="sm")
+        page_info = gr.HTML(value=initial_page_info, elem_id="chapters-page-info")
+        
         # Action buttons
         with gr.Row():
             add_chapter_btn = gr.Button("➕ Add Chapter", variant="primary")
             edit_chapter_btn = gr.Button("✏️ Edit Selected", variant="secondary")
             delete_chapter_btn = gr.Button("🗑️ Delete Selected", variant="stop")
             bulk_update_btn = gr.Button("📝 Bulk Update", variant="secondary")
+            undo_btn = gr.Button("↩️ Undo", variant="secondary")
+            redo_btn = gr.Button("↪️ Redo", variant="secondary")
+        
+        # Spreadsheet export (current filters) and import
+        with gr.Row():
+            with gr.Column(scale=1):
+                export_format = gr.Radio(choices=["CSV", "XLSX"], value="CSV", label="Export Format")
+                export_btn = gr.Button("📤 Export Chapters", variant="secondary")
+                export_file = gr.File(label="Download Export", visible=False)
+            with gr.Column(scale=1):
+                import_file = gr.File(label="Import Chapters (CSV/XLSX)", file_types=[".csv", ".xlsx"])
+                import_btn = gr.Button("📥 Import Sheet", variant="secondary")
         
         # Chapter creation/editing form (initially hidden)
         with gr.Group(visible=False) as chapter_form:
@@ -140,6 +163,24 @@ def create_database_interface():
                 placeholder="Text to append to existing notes..."
             )
             
+            with gr.Row():
+                bulk_clear = gr.CheckboxGroup(
+                    choices=[("Location", "location"), ("Notes", "notes"), ("Characters", "characters")],
+                    label="Clear Fields",
+                    value=[]
+                )
+                bulk_act = gr.Dropdown(
+                    choices=[""] + [f"Act {i}" for i in range(1, 6)],
+                    label="Move to Act",
+                    value=""
+                )
+            
+            bulk_scope = gr.Radio(
+                choices=["Chapters on this page", "All chapters matching the filters"],
+                label="Apply To",
+                value="Chapters on this page"
+            )
+            
             with gr.Row():
                 apply_bulk_btn = gr.Button("✅ Apply Updates", variant="primary")
                 cancel_bulk_btn = gr.Button("❌ Cancel", variant="secondary")
@@ -149,6 +190,7 @@ def create_database_interface():
         
         # Hidden components for state management
         selected_chapter_id = gr.State("")
+        selected_chapter_version = gr.State(None)
         editing_mode = gr.State(False)
         selected_rows = gr.State([])
     
@@ -162,10 +204,22 @@ def create_database_interface():
         'status_filter': status_filter,
         'act_filter': act_filter,
         'chapters_table': chapters_table,
+        'prev_page_btn': prev_page_btn,
+        'next_page_btn': next_page_btn,
+        'page_number': page_number,
+        'page_size': page_size,
+        'page_info': page_info,
         'add_chapter_btn': add_chapter_btn,
         'edit_chapter_btn': edit_chapter_btn,
         'delete_chapter_btn': delete_chapter_btn,
         'bulk_update_btn': bulk_update_btn,
+        'undo_btn': undo_btn,
+        'redo_btn': redo_btn,
+        'export_format': export_format,
+        'export_btn': export_btn,
+        'export_file': export_file,
+        'import_file': import_file,
+        'import_btn': import_btn,
         'chapter_form': chapter_form,
         'chapter_story': chapter_story,
         'chapter_act': chapter_act,
@@ -182,10 +236,14 @@ def create_database_interface():
         'bulk_status': bulk_status,
         'bulk_location': bulk_location,
         'bulk_notes': bulk_notes,
+        'bulk_act': bulk_act,
+        'bulk_clear': bulk_clear,
+        'bulk_scope': bulk_scope,
         'apply_bulk_btn': apply_bulk_btn,
         'cancel_bulk_btn': cancel_bulk_btn,
         'database_status': database_status,
         'selected_chapter_id': selected_chapter_id,
+        'selected_chapter_version': selected_chapter_version,
         'editing_mode': editing_mode,
         'selected_rows': selected_rows
     }
@@ -196,6 +254,7 @@ def _get_stats_html() -> str:
     stats = get_chapter_statistics()
     
     total = stats.get('total', 0)
+    words = stats.get('words', 0)
     by_status = stats.get('by_status', {})
     
     # Calculate progress percentage
@@ -226,6 +285,7 @@ def _get_stats_html() -> str:
             <div style="text-align: center; margin-bottom: 15px;">
                 <div style="color: #ffffff; font-size: 2em; font-weight: bold;">{total}</div>
                 <div style="color: #cccccc; font-size: 0.9em;">Total Chapters</div>
+                <div style="color: #cccccc; font-size: 0.9em; margin-top: 5px;">{words:,} words written</div>
             </div>
             <div style="margin-bottom: 15px;">
                 <div style="background: #1a1a1a; border-radius: 10px; height: 8px; overflow: hidden;">
@@ -242,31 +302,30 @@ def _get_stats_html() -> str:
 
 def _get_story_choices() -> List[Tuple[str, str]]:
     """Get story choices for dropdown."""
-    data = load_projects()
-    stories = data.get("stories", {})
+    stories = list_entities("stories")
     return [(story["title"], story_id) for story_id, story in stories.items()]
 
 
 def _get_character_choices() -> List[str]:
     """Get character choices for dropdown."""
-    data = load_projects()
-    characters = data.get("characters", {})
+    characters = list_entities("characters")
     return [char["name"] for char in characters.values()]
 
 
-def _format_chapters_for_display(chapters: List[Dict[str, Any]]) -> pd.DataFrame:
-    """Format chapters data for display in the table."""
+def _format_chapters_for_display(chapters: List[Dict[str, Any]], scores: Optional[List[float]] = None) -> pd.DataFrame:
+    """Format chapters data for display in the table; search results add a Relevance column."""
     if not chapters:
         return pd.DataFrame(columns=["ID", "Story", "Act", "Block", "Chapter", "Title", "Outline", "Characters", "Location", "Status", "Progress"])
     
-    data = load_projects()
+    stories = list_entities("stories")
+    chapter_index = get_chapter_index()
     formatted_data = []
     
     for chapter in chapters:
         # Get story title
         story_title = "Unknown Story"
-        if chapter.get("story_id") and chapter["story_id"] in data.get("stories", {}):
-            story_title = data["stories"][chapter["story_id"]]["title"]
+        if chapter.get("story_id") and chapter["story_id"] in stories:
+            story_title = stories[chapter["story_id"]]["title"]
         
         # Format characters
         characters_str = ", ".join(chapter.get("characters", []))
@@ -292,7 +351,7 @@ def _format_chapters_for_display(chapters: List[Dict[str, Any]]) -> pd.DataFrame
             story_title,
             chapter.get("act_number", 1),
             chapter.get("block_number", 1),
-            chapter.get("chapter_number", 1),
+            chapter_index.display_number(chapter["id"]) or chapter.get("chapter_number", 1),
             chapter.get("title", ""),
             outline,
             characters_str,
@@ -301,45 +360,84 @@ def _format_chapters_for_display(chapters: List[Dict[str, Any]]) -> pd.DataFrame
             progress_indicator
         ])
     
-    return pd.DataFrame(
+    table = pd.DataFrame(
         formatted_data,
         columns=["ID", "Story", "Act", "Block", "Chapter", "Title", "Outline", "Characters", "Location", "Status", "Progress"]
     )
+    if scores is not None:
+        table["Relevance"] = [round(score, 4) for score in scores]
+    return table
+
+
+def _filter_values(story_filter: str, status_filter: str, act_filter: str):
+    """Turn the filter dropdown values into query_chapters arguments."""
+    story_id = story_filter if story_filter and story_filter != "All" else None
+    status = status_filter if status_filter and status_filter != "All" else None
+    act_number = int(act_filter.replace("Act ", "")) if act_filter and act_filter != "All" else None
+    return story_id, status, act_number
+
+
+def _page_info_html(page: int, page_size: int, total: int, label: str = "chapters") -> str:
+    """Describe which rows of the result the table is showing."""
+    if total == 0:
+        return f"<div style='color: #cccccc; text-align: center;'>No {label}</div>"
+    first = (page - 1) * page_size + 1
+    last = min(page * page_size, total)
+    pages = (total + page_size - 1) // page_size
+    return f"<div style='color: #cccccc; text-align: center;'>Showing {first}–{last} of {total} {label} · Page {page} of {pages}</div>"
+
+
+def load_chapter_page(story_filter: str, status_filter: str, act_filter: str, page, page_size):
+    """Render one page of the filtered chapters table."""
+    page_size = int(page_size) if page_size else CHAPTER_PAGE_SIZE
+    page = max(int(page) if page else 1, 1)
+    story_id, status, act_number = _filter_values(story_filter, status_filter, act_filter)
+    
+    chapters, total = query_chapters(story_id, status, act_number, offset=(page - 1) * page_size, limit=page_size)
+    pages = max((total + page_size - 1) // page_size, 1)
+    if page > pages:
+        # The requested page no longer exists (e.g. after deletes); show the last one
+        page = pages
+        chapters, total = query_chapters(story_id, status, act_number, offset=(page - 1) * page_size, limit=page_size)
+    
+    return _format_chapters_for_display(chapters), page, _page_info_html(page, page_size, total)
+
+
+def next_chapter_page(story_filter: str, status_filter: str, act_filter: str, page, page_size):
+    """Show the page after the current one."""
+    return load_chapter_page(story_filter, status_filter, act_filter, (int(page) if page else 1) + 1, page_size)
+
+
+def previous_chapter_page(story_filter: str, status_filter: str, act_filter: str, page, page_size):
+    """Show the page before the current one."""
+    return load_chapter_page(story_filter, status_filter, act_filter, (int(page) if page else 1) - 1, page_size)
 
 
 def refresh_database_display():
     """Refresh the database display with current data."""
-    chapters = get_all_chapters()
+    table, _, _ = load_chapter_page(None, "All", "All", 1, CHAPTER_PAGE_SIZE)
     return (
-        _format_chapters_for_display(chapters),
+        table,
         _get_stats_html(),
         gr.update(choices=_get_story_choices()),
         gr.update(choices=_get_character_choices())
     )
 
 
-def filter_chapters(story_filter: str, status_filter: str, act_filter: str):
-    """Filter chapters based on selected criteria."""
-    chapters = get_all_chapters()
-    
-    # Apply filters
-    if story_filter and story_filter != "All":
-        chapters = [c for c in chapters if c.get("story_id") == story_filter]
-    
-    if status_filter and status_filter != "All":
-        chapters = [c for c in chapters if c.get("status") == status_filter]
-    
-    if act_filter and act_filter != "All":
-        act_num = int(act_filter.replace("Act ", ""))
-        chapters = [c for c in chapters if c.get("act_number") == act_num]
-    
-    return _format_chapters_for_display(chapters)
+def filter_chapters(story_filter: str, status_filter: str, act_filter: str, page_size=CHAPTER_PAGE_SIZE):
+    """Filter chapters based on selected criteria, starting again from the first page."""
+    return load_chapter_page(story_filter, status_filter, act_filter, 1, page_size)
 
 
-def search_chapters_handler(query: str):
-    """Handle chapter search."""
+def search_chapters_handler(query: str, page_size=CHAPTER_PAGE_SIZE):
+    """Handle chapter search; the table shows the best matches, one page worth."""
     if not query.strip():
-        return _format_chapters_for_display(get_all_chapters())
+        table, _, page_info = load_chapter_page(None, "All", "All", 1, page_size)
+        return table, page_info
     
-    results = search_chapters(query)
-    return _format_chapters_for_display(results)
+    page_size = int(page_size) if page_size else CHAPTER_PAGE_SIZE
+    results = rank_chapters(query, top_k=page_size)
+    return (
+        _format_chapters_for_display([chapter for chapter, _ in results], [score for _, score in results]),
+        _page_info_html(1, page_size, len(results), "best matching chapters")
+    )
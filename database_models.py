@@ -1,10 +1,15 @@
 
 """Database models for chapter, act, and scene management."""
 
+import heapq
 import json
 import uuid
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
+from document_store import ConflictError, thaw
+from chapter_index import rank_between, ranks_between, chapter_sort_key, _as_int
+from search_index import reciprocal_rank_fusion
+from config import SEARCH_TOP_K
 
 def get_models():
     """Safely import models to avoid circular imports."""
@@ -15,6 +20,69 @@ def get_models():
         print(f"Warning: Could not import models: {e}")
         return None, None
 
+def get_projects_reader():
+    """Safely import the cached read-only projects view."""
+    try:
+        from models import get_projects_view
+        return get_projects_view
+    except ImportError as e:
+        print(f"Warning: Could not import models: {e}")
+        return None
+
+def get_entity_store():
+    """Safely import the document store for single-entity reads and writes."""
+    try:
+        from document_store import document_store
+        return document_store
+    except ImportError as e:
+        print(f"Warning: Could not import document store: {e}")
+        return None
+
+def get_search_entities():
+    """Safely import the indexed substring search."""
+    try:
+        from substring_index import search_entities
+        return search_entities
+    except ImportError as e:
+        print(f"Warning: Could not import search index: {e}")
+        return None
+
+def get_chapter_index():
+    """Safely import the ordered chapter index."""
+    try:
+        from chapter_index import chapter_index
+        return chapter_index
+    except ImportError as e:
+        print(f"Warning: Could not import chapter index: {e}")
+        return None
+
+def get_chapter_stats():
+    """Safely import the running chapter statistics."""
+    try:
+        from chapter_stats import chapter_stats
+        return chapter_stats
+    except ImportError as e:
+        print(f"Warning: Could not import chapter statistics: {e}")
+        return None
+
+def get_scene_tree():
+    """Safely import the story/act/block/chapter/scene tree index."""
+    try:
+        from scene_index import scene_tree
+        return scene_tree
+    except ImportError as e:
+        print(f"Warning: Could not import scene index: {e}")
+        return None
+
+def get_operation_log():
+    """Safely import the undo/redo operation log."""
+    try:
+        from operation_log import operation_log
+        return operation_log
+    except ImportError as e:
+        print(f"Warning: Could not import operation log: {e}")
+        return None
+
 def get_rag_service():
     """Safely import RAG service."""
     try:
@@ -24,62 +92,74 @@ def get_rag_service():
         print(f"Warning: Could not import RAG service: {e}")
         return None
 
+def _story_title(store, story_id: str) -> str:
+    """Look up a story title from the story summaries."""
+    if not story_id:
+        return ""
+    story = store.list_entities("stories").get(story_id)
+    return story["title"] if story else ""
+
+def chapter_rag_document(chapter: Dict[str, Any], story_title: str, number: Optional[int] = None) -> Tuple[str, str]:
+    """Build the (content, title) pair a chapter is indexed under in the vector store.
+    
+    `number` is the chapter's display number when it was indexed; it is not refreshed
+    when other chapters move, so reordering never re-embeds neighbours.
+    """
+    if number is None:
+        number = chapter.get("chapter_number", "")
+    content_for_rag = f"Chapter {number}: {chapter['title']}\n\nStory: {story_title}\nAct {chapter['act_number']}, Block {chapter['block_number']}\n\nOutline: {chapter['outline']}\n\nLocation: {chapter['location']}\nCharacters: {', '.join(chapter.get('characters', []))}\n\nNotes: {chapter['notes']}"
+    return content_for_rag, f"{story_title} - Chapter {number}: {chapter['title']}"
+
+def _index_chapter(rag_service, chapter: Dict[str, Any], story_title: str):
+    """Add or refresh a chapter in the vector index."""
+    chapter_index = get_chapter_index()
+    number = chapter_index.display_number(chapter["id"]) if chapter_index else None
+    rag_service.add_content(*rag_item("chapters", chapter["id"], chapter, story_title, number))
+
 def create_chapter(story_id: str, act_number: int, block_number: int, title: str, outline: str = "", characters: List[str] = None, location: str = "", status: str = "Not Started", notes: str = "") -> Tuple[str, Dict[str, Any]]:
     """Create a new chapter within a story."""
     if not title.strip():
         return "❌ Chapter title cannot be empty.", {}
     
-    load_projects, save_projects = get_models()
-    if not load_projects or not save_projects:
+    store = get_entity_store()
+    if not store:
         return "❌ Error accessing data models.", {}
     
     try:
-        data = load_projects()
-        
-        # Ensure chapters structure exists
-        if "chapters" not in data:
-            data["chapters"] = {}
-        
-        chapter_id = str(uuid.uuid4())
-        characters_list = characters or []
-        
-        chapter = {
-            "id": chapter_id,
-            "story_id": story_id,
-            "act_number": act_number,
-            "block_number": block_number,
-            "chapter_number": len([c for c in data["chapters"].values() if c.get("story_id") == story_id and c.get("act_number") == act_number]) + 1,
-            "title": title.strip(),
-            "outline": outline.strip(),
-            "content": "",
-            "characters": characters_list,
-            "location": location.strip(),
-            "status": status,
-            "notes": notes.strip(),
-            "scenes": [],
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        data["chapters"][chapter_id] = chapter
-        
-        if save_projects(data):
-            # Add to vector storage for semantic search
-            rag_service = get_rag_service()
-            if rag_service:
-                try:
-                    story_title = ""
-                    if story_id and story_id in data.get("stories", {}):
-                        story_title = data["stories"][story_id]["title"]
-                    
-                    content_for_rag = f"Chapter {chapter['chapter_number']}: {title}\n\nStory: {story_title}\nAct {act_number}, Block {block_number}\n\nOutline: {outline}\n\nLocation: {location}\nCharacters: {', '.join(characters_list)}\n\nNotes: {notes}"
-                    rag_service.add_content(content_for_rag, "chapter", chapter_id, f"{story_title} - Chapter {chapter['chapter_number']}: {title}")
-                except Exception as e:
-                    print(f"Warning: Could not update RAG index: {e}")
+        # Ranking and insert happen under the workspace lock so concurrent creates don't collide
+        chapter_index = get_chapter_index()
+        with store.transaction(label=f"Create chapter '{title.strip()}'") as txn:
+            chapter_id = str(uuid.uuid4())
+            characters_list = characters or []
             
-            return f"✅ Chapter '{title}' created successfully!", chapter
-        else:
-            return "❌ Error saving chapter.", {}
+            chapter = {
+                "id": chapter_id,
+                "story_id": story_id,
+                "act_number": act_number,
+                "block_number": block_number,
+                "rank": rank_between(chapter_index.last_rank(story_id or "", act_number, block_number), None),
+                "title": title.strip(),
+                "outline": outline.strip(),
+                "content": "",
+                "characters": characters_list,
+                "location": location.strip(),
+                "status": status,
+                "notes": notes.strip(),
+                "scenes": [],
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat()
+            }
+            txn.put("chapters", chapter_id, chapter)
+        
+        # Add to vector storage for semantic search
+        rag_service = get_rag_service()
+        if rag_service:
+            try:
+                _index_chapter(rag_service, chapter, _story_title(store, story_id))
+            except Exception as e:
+                print(f"Warning: Could not update RAG index: {e}")
+        
+        return f"✅ Chapter '{title}' created successfully!", chapter
     
     except Exception as e:
         print(f"Error creating chapter: {e}")
@@ -87,211 +167,346 @@ def create_chapter(story_id: str, act_number: int, block_number: int, title: str
 
 # ... keep existing code (update_chapter, delete_chapter, get_chapters_for_story, get_all_chapters, search_chapters, get_chapter_statistics, bulk_update_chapters functions)
 
-def update_chapter(chapter_id: str, updates: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
-    """Update an existing chapter."""
-    load_projects, save_projects = get_models()
-    if not load_projects or not save_projects:
+def update_chapter(chapter_id: str, updates: Dict[str, Any], expected_version: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+    """Update an existing chapter; if expected_version is given, refuse to overwrite newer edits."""
+    store = get_entity_store()
+    if not store:
         return "❌ Error accessing data models.", {}
     
     try:
-        data = load_projects()
-        
-        if "chapters" not in data or chapter_id not in data["chapters"]:
-            return "❌ Chapter not found.", {}
-        
-        chapter = data["chapters"][chapter_id]
-        chapter.update(updates)
-        chapter["updated_at"] = datetime.now().isoformat()
-        
-        if save_projects(data):
-            # Update vector storage
-            rag_service = get_rag_service()
-            if rag_service:
-                try:
-                    story_title = ""
-                    if chapter.get("story_id") and chapter["story_id"] in data.get("stories", {}):
-                        story_title = data["stories"][chapter["story_id"]]["title"]
-                    
-                    content_for_rag = f"Chapter {chapter['chapter_number']}: {chapter['title']}\n\nStory: {story_title}\nAct {chapter['act_number']}, Block {chapter['block_number']}\n\nOutline: {chapter['outline']}\n\nLocation: {chapter['location']}\nCharacters: {', '.join(chapter.get('characters', []))}\n\nNotes: {chapter['notes']}"
-                    rag_service.add_content(content_for_rag, "chapter", chapter_id, f"{story_title} - Chapter {chapter['chapter_number']}: {chapter['title']}")
-                except Exception as e:
-                    print(f"Warning: Could not update RAG index: {e}")
+        with store.transaction(label="Update chapter") as txn:
+            chapter = txn.get("chapters", chapter_id)
+            if chapter is None:
+                return "❌ Chapter not found.", {}
             
-            return "✅ Chapter updated successfully!", chapter
-        else:
-            return "❌ Error updating chapter.", {}
+            if expected_version is not None and chapter.get("version", 0) != expected_version:
+                raise ConflictError(f"chapters entity {chapter_id} was modified by another writer")
+            
+            placement = (chapter.get("story_id"), chapter.get("act_number"), chapter.get("block_number"))
+            chapter.update(updates)
+            if "rank" not in updates and (chapter.get("story_id"), chapter.get("act_number"), chapter.get("block_number")) != placement:
+                # A chapter moved to another block goes to the end of it
+                low, _ = get_chapter_index().slot_ranks(chapter.get("story_id") or "", chapter["act_number"], chapter["block_number"], exclude={chapter_id})
+                chapter["rank"] = rank_between(low, None)
+                chapter.pop("chapter_number", None)
+            chapter["updated_at"] = datetime.now().isoformat()
+            txn.put("chapters", chapter_id, chapter)
+        
+        # Update vector storage
+        rag_service = get_rag_service()
+        if rag_service:
+            try:
+                _index_chapter(rag_service, chapter, _story_title(store, chapter.get("story_id")))
+            except Exception as e:
+                print(f"Warning: Could not update RAG index: {e}")
+        
+        return "✅ Chapter updated successfully!", chapter
     
+    except ConflictError:
+        return "❌ This chapter was changed by someone else since you opened it. Reload and try again.", {}
     except Exception as e:
         print(f"Error updating chapter: {e}")
         return f"❌ Error updating chapter: {str(e)}", {}
 
-def delete_chapter(chapter_id: str) -> str:
-    """Delete a chapter."""
-    load_projects, save_projects = get_models()
-    if not load_projects or not save_projects:
+def delete_chapter(chapter_id: str, expected_version: Optional[int] = None) -> str:
+    """Delete a chapter; if expected_version is given, refuse to delete newer edits."""
+    store = get_entity_store()
+    if not store:
         return "❌ Error accessing data models."
     
     try:
-        data = load_projects()
-        
-        if "chapters" not in data or chapter_id not in data["chapters"]:
-            return "❌ Chapter not found."
-        
-        chapter_title = data["chapters"][chapter_id]["title"]
-        del data["chapters"][chapter_id]
-        
-        if save_projects(data):
-            # Remove from vector storage
-            rag_service = get_rag_service()
-            if rag_service:
-                try:
-                    rag_service.remove_content(chapter_id)
-                except Exception as e:
-                    print(f"Warning: Could not remove from RAG index: {e}")
+        with store.transaction(label="Delete chapter") as txn:
+            chapter = txn.get("chapters", chapter_id)
+            if chapter is None:
+                return "❌ Chapter not found."
             
-            return f"✅ Chapter '{chapter_title}' deleted successfully!"
-        else:
-            return "❌ Error deleting chapter."
+            chapter_title = chapter["title"]
+            txn.delete("chapters", chapter_id, version=expected_version)
+            
+            # The chapter's scenes go with it
+            scene_tree = get_scene_tree()
+            scene_ids = scene_tree.scene_ids(chapter_id=chapter_id) if scene_tree else []
+            for scene_id in scene_ids:
+                txn.delete("scenes", scene_id)
+        
+        # Remove from vector storage
+        rag_service = get_rag_service()
+        if rag_service:
+            try:
+                rag_service.remove_contents([chapter_id] + scene_ids)
+            except Exception as e:
+                print(f"Warning: Could not remove from RAG index: {e}")
+        
+        return f"✅ Chapter '{chapter_title}' deleted successfully!"
     
+    except ConflictError:
+        return "❌ This chapter was changed by someone else. Reload and try again."
     except Exception as e:
         print(f"Error deleting chapter: {e}")
         return f"❌ Error deleting chapter: {str(e)}"
 
-def get_chapters_for_story(story_id: str) -> List[Dict[str, Any]]:
-    """Get all chapters for a specific story, sorted by act, block, and chapter number."""
-    load_projects, _ = get_models()
-    if not load_projects:
-        return []
+def move_chapter(chapter_id: str, act_number: Optional[int] = None, block_number: Optional[int] = None,
+                 before_id: Optional[str] = None, after_id: Optional[str] = None,
+                 expected_version: Optional[int] = None) -> str:
+    """Move a chapter right before/after another chapter, or to the end of an act and block.
+    
+    Only the moved chapter is rewritten: it gets a rank between its new neighbours, and
+    display numbers follow from the order. It is re-embedded only if its act or block changed.
+    """
+    store = get_entity_store()
+    chapter_index = get_chapter_index()
+    if not store or not chapter_index:
+        return "❌ Error accessing data models."
     
     try:
-        data = load_projects()
+        with store.transaction(label="Move chapter") as txn:
+            chapter = txn.get("chapters", chapter_id)
+            if chapter is None:
+                return "❌ Chapter not found."
+            if expected_version is not None and chapter.get("version", 0) != expected_version:
+                raise ConflictError(f"chapters entity {chapter_id} was modified by another writer")
+            
+            anchor_id = before_id or after_id
+            if anchor_id:
+                anchor = store.get_entity("chapters", anchor_id)
+                if anchor is None or anchor.get("story_id") != chapter.get("story_id"):
+                    return "❌ Target chapter not found in this story."
+                act_number, block_number = anchor.get("act_number"), anchor.get("block_number")
+            act_number = int(act_number) if act_number is not None else chapter.get("act_number", 1)
+            block_number = int(block_number) if block_number is not None else chapter.get("block_number", 1)
+            
+            low, high = chapter_index.slot_ranks(chapter.get("story_id") or "", act_number, block_number,
+                                                 before_id=before_id, after_id=after_id, exclude={chapter_id})
+            moved_block = (act_number, block_number) != (chapter.get("act_number"), chapter.get("block_number"))
+            chapter.update({"act_number": act_number, "block_number": block_number, "rank": rank_between(low, high)})
+            chapter.pop("chapter_number", None)
+            chapter["updated_at"] = datetime.now().isoformat()
+            txn.put("chapters", chapter_id, chapter)
         
-        if "chapters" not in data:
-            return []
+        rag_service = get_rag_service()
+        if rag_service and moved_block:
+            try:
+                _index_chapter(rag_service, chapter, _story_title(store, chapter.get("story_id")))
+            except Exception as e:
+                print(f"Warning: Could not update RAG index: {e}")
         
-        chapters = [c for c in data["chapters"].values() if c.get("story_id") == story_id]
-        chapters.sort(key=lambda x: (x.get("act_number", 0), x.get("block_number", 0), x.get("chapter_number", 0)))
+        return f"✅ Moved '{chapter['title']}' to Act {act_number}, Block {block_number}."
+    
+    except ConflictError:
+        return "❌ This chapter was changed by someone else. Reload and try again."
+    except Exception as e:
+        print(f"Error moving chapter: {e}")
+        return f"❌ Error moving chapter: {str(e)}"
+
+def _append_to_act(txn, chapter_index, chapters: List[Dict[str, Any]], act_number: int,
+                   block_number: Optional[int], now: str):
+    """Place chapters (in display order) at the end of their block in another act and write them."""
+    # Chapters of each target block are appended after that block's current last chapter
+    groups: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+    for chapter in chapters:
+        target_block = int(block_number) if block_number is not None else chapter.get("block_number", 1)
+        groups.setdefault((chapter.get("story_id") or "", target_block), []).append(chapter)
+    
+    moved_ids = {chapter["id"] for chapter in chapters}
+    for (story_id, target_block), group in groups.items():
+        last, _ = chapter_index.slot_ranks(story_id, act_number, target_block, exclude=moved_ids)
+        for chapter, rank in zip(group, ranks_between(last, None, len(group))):
+            chapter.update({"act_number": act_number, "block_number": target_block, "rank": rank, "updated_at": now})
+            chapter.pop("chapter_number", None)
+            txn.put("chapters", chapter["id"], chapter)
+
+def move_chapters_to_act(chapter_ids: List[str], act_number: int, block_number: Optional[int] = None) -> str:
+    """Move several chapters to the end of an act (and block) in one write, keeping their order."""
+    store = get_entity_store()
+    chapter_index = get_chapter_index()
+    if not store or not chapter_index:
+        return "❌ Error accessing data models."
+    
+    try:
+        act_number = int(act_number)
+        with store.transaction(label=f"Move {len(chapter_ids)} chapters to act {act_number}") as txn:
+            chapters = [c for c in (txn.get("chapters", chapter_id) for chapter_id in chapter_ids) if c is not None]
+            if not chapters:
+                return "❌ No chapters found."
+            chapters.sort(key=lambda c: chapter_sort_key(c["id"], c))
+            _append_to_act(txn, chapter_index, chapters, act_number, block_number, datetime.now().isoformat())
         
-        return chapters
+        # Act and block are part of the indexed text, so re-embed the moved chapters in one batch
+        rag_service = get_rag_service()
+        if rag_service:
+            try:
+                rag_service.add_contents([
+                    rag_item("chapters", chapter["id"], chapter, _story_title(store, chapter.get("story_id")),
+                             chapter_index.display_number(chapter["id"]))
+                    for chapter in chapters
+                ])
+            except Exception as e:
+                print(f"Warning: Could not update RAG index: {e}")
+        
+        return f"✅ Moved {len(chapters)} chapters to Act {act_number}."
+    
+    except Exception as e:
+        print(f"Error moving chapters: {e}")
+        return f"❌ Error moving chapters: {str(e)}"
+
+def get_chapters_for_story(story_id: str) -> List[Dict[str, Any]]:
+    """Get read-only summaries of all chapters for a story, sorted by act, block, and chapter number."""
+    store = get_entity_store()
+    if not store:
+        return []
+    
+    try:
+        chapter_index = get_chapter_index()
+        summaries = store.list_entities("chapters")
+        return [summaries[chapter_id] for chapter_id in chapter_index.chapter_ids(story_id or "") if chapter_id in summaries]
     
     except Exception as e:
         print(f"Error getting chapters for story: {e}")
         return []
 
-def get_all_chapters() -> List[Dict[str, Any]]:
-    """Get all chapters across all stories."""
-    load_projects, _ = get_models()
-    if not load_projects:
+def get_chapters_for_act(story_id: str, act_number: int) -> List[Dict[str, Any]]:
+    """Get read-only summaries of the chapters in one act of a story, in block and chapter order."""
+    store = get_entity_store()
+    chapter_index = get_chapter_index()
+    if not store or not chapter_index:
         return []
     
+    summaries = store.list_entities("chapters")
+    return [summaries[chapter_id] for chapter_id in chapter_index.chapter_ids(story_id or "", act_number) if chapter_id in summaries]
+
+def get_all_chapters() -> List[Dict[str, Any]]:
+    """Get read-only summaries (no content/notes) of all chapters across all stories."""
+    chapters, _ = query_chapters(limit=None)
+    return chapters
+
+def _project(record, fields: Optional[List[str]]):
+    """Return a plain dict holding only the requested fields, or the record itself."""
+    if fields is None:
+        return record
+    return {field: thaw(record.get(field)) for field in fields}
+
+def query_chapters(story_id: Optional[str] = None, status: Optional[str] = None,
+                   act_number: Optional[int] = None, sort_by: Optional[str] = None,
+                   descending: bool = False, offset: int = 0, limit: Optional[int] = 50,
+                   fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Get one page of chapter summaries and the total number of matching chapters.
+    
+    Without `sort_by`, chapters come in story/act/block/chapter order straight from the
+    chapter index, so the cost follows the page size. Sorting by another field selects
+    the page with a bounded heap over the matching chapters.
+    """
+    store = get_entity_store()
+    chapter_index = get_chapter_index()
+    if not store or not chapter_index:
+        return [], 0
+    
     try:
-        data = load_projects()
+        summaries = store.list_entities("chapters")
+        total = chapter_index.count(story_id, status, act_number)
         
-        if "chapters" not in data:
-            return []
-        
-        chapters = list(data["chapters"].values())
-        chapters.sort(key=lambda x: (x.get("story_id", ""), x.get("act_number", 0), x.get("block_number", 0), x.get("chapter_number", 0)))
+        if sort_by is None:
+            page_ids = chapter_index.page(story_id, status, act_number, offset, limit, descending)
+            rows = [summaries[chapter_id] for chapter_id in page_ids if chapter_id in summaries]
+        else:
+            matching = (summaries[chapter_id] for chapter_id in chapter_index.ids(story_id, status, act_number)
+                        if chapter_id in summaries)
+            sort_key = lambda c: (c.get(sort_by) is None, c.get(sort_by) if c.get(sort_by) is not None else 0)
+            if limit is None:
+                rows = sorted(matching, key=sort_key, reverse=descending)[offset:]
+            else:
+                select = heapq.nlargest if descending else heapq.nsmallest
+                rows = select(offset + limit, matching, key=sort_key)[offset:]
         
-        return chapters
+        return [_project(row, fields) for row in rows], total
     
     except Exception as e:
-        print(f"Error getting all chapters: {e}")
-        return []
+        print(f"Error querying chapters: {e}")
+        return [], 0
 
-def search_chapters(query: str) -> List[Dict[str, Any]]:
-    """Search chapters using both text and semantic search."""
-    load_projects, _ = get_models()
-    if not load_projects:
+def get_chapter(chapter_id: str) -> Optional[Dict[str, Any]]:
+    """Get a read-only view of a single chapter, including notes."""
+    store = get_entity_store()
+    if not store or not chapter_id:
+        return None
+    return store.get_entity("chapters", chapter_id)
+
+def rank_chapters(query: str, top_k: int = SEARCH_TOP_K) -> List[Tuple[Dict[str, Any], float]]:
+    """Search chapters and return (chapter, relevance) pairs, most relevant first.
+    
+    Exact substring matches (ordered by BM25) and semantic matches from the vector
+    index are merged with reciprocal rank fusion, so a chapter found both ways ranks
+    above one found only one way. At most `top_k` chapters are returned (0 = no limit).
+    """
+    store = get_entity_store()
+    search_entities = get_search_entities()
+    if not store or not search_entities or not query.strip():
         return []
     
     try:
-        # Text-based search in local data
-        data = load_projects()
-        text_results = []
-        
-        if "chapters" in data:
-            query_lower = query.lower()
-            for chapter in data["chapters"].values():
-                if (query_lower in chapter.get("title", "").lower() or 
-                    query_lower in chapter.get("outline", "").lower() or
-                    query_lower in chapter.get("notes", "").lower() or
-                    query_lower in chapter.get("location", "").lower()):
-                    text_results.append(chapter)
-        
-        # Semantic search using RAG
+        # Exact substring search narrowed by the trigram index, ranked by BM25
+        text_results = search_entities(query, "chapters", limit=top_k or None)
+        chapters = {chapter["id"]: chapter for chapter in text_results}
+        rankings = [list(chapters)]
+        
+        # Semantic search using RAG; several chunks of one chapter count once, at their best rank
         rag_service = get_rag_service()
         if rag_service:
             try:
-                semantic_results = rag_service.search(query, k=10, content_type="chapter")
-                semantic_chapter_ids = [r["metadata"].get("content_id") for r in semantic_results if r["metadata"].get("content_id")]
-                
-                # Combine results, prioritizing semantic search
-                combined_results = []
-                added_ids = set()
-                
-                # Add semantic results first
-                for chapter in data.get("chapters", {}).values():
-                    if chapter["id"] in semantic_chapter_ids and chapter["id"] not in added_ids:
-                        combined_results.append(chapter)
-                        added_ids.add(chapter["id"])
-                
-                # Add text results that weren't already included
-                for chapter in text_results:
-                    if chapter["id"] not in added_ids:
-                        combined_results.append(chapter)
-                        added_ids.add(chapter["id"])
-                
-                return combined_results
+                semantic_results = rag_service.search(query, k=top_k or SEARCH_TOP_K, content_type="chapter")
+                rankings.append([r["metadata"]["content_id"] for r in semantic_results if r["metadata"].get("content_id")])
             except Exception as e:
                 print(f"Warning: Semantic search failed: {e}")
-                return text_results
         
-        return text_results
+        summaries = store.list_entities("chapters")
+        ranked = []
+        for chapter_id, score in reciprocal_rank_fusion(rankings):
+            chapter = chapters.get(chapter_id) or summaries.get(chapter_id)
+            if chapter is None:
+                # Stale vector entry for a deleted chapter
+                continue
+            ranked.append((chapter, score))
+            if top_k and len(ranked) >= top_k:
+                break
+        return ranked
     
     except Exception as e:
         print(f"Error searching chapters: {e}")
         return []
 
+def search_chapters(query: str, top_k: int = SEARCH_TOP_K) -> List[Dict[str, Any]]:
+    """Search chapters using both text and semantic search, most relevant first."""
+    return [chapter for chapter, _ in rank_chapters(query, top_k)]
+
 def get_chapter_statistics() -> Dict[str, Any]:
     """Get statistics about chapters and progress."""
-    load_projects, _ = get_models()
-    if not load_projects:
+    store = get_entity_store()
+    chapter_stats = get_chapter_stats()
+    if not store or not chapter_stats:
         return {"total": 0, "by_status": {}, "by_story": {}}
     
     try:
-        data = load_projects()
-        
-        if "chapters" not in data:
-            return {"total": 0, "by_status": {}, "by_story": {}}
-        
-        chapters = list(data["chapters"].values())
+        totals = chapter_stats.totals()
+        stories = store.list_entities("stories")
         
         stats = {
-            "total": len(chapters),
-            "by_status": {},
+            "total": totals["total"],
+            "words": totals["words"],
+            "by_status": totals["by_status"],
             "by_story": {},
-            "by_act": {}
+            "by_act": {f"Act {act}": count for act, count in totals["by_act"].items()},
+            "stories": {}
         }
         
-        # Count by status
-        for chapter in chapters:
-            status = chapter.get("status", "Not Started")
-            stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
-        
-        # Count by story
-        for chapter in chapters:
-            story_id = chapter.get("story_id", "Unknown")
-            story_title = "Unknown Story"
-            if story_id in data.get("stories", {}):
-                story_title = data["stories"][story_id]["title"]
-            
-            stats["by_story"][story_title] = stats["by_story"].get(story_title, 0) + 1
-        
-        # Count by act
-        for chapter in chapters:
-            act = f"Act {chapter.get('act_number', 'Unknown')}"
-            stats["by_act"][act] = stats["by_act"].get(act, 0) + 1
+        # Story totals are kept by id; titles are looked up per story, not per chapter
+        for story_id, story_totals in totals["stories"].items():
+            story_title = stories[story_id]["title"] if story_id in stories else "Unknown Story"
+            stats["by_story"][story_title] = stats["by_story"].get(story_title, 0) + story_totals["chapters"]
+            chapters = story_totals["chapters"]
+            stats["stories"][story_id] = dict(
+                story_totals,
+                title=story_title,
+                progress=story_totals["done"] / chapters * 100 if chapters else 0.0
+            )
         
         return stats
     
@@ -299,46 +514,485 @@ def get_chapter_statistics() -> Dict[str, Any]:
         print(f"Error getting chapter statistics: {e}")
         return {"total": 0, "by_status": {}, "by_story": {}}
 
-def bulk_update_chapters(chapter_ids: List[str], updates: Dict[str, Any]) -> str:
-    """Bulk update multiple chapters."""
-    load_projects, save_projects = get_models()
-    if not load_projects or not save_projects:
+# Chapter fields bulk updates may change; moving between acts goes through their act_number
+BULK_UPDATE_FIELDS = ("title", "status", "outline", "location", "notes", "characters")
+
+# Chapter fields that are part of the text indexed in the vector store (see chapter_rag_document)
+RAG_CHAPTER_FIELDS = ("title", "story_id", "act_number", "block_number", "outline", "location", "characters", "notes")
+
+def apply_chapter_updates(chapter: Dict[str, Any], updates: Optional[Dict[str, Any]] = None,
+                          append: Optional[Dict[str, Any]] = None, clear: Optional[List[str]] = None) -> None:
+    """Apply set/append/clear operations to a chapter record in place.
+    
+    Text appended to a text field goes on a new line; values appended to a list field
+    are added unless already present. Cleared fields become empty.
+    """
+    for field in clear or ():
+        chapter[field] = [] if isinstance(chapter.get(field), list) or field == "characters" else ""
+    for field, value in (updates or {}).items():
+        chapter[field] = value
+    for field, value in (append or {}).items():
+        current = chapter.get(field)
+        if isinstance(current, list) or field == "characters":
+            items = list(current or [])
+            items.extend(item for item in (value if isinstance(value, list) else [value]) if item not in items)
+            chapter[field] = items
+        else:
+            chapter[field] = f"{current}\n{value}" if current else value
+
+def bulk_update_chapters(chapter_ids: List[str], updates: Optional[Dict[str, Any]] = None,
+                         append: Optional[Dict[str, Any]] = None, clear: Optional[List[str]] = None,
+                         act_number: Optional[int] = None) -> str:
+    """Bulk update multiple chapters in one write.
+    
+    `updates` sets fields, `append` adds text (or list items) to fields and `clear` empties
+    fields; clearing happens first, so a field can be cleared and refilled. With `act_number`,
+    chapters in another act are also moved to the end of their block in that act, in the
+    same write (and undo step). Chapters the operations leave unchanged are not rewritten,
+    and chapters are re-embedded in one batch only when a field of their indexed text changed.
+    """
+    store = get_entity_store()
+    chapter_index = get_chapter_index()
+    if not store or (act_number is not None and not chapter_index):
         return "❌ Error accessing data models."
     
+    fields = set(updates or {}) | set(append or {}) | set(clear or ())
+    if not fields and act_number is None:
+        return "❌ No updates specified."
+    unsupported = sorted(fields - set(BULK_UPDATE_FIELDS))
+    if unsupported:
+        return f"❌ Fields cannot be bulk updated: {', '.join(unsupported)}."
+    
     try:
-        data = load_projects()
-        updated_count = 0
+        updated_chapters = []
+        reindex = []
+        found = 0
+        now = datetime.now().isoformat()
         
-        if "chapters" not in data:
-            return "❌ No chapters found."
+        moving = []
         
-        for chapter_id in chapter_ids:
-            if chapter_id in data["chapters"]:
-                data["chapters"][chapter_id].update(updates)
-                data["chapters"][chapter_id]["updated_at"] = datetime.now().isoformat()
-                updated_count += 1
-        
-        if save_projects(data):
-            # Update vector storage for all modified chapters
-            rag_service = get_rag_service()
-            if rag_service:
-                try:
-                    for chapter_id in chapter_ids:
-                        if chapter_id in data["chapters"]:
-                            chapter = data["chapters"][chapter_id]
-                            story_title = ""
-                            if chapter.get("story_id") and chapter["story_id"] in data.get("stories", {}):
-                                story_title = data["stories"][chapter["story_id"]]["title"]
-                            
-                            content_for_rag = f"Chapter {chapter['chapter_number']}: {chapter['title']}\n\nStory: {story_title}\nAct {chapter['act_number']}, Block {chapter['block_number']}\n\nOutline: {chapter['outline']}\n\nLocation: {chapter['location']}\nCharacters: {', '.join(chapter.get('characters', []))}\n\nNotes: {chapter['notes']}"
-                            rag_service.add_content(content_for_rag, "chapter", chapter_id, f"{story_title} - Chapter {chapter['chapter_number']}: {chapter['title']}")
-                except Exception as e:
-                    print(f"Warning: Could not update RAG index: {e}")
+        with store.transaction(label=f"Bulk update {len(chapter_ids)} chapters") as txn:
+            for chapter_id in dict.fromkeys(chapter_ids):
+                chapter = txn.get("chapters", chapter_id)
+                if chapter is None:
+                    continue
+                found += 1
+                before = {field: chapter.get(field) for field in fields}
+                apply_chapter_updates(chapter, updates, append, clear)
+                changed = {field for field in fields if chapter.get(field) != before[field]}
+                moves = act_number is not None and _as_int(chapter.get("act_number")) != int(act_number)
+                if not changed and not moves:
+                    continue
+                if moves:
+                    # Written below with its new rank, together with the other moved chapters
+                    moving.append(chapter)
+                else:
+                    chapter["updated_at"] = now
+                    txn.put("chapters", chapter_id, chapter)
+                updated_chapters.append(chapter)
+                if moves or changed & set(RAG_CHAPTER_FIELDS):
+                    reindex.append(chapter)
             
-            return f"✅ Updated {updated_count} chapters successfully!"
-        else:
-            return "❌ Error updating chapters."
+            if moving:
+                moving.sort(key=lambda c: chapter_sort_key(c["id"], c))
+                _append_to_act(txn, chapter_index, moving, int(act_number), None, now)
+        
+        if not found:
+            return "❌ No chapters found."
+        
+        # Update vector storage for the chapters whose indexed text changed, in one batch
+        rag_service = get_rag_service()
+        if rag_service and reindex:
+            try:
+                rag_service.add_contents([
+                    rag_item("chapters", chapter["id"], chapter, _story_title(store, chapter.get("story_id")),
+                             chapter_index.display_number(chapter["id"]) if chapter_index else None)
+                    for chapter in reindex
+                ])
+            except Exception as e:
+                print(f"Warning: Could not update RAG index: {e}")
+        
+        unchanged = found - len(updated_chapters)
+        suffix = f" ({unchanged} already up to date)" if unchanged else ""
+        moved = f" {len(moving)} moved to Act {int(act_number)}." if moving else ""
+        return f"✅ Updated {len(updated_chapters)} chapters successfully!{suffix}{moved}"
     
     except Exception as e:
         print(f"Error in bulk update: {e}")
         return f"❌ Error updating chapters: {str(e)}"
+
+def apply_chapter_changes(updates: Dict[str, Dict[str, Any]], new_chapters: List[Dict[str, Any]]) -> Tuple[str, Dict[str, int]]:
+    """Apply per-chapter field updates and create new chapters in one write.
+    
+    `updates` maps chapter ids to the fields to set. A chapter whose story, act or block
+    changes goes to the end of its new block; new chapters (dicts with at least a title)
+    are appended to their blocks in list order. Changed chapters are re-embedded in one
+    batch when their indexed text changed.
+    """
+    store = get_entity_store()
+    chapter_index = get_chapter_index()
+    if not store or not chapter_index:
+        return "❌ Error accessing data models.", {}
+    
+    try:
+        now = datetime.now().isoformat()
+        saved = []
+        reindex = []
+        stats = {"updated": 0, "created": 0, "missing": 0}
+        
+        with store.transaction(label="Apply sheet changes") as txn:
+            # New chapters and chapters moving to another block are appended per target block
+            appended: Dict[Tuple[str, int, int], List[Dict[str, Any]]] = {}
+            
+            for chapter_id, fields in updates.items():
+                chapter = txn.get("chapters", chapter_id)
+                if chapter is None:
+                    stats["missing"] += 1
+                    continue
+                placement = (chapter.get("story_id"), chapter.get("act_number"), chapter.get("block_number"))
+                before = {field: chapter.get(field) for field in fields}
+                chapter.update(fields)
+                if not any(chapter.get(field) != before[field] for field in fields):
+                    continue
+                chapter["updated_at"] = now
+                if (chapter.get("story_id"), chapter.get("act_number"), chapter.get("block_number")) != placement:
+                    chapter.pop("chapter_number", None)
+                    appended.setdefault((chapter.get("story_id") or "", chapter["act_number"], chapter["block_number"]), []).append(chapter)
+                saved.append(chapter)
+                stats["updated"] += 1
+                if any(chapter.get(field) != before[field] for field in fields if field in RAG_CHAPTER_FIELDS):
+                    reindex.append(chapter)
+            
+            for fields in new_chapters:
+                chapter = {
+                    "id": str(uuid.uuid4()),
+                    "story_id": fields.get("story_id", ""),
+                    "act_number": fields.get("act_number", 1),
+                    "block_number": fields.get("block_number", 1),
+                    "title": fields["title"],
+                    "outline": fields.get("outline", ""),
+                    "content": "",
+                    "characters": fields.get("characters", []),
+                    "location": fields.get("location", ""),
+                    "status": fields.get("status", "Not Started"),
+                    "notes": fields.get("notes", ""),
+                    "scenes": [],
+                    "created_at": now,
+                    "updated_at": now
+                }
+                appended.setdefault((chapter["story_id"] or "", chapter["act_number"], chapter["block_number"]), []).append(chapter)
+                saved.append(chapter)
+                reindex.append(chapter)
+                stats["created"] += 1
+            
+            moving = {chapter["id"] for chapters in appended.values() for chapter in chapters}
+            for (story_id, act_number, block_number), chapters in appended.items():
+                last, _ = chapter_index.slot_ranks(story_id, act_number, block_number, exclude=moving)
+                for chapter, rank in zip(chapters, ranks_between(last, None, len(chapters))):
+                    chapter["rank"] = rank
+            
+            for chapter in saved:
+                txn.put("chapters", chapter["id"], chapter)
+        
+        rag_service = get_rag_service()
+        if rag_service and reindex:
+            try:
+                rag_service.add_contents([
+                    rag_item("chapters", chapter["id"], chapter, _story_title(store, chapter.get("story_id")),
+                             chapter_index.display_number(chapter["id"]))
+                    for chapter in reindex
+                ])
+            except Exception as e:
+                print(f"Warning: Could not update RAG index: {e}")
+        
+        return f"✅ Updated {stats['updated']} and created {stats['created']} chapters.", stats
+    
+    except Exception as e:
+        print(f"Error applying chapter changes: {e}")
+        return f"❌ Error saving chapters: {str(e)}", {}
+
+def scene_rag_document(scene: Dict[str, Any], story_title: str, number: Optional[int] = None) -> Tuple[str, str]:
+    """Build the (content, title) pair a scene is indexed under in the vector store."""
+    label = f"Scene {number}: {scene['title']}" if number is not None else f"Scene: {scene['title']}"
+    content_for_rag = f"{label}\n\nStory: {story_title}\n\n{scene.get('description', '')}\n\nLocation: {scene.get('location', '')}\nCharacters: {', '.join(scene.get('characters', []))}\n\nNotes: {scene.get('notes', '')}"
+    return content_for_rag, f"{story_title} - {label}" if story_title else label
+
+# Vector index content type of each collection, and the fields its indexed text is built from
+RAG_CONTENT_TYPES = {
+    "projects": "script",
+    "stories": "story",
+    "characters": "character",
+    "world_elements": "world_element",
+    "chapters": "chapter",
+    "scenes": "scene",
+}
+RAG_FIELDS = {
+    "projects": ("name", "content", "notes"),
+    "stories": ("title", "description", "content"),
+    "characters": ("name", "description", "traits", "notes"),
+    "world_elements": ("name", "type", "description", "tags", "notes"),
+    "chapters": RAG_CHAPTER_FIELDS,
+    "scenes": ("title", "chapter_id", "description", "location", "characters", "notes"),
+}
+
+def rag_item(collection: str, entity_id: str, record: Dict[str, Any], story_title: str = "",
+             number: Optional[int] = None) -> Tuple[str, str, str, str]:
+    """Build the (content, content_type, content_id, title) item an entity is indexed under.
+    
+    Saves, undo/redo and index rebuilds all index entities through this, so they embed the
+    same text. `story_title` and `number` are only used for chapters and scenes.
+    """
+    if collection == "chapters":
+        content, title = chapter_rag_document(record, story_title, number)
+    elif collection == "scenes":
+        content, title = scene_rag_document(record, story_title, number)
+    elif collection == "projects":
+        title = record["name"]
+        content = f"{title}\n\n{record.get('content', '')}\n\nNotes: {record.get('notes', '')}"
+    elif collection == "stories":
+        title = record["title"]
+        content = f"{title}\n\n{record.get('description', '')}\n\n{record.get('content', '')}"
+    elif collection == "characters":
+        title = record["name"]
+        content = f"{title}\n\n{record.get('description', '')}\n\nTraits: {', '.join(record.get('traits', []))}\n\n{record.get('notes', '')}"
+    else:
+        title = record["name"]
+        content = f"{title} ({record.get('type', '')})\n\n{record.get('description', '')}\n\nTags: {', '.join(record.get('tags', []))}\n\n{record.get('notes', '')}"
+    return content, RAG_CONTENT_TYPES[collection], entity_id, title
+
+def _index_scenes(rag_service, store, scenes: List[Dict[str, Any]]):
+    """Add or refresh scenes in the vector index in one batch."""
+    scene_tree = get_scene_tree()
+    items = []
+    for scene in scenes:
+        chapter = store.get_entity("chapters", scene.get("chapter_id", ""))
+        story_title = _story_title(store, chapter.get("story_id") if chapter else "")
+        number = scene_tree.display_number(scene["id"]) if scene_tree else None
+        items.append(rag_item("scenes", scene["id"], scene, story_title, number))
+    rag_service.add_contents(items)
+
+def create_scene(chapter_id: str, title: str, description: str = "", characters: List[str] = None, location: str = "", status: str = "Not Started", notes: str = "") -> Tuple[str, Dict[str, Any]]:
+    """Create a new scene at the end of a chapter."""
+    if not title.strip():
+        return "❌ Scene title cannot be empty.", {}
+    
+    store = get_entity_store()
+    scene_tree = get_scene_tree()
+    if not store or not scene_tree:
+        return "❌ Error accessing data models.", {}
+    
+    try:
+        with store.transaction(label=f"Create scene '{title.strip()}'") as txn:
+            if txn.get("chapters", chapter_id) is None:
+                return "❌ Chapter not found.", {}
+            
+            scene_id = str(uuid.uuid4())
+            scene = {
+                "id": scene_id,
+                "chapter_id": chapter_id,
+                "rank": rank_between(scene_tree.last_rank(chapter_id), None),
+                "title": title.strip(),
+                "description": description.strip(),
+                "characters": characters or [],
+                "location": location.strip(),
+                "status": status,
+                "notes": notes.strip(),
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat()
+            }
+            txn.put("scenes", scene_id, scene)
+        
+        rag_service = get_rag_service()
+        if rag_service:
+            try:
+                _index_scenes(rag_service, store, [scene])
+            except Exception as e:
+                print(f"Warning: Could not update RAG index: {e}")
+        
+        return f"✅ Scene '{title}' created successfully!", scene
+    
+    except Exception as e:
+        print(f"Error creating scene: {e}")
+        return f"❌ Error creating scene: {str(e)}", {}
+
+def update_scene(scene_id: str, updates: Dict[str, Any], expected_version: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+    """Update a scene; a scene moved to another chapter goes to the end of it."""
+    store = get_entity_store()
+    scene_tree = get_scene_tree()
+    if not store or not scene_tree:
+        return "❌ Error accessing data models.", {}
+    
+    try:
+        with store.transaction(label="Update scene") as txn:
+            scene = txn.get("scenes", scene_id)
+            if scene is None:
+                return "❌ Scene not found.", {}
+            if expected_version is not None and scene.get("version", 0) != expected_version:
+                raise ConflictError(f"scenes entity {scene_id} was modified by another writer")
+            
+            chapter_id = scene.get("chapter_id")
+            scene.update(updates)
+            if scene.get("chapter_id") != chapter_id and "rank" not in updates:
+                if txn.get("chapters", scene["chapter_id"]) is None:
+                    return "❌ Chapter not found.", {}
+                scene["rank"] = rank_between(scene_tree.last_rank(scene["chapter_id"]), None)
+            scene["updated_at"] = datetime.now().isoformat()
+            txn.put("scenes", scene_id, scene)
+        
+        rag_service = get_rag_service()
+        if rag_service:
+            try:
+                _index_scenes(rag_service, store, [scene])
+            except Exception as e:
+                print(f"Warning: Could not update RAG index: {e}")
+        
+        return "✅ Scene updated successfully!", scene
+    
+    except ConflictError:
+        return "❌ This scene was changed by someone else since you opened it. Reload and try again.", {}
+    except Exception as e:
+        print(f"Error updating scene: {e}")
+        return f"❌ Error updating scene: {str(e)}", {}
+
+def delete_scene(scene_id: str, expected_version: Optional[int] = None) -> str:
+    """Delete a scene; if expected_version is given, refuse to delete newer edits."""
+    store = get_entity_store()
+    if not store:
+        return "❌ Error accessing data models."
+    
+    try:
+        with store.transaction(label="Delete scene") as txn:
+            scene = txn.get("scenes", scene_id)
+            if scene is None:
+                return "❌ Scene not found."
+            scene_title = scene["title"]
+            txn.delete("scenes", scene_id, version=expected_version)
+        
+        rag_service = get_rag_service()
+        if rag_service:
+            try:
+                rag_service.remove_content(scene_id)
+            except Exception as e:
+                print(f"Warning: Could not remove from RAG index: {e}")
+        
+        return f"✅ Scene '{scene_title}' deleted successfully!"
+    
+    except ConflictError:
+        return "❌ This scene was changed by someone else. Reload and try again."
+    except Exception as e:
+        print(f"Error deleting scene: {e}")
+        return f"❌ Error deleting scene: {str(e)}"
+
+def get_scene(scene_id: str) -> Optional[Dict[str, Any]]:
+    """Get a read-only view of a single scene, including notes."""
+    store = get_entity_store()
+    if not store or not scene_id:
+        return None
+    return store.get_entity("scenes", scene_id)
+
+def query_scenes(story_id: Optional[str] = None, act_number: Optional[int] = None,
+                 block_number: Optional[int] = None, chapter_id: Optional[str] = None,
+                 character: Optional[str] = None, location: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get read-only summaries of the scenes in a story, act, block or chapter, in story order.
+    
+    e.g. query_scenes(story_id, act_number=2, character="Mara") for all scenes in Act 2
+    featuring Mara. The scene tree finds them without scanning other scenes.
+    """
+    store = get_entity_store()
+    scene_tree = get_scene_tree()
+    if not store or not scene_tree:
+        return []
+    
+    try:
+        scenes = store.list_entities("scenes")
+        scene_ids = scene_tree.scene_ids(story_id, act_number, block_number, chapter_id, character, location)
+        return [scenes[scene_id] for scene_id in scene_ids if scene_id in scenes]
+    
+    except Exception as e:
+        print(f"Error querying scenes: {e}")
+        return []
+
+def get_scenes_for_chapter(chapter_id: str) -> List[Dict[str, Any]]:
+    """Get read-only summaries of a chapter's scenes, in order."""
+    return query_scenes(chapter_id=chapter_id)
+
+def _refresh_vectors(store, operation):
+    """Bring the vector index in line with the entities an undo or redo touched.
+    
+    Entities that no longer exist are removed; the rest are re-embedded in one batch, but
+    only if they were created or deleted by the operation or one of their indexed fields
+    changed. Nothing outside the operation is re-encoded.
+    """
+    rag_service = get_rag_service()
+    if not rag_service:
+        return
+    
+    chapter_index = get_chapter_index()
+    removed = []
+    scenes = []
+    items = []
+    for delta in operation.deltas:
+        fields = RAG_FIELDS.get(delta.collection)
+        if fields is None:
+            continue
+        record = store.get_entity(delta.collection, delta.entity_id)
+        if record is None:
+            removed.append(delta.entity_id)
+            continue
+        if delta.before is not None and delta.after is not None and not set(delta.before) & set(fields):
+            continue
+        
+        if delta.collection == "scenes":
+            scenes.append(record)
+        elif delta.collection == "chapters":
+            number = chapter_index.display_number(delta.entity_id) if chapter_index else None
+            items.append(rag_item("chapters", delta.entity_id, record, _story_title(store, record.get("story_id")), number))
+        else:
+            items.append(rag_item(delta.collection, delta.entity_id, record))
+    
+    try:
+        if removed:
+            rag_service.remove_contents(removed)
+        if items:
+            rag_service.add_contents(items)
+        if scenes:
+            _index_scenes(rag_service, store, scenes)
+    except Exception as e:
+        print(f"Warning: Could not update RAG index: {e}")
+
+def _replay_operation(redo: bool) -> str:
+    """Undo or redo the last recorded operation and refresh only the vectors it affects."""
+    store = get_entity_store()
+    operation_log = get_operation_log()
+    if not store or not operation_log:
+        return "❌ Error accessing data models."
+    
+    action = "Redo" if redo else "Undo"
+    try:
+        operation = operation_log.redo() if redo else operation_log.undo()
+        if operation is None:
+            return f"❌ Nothing to {action.lower()}."
+        _refresh_vectors(store, operation)
+        return f"✅ {'Redid' if redo else 'Undid'}: {operation.label} ({len(operation.deltas)} entities)"
+    
+    except ConflictError as e:
+        return f"❌ Cannot {action.lower()}: {e}. Later edits would be lost."
+    except Exception as e:
+        print(f"Error during {action.lower()}: {e}")
+        return f"❌ Error during {action.lower()}: {str(e)}"
+
+def undo_last_operation() -> str:
+    """Revert the session's most recent workspace change (a create, edit, delete, move, bulk update or import).
+
+    The session is the one set by operation_log.operation_session (the browser session in the UI).
+    """
+    return _replay_operation(redo=False)
+
+def redo_last_operation() -> str:
+    """Re-apply the session's most recently undone workspace change."""
+    return _replay_operation(redo=True)
+
+def get_undo_history() -> List[Tuple[str, str, int]]:
+    """(label, time, entities changed) of the session's undoable operations, newest first."""
+    operation_log = get_operation_log()
+    return operation_log.history() if operation_log else []
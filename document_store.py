@@ -0,0 +1,430 @@
+"""In-process document store for ScriptVoice workspace data."""
+
+import atexit
+import threading
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterable, Optional, Tuple, Callable
+from config import WORKSPACE_LOCK_FILE
+from blob_store import blob_store, is_blob_ref
+from storage_backends import (
+    StorageBackend, EntityChange, InterProcessLock, create_backend,
+    default_document, summarize
+)
+
+
+class StorageError(Exception):
+    """Raised when workspace changes could not be persisted."""
+
+
+class ConflictError(StorageError):
+    """Raised when an entity was changed by another writer since it was read."""
+
+
+class ReadOnlyDict(Mapping):
+    """Read-only view over a cached dict; nested containers are wrapped on access."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        if is_blob_ref(value):
+            return blob_store.get(value)
+        return freeze(value)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return f"ReadOnlyDict({self._data!r})"
+
+
+class ReadOnlyList(Sequence):
+    """Read-only view over a cached list."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: list):
+        self._data = data
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadOnlyList(self._data[index])
+        return freeze(self._data[index])
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, ReadOnlyList):
+            return self._data == other._data
+        if isinstance(other, (list, tuple)):
+            return self._data == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ReadOnlyList({self._data!r})"
+
+
+def freeze(value: Any) -> Any:
+    """Wrap dicts and lists in read-only views."""
+    if isinstance(value, dict):
+        return ReadOnlyDict(value)
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    return value
+
+
+def thaw(value: Any, resolve: bool = True) -> Any:
+    """Return a plain, independently mutable copy of a (possibly read-only) value.
+
+    Blob references are replaced by their text unless `resolve` is False.
+    """
+    if isinstance(value, (ReadOnlyDict, ReadOnlyList)):
+        value = value._data
+    if isinstance(value, dict):
+        if is_blob_ref(value):
+            return blob_store.get(value) if resolve else dict(value)
+        return {key: thaw(item, resolve) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item, resolve) for item in value]
+    return value
+
+
+def _copy(value: Any) -> Any:
+    """Copy a value for the cache, keeping blob references unresolved."""
+    return thaw(value, resolve=False)
+
+
+def _apply_copy_on_write(document: Dict[str, Any], changes: List[EntityChange],
+                         transform=None) -> Dict[str, Any]:
+    """Return a new document with changes applied, leaving `document` untouched."""
+    updated = dict(document)
+    touched = set()
+    for collection, entity_id, record in changes:
+        if collection not in touched:
+            updated[collection] = dict(updated.get(collection) or {})
+            touched.add(collection)
+        if record is None:
+            updated[collection].pop(entity_id, None)
+        else:
+            updated[collection][entity_id] = transform(record) if transform else _copy(record)
+    return updated
+
+
+class Transaction:
+    """Unit of read-modify-write work, created by DocumentStore.transaction()."""
+
+    def __init__(self, store: "DocumentStore"):
+        self._store = store
+        self._changes: Dict[Tuple[str, str], EntityChange] = {}
+
+    @property
+    def changes(self) -> List[EntityChange]:
+        return list(self._changes.values())
+
+    def get(self, collection: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Return a mutable copy of an entity, reflecting writes made in this transaction."""
+        key = (collection, entity_id)
+        if key in self._changes:
+            record = self._changes[key].record
+        else:
+            record = self._store._lookup(collection, entity_id)
+        return thaw(record) if record is not None else None
+
+    def get_stored(self, collection: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Like get(), but long text fields stay blob references instead of being loaded."""
+        key = (collection, entity_id)
+        if key in self._changes:
+            record = self._changes[key].record
+        else:
+            record = self._store._lookup(collection, entity_id)
+        return _copy(record) if record is not None else None
+
+    def list(self, collection: str) -> ReadOnlyDict:
+        """Return committed summaries for a collection (pending writes are not included)."""
+        return self._store.list_entities(collection)
+
+    def put(self, collection: str, entity_id: str, record: Dict[str, Any]):
+        """Stage a create or replace; the record's `version` is checked on commit."""
+        self._changes[(collection, entity_id)] = EntityChange(collection, entity_id, record)
+
+    def delete(self, collection: str, entity_id: str, version: Optional[int] = None):
+        """Stage a delete, optionally only if the entity is still at `version`."""
+        if version is not None:
+            current = self._store._lookup(collection, entity_id)
+            if current is not None and current.get("version", 0) != version:
+                raise ConflictError(f"{collection} entity {entity_id} was modified by another writer")
+        self._changes[(collection, entity_id)] = EntityChange(collection, entity_id, None)
+
+
+class DocumentStore:
+    """Keeps workspace data in memory and reloads it only when the backend changes.
+
+    Backends that support partial loads (e.g. the sharded layout) are never read in
+    full unless a caller asks for the whole document; entity lookups and listings
+    go through single entity files and the manifest instead.
+    """
+
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.backend = backend or create_backend()
+        self.generation = 0
+        self._data: Optional[Dict[str, Any]] = None
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._entities: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+        self._fingerprint: Any = None
+        self._lock = threading.RLock()
+        self._process_lock = InterProcessLock(WORKSPACE_LOCK_FILE)
+        self.backend.use_process_lock(self._process_lock)
+        self._listeners: List[Callable[[List[EntityChange], int, int], None]] = []
+        self._recorders: List[Callable[[Optional[str], List[EntityChange], List[Optional[Dict[str, Any]]]], None]] = []
+        self._blob_holders: List[Callable[[], Iterable[Dict[str, Any]]]] = []
+
+    @property
+    def lock(self) -> threading.RLock:
+        """The re-entrant lock guarding the cache; derived indexes share it to stay in step with commits."""
+        return self._lock
+
+    def add_listener(self, listener: Callable[[List[EntityChange], int, int], None]):
+        """Call `listener(changes, previous_generation, generation)` after every commit.
+
+        Listeners run while the store lock is held and must not call back into the store;
+        a listener that sees a `previous_generation` it did not know about has missed a
+        reload and should resynchronize.
+        """
+        self._listeners.append(listener)
+
+    def add_recorder(self, recorder: Callable[[Optional[str], List[EntityChange], List[Optional[Dict[str, Any]]]], None]):
+        """Call `recorder(label, changes, previous)` after every commit.
+
+        `previous` holds the stored records the changes replaced (None for creates), with
+        long text fields still as blob references; `label` is the one given to the
+        transaction, if any. The same rules as for listeners apply.
+        """
+        self._recorders.append(recorder)
+
+    def retain_blobs(self, holder: Callable[[], Iterable[Dict[str, Any]]]):
+        """Keep the blobs referenced by `holder()` when unreferenced blobs are collected."""
+        self._blob_holders.append(holder)
+
+    def current_generation(self) -> int:
+        """Return the cache generation, first picking up any external backend changes."""
+        with self._lock:
+            self._refresh()
+            return self.generation
+
+    def ensure_initialized(self) -> bool:
+        """Create an empty workspace if the backend has none; return True if one was created."""
+        with self._lock:
+            if self.backend.exists():
+                return False
+            return self.save(default_document())
+
+    def _refresh(self):
+        """Drop cached state if the backend changed underneath us."""
+        fingerprint = self.backend.fingerprint()
+        if fingerprint != self._fingerprint:
+            self._data = None
+            self._manifest = None
+            self._entities = {}
+            self._fingerprint = fingerprint
+            self.generation += 1
+
+    def _current(self) -> Dict[str, Any]:
+        """Return the full cached document, loading it if needed."""
+        with self._lock:
+            self._refresh()
+            if self._data is None:
+                self._data = self.backend.load()
+            return self._data
+
+    def _partial(self) -> bool:
+        """True if lookups should go to the backend instead of a full in-memory document."""
+        return self.backend.supports_partial_load and self._data is None
+
+    def snapshot(self) -> ReadOnlyDict:
+        """Return a read-only view of the current document."""
+        return ReadOnlyDict(self._current())
+
+    def load(self) -> Dict[str, Any]:
+        """Return a mutable copy of the current document."""
+        return thaw(self._current())
+
+    def _lookup(self, collection: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached raw record for an entity (callers must not mutate it)."""
+        with self._lock:
+            self._refresh()
+            if not self._partial():
+                return self._current().get(collection, {}).get(entity_id)
+            key = (collection, entity_id)
+            if key not in self._entities:
+                self._entities[key] = self.backend.load_entity(collection, entity_id)
+            return self._entities[key]
+
+    def get_entity(self, collection: str, entity_id: str) -> Optional[ReadOnlyDict]:
+        """Return a read-only view of one entity, or None if it does not exist."""
+        record = self._lookup(collection, entity_id)
+        return freeze(record) if record is not None else None
+
+    def list_entities(self, collection: str) -> ReadOnlyDict:
+        """Return id -> read-only summary for a collection; heavy text fields may be omitted."""
+        with self._lock:
+            self._refresh()
+            if not self._partial():
+                return ReadOnlyDict(self._current().get(collection, {}))
+            if self._manifest is None:
+                self._manifest = self.backend.load_manifest()
+            return ReadOnlyDict(self._manifest.get(collection, {}))
+
+    def put_entity(self, collection: str, entity_id: str, record: Dict[str, Any], label: Optional[str] = None) -> bool:
+        """Create or replace a single entity."""
+        return self.commit([EntityChange(collection, entity_id, record)], label=label)
+
+    def delete_entity(self, collection: str, entity_id: str, label: Optional[str] = None) -> bool:
+        """Delete a single entity."""
+        return self.commit([EntityChange(collection, entity_id, None)], label=label)
+
+    def _diff(self, data: Dict[str, Any]) -> List[EntityChange]:
+        """Compute the entity writes that turn the cached document into `data`."""
+        current = self._current()
+        changes = []
+        for collection in set(current) | set(data):
+            old_entities = current.get(collection) or {}
+            new_entities = data.get(collection) or {}
+            for entity_id, record in new_entities.items():
+                if not blob_store.matches_stored(old_entities.get(entity_id), record):
+                    changes.append(EntityChange(collection, entity_id, record))
+            for entity_id in old_entities:
+                if entity_id not in new_entities:
+                    changes.append(EntityChange(collection, entity_id, None))
+        return changes
+
+    def save(self, data: Dict[str, Any], label: Optional[str] = None) -> bool:
+        """Persist only the entities that differ from the cached document."""
+        with self._lock:
+            changes = self._diff(data)
+            if not changes and self.backend.exists():
+                return True
+            return self.commit(changes, data, label=label)
+
+    @contextmanager
+    def transaction(self, label: Optional[str] = None):
+        """Hold the workspace lock across a read-modify-write and commit staged changes on exit.
+
+        `label` names the change for recorders such as the undo log (e.g. "Update chapter").
+        Raises ConflictError if a staged record's `version` no longer matches the stored one,
+        and StorageError if the backend rejects the write.
+        """
+        with self._lock, self._process_lock:
+            self._refresh()
+            txn = Transaction(self)
+            yield txn
+            if txn.changes and not self.commit(txn.changes, label=label):
+                raise StorageError("Could not save workspace changes")
+
+    def _stamp_versions(self, changes: List[EntityChange]) -> List[EntityChange]:
+        """Check optimistic versions and return changes with bumped version numbers."""
+        stamped = []
+        for change in changes:
+            collection, entity_id, record = change
+            if record is None:
+                stamped.append(change)
+                continue
+
+            current = self._lookup(collection, entity_id)
+            current_version = current.get("version", 0) if current is not None else 0
+            expected = record.get("version")
+            if expected is not None and expected != current_version:
+                raise ConflictError(f"{collection} entity {entity_id} was modified by another writer")
+
+            # The caller's copy now matches what was stored
+            record["version"] = current_version + 1
+            stamped.append(EntityChange(collection, entity_id, record))
+        return stamped
+
+    def commit(self, changes: List[EntityChange], document: Optional[Dict[str, Any]] = None,
+               label: Optional[str] = None) -> bool:
+        """Write entity changes through the backend and apply them to the cache.
+
+        Raises ConflictError if a record carries a stale `version`.
+        """
+        with self._lock, self._process_lock:
+            self._refresh()
+            if not self.backend.supports_partial_load:
+                self._current()
+            previous_generation = self.generation
+            changes = [
+                EntityChange(collection, entity_id, blob_store.externalize(record) if record is not None else None)
+                for collection, entity_id, record in self._stamp_versions(changes)
+            ]
+            previous = [self._lookup(collection, entity_id) for collection, entity_id, _ in changes] if self._recorders else []
+
+            # Copy-on-write so views handed out earlier keep a stable snapshot
+            if self._data is not None:
+                self._data = _apply_copy_on_write(self._data, changes)
+                for collection in (document or {}):
+                    self._data.setdefault(collection, {})
+            if self._manifest is not None:
+                self._manifest = _apply_copy_on_write(
+                    self._manifest, changes, lambda record: _copy(summarize(record))
+                )
+            if self.backend.supports_partial_load:
+                for collection, entity_id, record in changes:
+                    self._entities[(collection, entity_id)] = _copy(record)
+
+            if not self.backend.commit(changes, self._data):
+                self.invalidate()
+                return False
+
+            self._fingerprint = self.backend.fingerprint()
+            self.generation += 1
+            for listener in self._listeners:
+                try:
+                    listener(changes, previous_generation, self.generation)
+                except Exception as e:
+                    print(f"Warning: Workspace listener failed: {e}")
+            for recorder in self._recorders:
+                try:
+                    recorder(label, changes, previous)
+                except Exception as e:
+                    print(f"Warning: Workspace recorder failed: {e}")
+            return True
+
+    def collect_blobs(self) -> int:
+        """Delete stored text blobs no entity refers to anymore; returns the number removed."""
+        with self._lock, self._process_lock:
+            live_refs = [
+                value
+                for entities in self._current().values() if isinstance(entities, dict)
+                for record in entities.values() if isinstance(record, dict)
+                for value in record.values() if is_blob_ref(value)
+            ]
+            for holder in self._blob_holders:
+                live_refs.extend(holder())
+            return blob_store.collect_garbage(live_refs)
+
+    def flush(self) -> bool:
+        """Block until all accepted saves are durable on disk."""
+        return self.backend.flush()
+
+    def invalidate(self):
+        """Drop all cached state so the next access reloads it from the backend."""
+        with self._lock:
+            self._data = None
+            self._manifest = None
+            self._entities = {}
+            self._fingerprint = None
+
+
+# Global document store instance
+document_store = DocumentStore()
+atexit.register(document_store.flush)
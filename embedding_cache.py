@@ -0,0 +1,155 @@
+"""Persistent cache of chunk embeddings keyed by model and text hash."""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+import numpy as np
+from config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MB, EMBEDDING_CACHE_DTYPE
+
+# Length of a cache key (a sha256 digest)
+KEY_BYTES = 32
+
+
+def text_key(model_name: str, text: str) -> bytes:
+    """Cache key of a chunk: the hash of the model name and the whitespace-normalized text."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"{model_name}\0{normalized}".encode('utf-8')).digest()
+
+
+class EmbeddingCache:
+    """Size-bounded LRU cache of embedding vectors in memory-mapped files.
+
+    Vectors live in fixed slots of `vectors-<dim>-<dtype>.mmap`; beside it, `.idx` holds
+    each slot's full key and `.lru` the tick it was last used at (0 for an empty slot).
+    All three are mapped, so the cache is never loaded or rewritten as a whole: a lookup
+    or insert touches a few pages and flush() writes back only those. The key -> slot map
+    is rebuilt from `.idx` and `.lru` when the files are opened. A slot whose stored key
+    does not match reads as a miss. When the cache is full, the least recently used slot
+    is overwritten.
+    """
+
+    def __init__(self, root: str = EMBEDDING_CACHE_DIR, max_mb: int = EMBEDDING_CACHE_MB,
+                 dtype: str = EMBEDDING_CACHE_DTYPE):
+        self.root = root
+        self.max_bytes = max_mb * 1024 * 1024
+        self.dtype = np.dtype(dtype)
+        self.dimension: Optional[int] = None
+        self._slots: "OrderedDict[bytes, int]" = OrderedDict()
+        self._next_slot = 0
+        self._tick = 0
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._used: Optional[np.memmap] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.max_bytes // (self.dimension * self.dtype.itemsize), 1) if self.dimension else 0
+
+    def _paths(self, dimension: int):
+        stem = os.path.join(self.root, f"vectors-{dimension}-{self.dtype.name}")
+        return f"{stem}.mmap", f"{stem}.idx", f"{stem}.lru"
+
+    def _map(self, mode: str, dimension: int):
+        vectors_path, keys_path, used_path = self._paths(dimension)
+        self._vectors = np.memmap(vectors_path, dtype=self.dtype, mode=mode, shape=(self.capacity, dimension))
+        self._keys = np.memmap(keys_path, dtype='uint8', mode=mode, shape=(self.capacity, KEY_BYTES))
+        self._used = np.memmap(used_path, dtype='uint64', mode=mode, shape=(self.capacity,))
+
+    def _open(self, dimension: int):
+        """Map the slot files for vectors of `dimension`, creating them (sparse) if needed."""
+        if self.dimension == dimension:
+            return
+        self.dimension = dimension
+        os.makedirs(self.root, exist_ok=True)
+        # Fingerprint and pickled slot map files of the earlier layout
+        stem = self._paths(dimension)[0][:-len(".mmap")]
+        for legacy_path in (f"{stem}.keys", f"{stem}.pkl"):
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+        mode = "r+" if all(os.path.exists(path) for path in self._paths(dimension)) else "w+"
+        try:
+            self._map(mode, dimension)
+        except ValueError:
+            # Capacity changed since the files were created; start over
+            self._map("w+", dimension)
+
+        # Rebuild the key -> slot map in least to most recently used order
+        used = np.asarray(self._used)
+        occupied = np.flatnonzero(used)
+        occupied = occupied[np.argsort(used[occupied], kind='stable')]
+        keys = np.asarray(self._keys)[occupied].tobytes()
+        self._slots = OrderedDict(
+            (keys[position * KEY_BYTES:(position + 1) * KEY_BYTES], int(slot))
+            for position, slot in enumerate(occupied)
+        )
+        self._next_slot = int(occupied.max()) + 1 if len(occupied) else 0
+        self._tick = int(used.max()) if len(used) else 0
+
+    def _touch(self, slot: int):
+        self._tick += 1
+        self._used[slot] = self._tick
+
+    def get_many(self, model_name: str, texts: Sequence[str], dimension: int) -> List[Optional[np.ndarray]]:
+        """Cached vectors for `texts` (float32), with None for misses."""
+        keys = [text_key(model_name, text) for text in texts]
+        with self._lock:
+            self._open(dimension)
+            found: List[Optional[np.ndarray]] = []
+            for key in keys:
+                slot = self._slots.get(key)
+                if slot is not None and self._keys[slot].tobytes() == key:
+                    self._slots.move_to_end(key)
+                    self._touch(slot)
+                    found.append(np.asarray(self._vectors[slot], dtype='float32'))
+                else:
+                    if slot is not None:
+                        # The slot was reused for another text
+                        del self._slots[key]
+                    found.append(None)
+            hits = sum(vector is not None for vector in found)
+            self._dirty = self._dirty or hits > 0
+            self.hits += hits
+            self.misses += len(found) - hits
+            return found
+
+    def put_many(self, model_name: str, texts: Sequence[str], vectors: np.ndarray):
+        """Store the vectors of `texts`, evicting the least recently used ones if full."""
+        with self._lock:
+            self._open(vectors.shape[1])
+            for text, vector in zip(texts, vectors):
+                key = text_key(model_name, text)
+                slot = self._slots.pop(key, None)
+                if slot is None:
+                    if self._next_slot < self.capacity:
+                        slot = self._next_slot
+                        self._next_slot += 1
+                    else:
+                        _, slot = self._slots.popitem(last=False)
+                self._vectors[slot] = vector
+                self._keys[slot] = np.frombuffer(key, dtype='uint8')
+                self._touch(slot)
+                self._slots[key] = slot
+            self._dirty = True
+
+    def flush(self):
+        """Write the pages changed since the last flush back to disk."""
+        with self._lock:
+            if not self._dirty or self.dimension is None:
+                return
+            try:
+                self._vectors.flush()
+                self._keys.flush()
+                self._used.flush()
+                self._dirty = False
+            except Exception as e:
+                print(f"Warning: Could not save embedding cache: {e}")
+
+
+# Global embedding cache instance
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,129 @@
+"""Optional process pool that embeds large chunk sets (index rebuilds, bulk imports) on many cores."""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import SpawnContext, SpawnProcess
+from typing import List, Optional
+import numpy as np
+from config import EMBEDDING_WORKERS, EMBEDDING_THREADS_PER_WORKER, SENTENCE_TRANSFORMER_MODEL
+
+# Read by the OpenMP/BLAS runtimes when they load, so they are set as workers start
+THREAD_VARIABLES = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Model loaded once in each worker process by _init_worker
+_worker_model = None
+
+
+class _WorkerProcess(SpawnProcess):
+    """Spawned worker whose environment caps the OpenMP/BLAS thread count from its first import."""
+
+    threads = 1
+
+    def start(self):
+        saved = {variable: os.environ.get(variable) for variable in THREAD_VARIABLES}
+        os.environ.update({variable: str(self.threads) for variable in THREAD_VARIABLES})
+        try:
+            super().start()
+        finally:
+            for variable, value in saved.items():
+                if value is None:
+                    os.environ.pop(variable, None)
+                else:
+                    os.environ[variable] = value
+
+
+class _WorkerContext(SpawnContext):
+    """Spawn context starting _WorkerProcess workers; spawned rather than forked, since forking
+    a process that already runs torch threads can hang."""
+
+    def __init__(self, threads: int):
+        super().__init__()
+        self.threads = threads
+
+    def Process(self, *args, **kwargs):
+        process = _WorkerProcess(*args, **kwargs)
+        process.threads = self.threads
+        return process
+
+
+def _init_worker(model_name: str, threads: int, counter):
+    """Pin the worker to its own cores and intra-op thread count, then load the model."""
+    global _worker_model
+    with counter.get_lock():
+        worker_number = counter.value
+        counter.value += 1
+    if hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        if len(cpus) > threads:
+            start = worker_number * threads % len(cpus)
+            os.sched_setaffinity(0, {cpus[(start + i) % len(cpus)] for i in range(threads)})
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_shard(texts: List[str], batch_size: int) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+
+
+class EmbeddingPool:
+    """Shards chunk texts across worker processes and returns their embeddings in input order.
+
+    Each worker loads its own copy of the model and runs `threads` intra-op threads on its
+    own cores, so the workers don't contend for the same cores the way one process with
+    default torch threading does. Only bulk paths use the pool; interactive saves and
+    queries keep encoding in-process.
+    """
+
+    def __init__(self, workers: int = EMBEDDING_WORKERS, threads: int = EMBEDDING_THREADS_PER_WORKER,
+                 model_name: str = SENTENCE_TRANSFORMER_MODEL):
+        self.workers = workers
+        self.closed = False
+        context = _WorkerContext(threads)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=context,
+            initializer=_init_worker, initargs=(model_name, threads, context.Value('i', 0))
+        )
+
+    def encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Embed texts in shards of `batch_size`, one shard per task."""
+        shards = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+        return np.vstack(list(self._executor.map(_encode_shard, shards, [batch_size] * len(shards))))
+
+    def shutdown(self):
+        self.closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[EmbeddingPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_embedding_pool() -> Optional[EmbeddingPool]:
+    """The shared embedding pool, started on first use; None when EMBEDDING_WORKERS is below 2."""
+    global _pool
+    if EMBEDDING_WORKERS < 2:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = EmbeddingPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def discard_embedding_pool():
+    """Drop a pool whose workers failed, so the next bulk job starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,161 @@
+"""Base class for derived indexes that are kept in step with the document store."""
+
+import atexit
+import os
+import pickle
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+from document_store import DocumentStore, document_store, thaw
+
+
+class EntityIndex(ABC):
+    """Lookup structure over one or more workspace collections, updated incrementally.
+
+    Commits are queued by a store listener and applied on the next query, so writers
+    never pay for index maintenance. If the store reloaded in between (another process
+    wrote, or a commit was missed), the index reconciles itself against the entity
+    summaries and only re-reads entities whose `version`/`updated_at` changed. The same
+    reconciliation makes a persisted index safe to reuse after a restart.
+
+    Subclasses set `collections` and implement `_reset`, `_add`, `_remove`,
+    `_get_state` and `_set_state`.
+    """
+
+    collections: Tuple[str, ...] = ()
+    format_version = 1
+
+    def __init__(self, store: DocumentStore = document_store, path: Optional[str] = None):
+        self.store = store
+        self.path = path
+        # Sharing the store's lock keeps index reads from deadlocking with commits in other threads
+        self._lock = store.lock
+        self._pending: "deque[Tuple[list, int, int]]" = deque()
+        self._signatures: Dict[Tuple[str, str], Any] = {}
+        self._generation: Optional[int] = None
+        self._loaded = False
+        self._dirty = False
+        self._reset()
+        store.add_listener(self._on_commit)
+        if path:
+            atexit.register(self.save)
+
+    # Subclass hooks
+
+    @abstractmethod
+    def _reset(self):
+        """Clear the index."""
+
+    @abstractmethod
+    def _add(self, collection: str, entity_id: str, record: Dict[str, Any]):
+        """Index an entity that is not in the index."""
+
+    @abstractmethod
+    def _remove(self, collection: str, entity_id: str):
+        """Drop an indexed entity."""
+
+    @abstractmethod
+    def _get_state(self) -> Any:
+        """The picklable index state."""
+
+    @abstractmethod
+    def _set_state(self, state: Any):
+        """Restore state returned by _get_state()."""
+
+    # Maintenance
+
+    @staticmethod
+    def _signature(record: Dict[str, Any]) -> Tuple[Any, Any]:
+        return record.get("version", 0), record.get("updated_at")
+
+    def _on_commit(self, changes, previous_generation: int, generation: int):
+        """Store listener: queue the change set; it is applied on the next sync()."""
+        self._pending.append((changes, previous_generation, generation))
+
+    def _replace(self, collection: str, entity_id: str, record: Optional[Dict[str, Any]]):
+        """Drop an entity from the index and re-add its new state, if any."""
+        key = (collection, entity_id)
+        if key in self._signatures:
+            self._remove(collection, entity_id)
+            del self._signatures[key]
+        if record is not None:
+            self._add(collection, entity_id, record)
+            self._signatures[key] = self._signature(record)
+        self._dirty = True
+
+    def _apply(self, changes):
+        for collection, entity_id, record in changes:
+            if collection in self.collections:
+                self._replace(collection, entity_id, thaw(record) if record is not None else None)
+
+    def _reconcile(self):
+        """Bring the index up to date with the store by comparing entity signatures."""
+        for collection in self.collections:
+            summaries = self.store.list_entities(collection)
+            for entity_id, summary in summaries.items():
+                if self._signatures.get((collection, entity_id)) != self._signature(summary):
+                    record = self.store.get_entity(collection, entity_id)
+                    self._replace(collection, entity_id, thaw(record) if record is not None else None)
+            stale = [key for key in self._signatures if key[0] == collection and key[1] not in summaries]
+            for _, entity_id in stale:
+                self._replace(collection, entity_id, None)
+
+    def sync(self):
+        """Apply queued commits, reconciling with the store if any were missed."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+            while self._pending:
+                changes, previous_generation, generation = self._pending.popleft()
+                if previous_generation == self._generation:
+                    self._apply(changes)
+                    self._generation = generation
+
+            generation = self.store.current_generation()
+            if generation != self._generation:
+                rebuilt = self._generation is None
+                self._reconcile()
+                self._generation = generation
+                if rebuilt:
+                    self.save()
+
+    # Persistence
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                saved = pickle.load(f)
+            if saved.get("format") != (type(self).__name__, self.format_version):
+                return
+            self._set_state(saved["state"])
+            self._signatures = saved["signatures"]
+        except Exception as e:
+            print(f"Warning: Could not load {self.path}, rebuilding it: {e}")
+            self._reset()
+            self._signatures = {}
+
+    def save(self) -> bool:
+        """Persist the index if it changed since it was last saved."""
+        if not self.path:
+            return True
+        with self._lock:
+            if not self._dirty:
+                return True
+            temp_path = f"{self.path}.tmp"
+            try:
+                with open(temp_path, 'wb') as f:
+                    pickle.dump({
+                        "format": (type(self).__name__, self.format_version),
+                        "signatures": self._signatures,
+                        "state": self._get_state(),
+                    }, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self.path)
+                self._dirty = False
+                return True
+            except Exception as e:
+                print(f"Warning: Could not save {self.path}: {e}")
+                return False
@@ -13,6 +13,21 @@ from enhancement_services import (
 from audio_services import generate_tts
 from image_services import extract_text_from_image
 from knowledge_assistant import knowledge_assistant
+from operation_log import operation_session
+
+
+def with_session(handler):
+    """Wrap a handler that changes the workspace so its changes, and any undo or redo it
+    runs, use the calling browser session's undo history rather than a shared one.
+
+    Gradio passes the request to the leading `gr.Request` parameter; the handler's own
+    inputs follow it unchanged.
+    """
+    def session_handler(request: gr.Request, *args):
+        with operation_session(getattr(request, "session_hash", None)):
+            return handler(*args)
+    session_handler.__name__ = handler.__name__
+    return session_handler
 
 
 def query_knowledge_assistant(query: str) -> tuple[str, any]:
@@ -63,8 +78,9 @@ def rebuild_knowledge_index() -> tuple[str, any]:
     """Rebuild the knowledge base index."""
     try:
         from rag_services import rag_service
-        rag_service.rebuild_index_from_projects()
-        response = '<div class="status-success">✅ Knowledge base index rebuilt successfully!</div>'
+        stats = rag_service.rebuild_index_from_projects()
+        details = f" {stats['chunks']} chunks in {stats['seconds']}s ({stats['chunks_per_second']} chunks/s)." if stats else ""
+        response = f'<div class="status-success">✅ Knowledge base index rebuilt successfully!{details}</div>'
         return response, gr.update(visible=True)
     except Exception as e:
         response = f'<div class="status-error">❌ Error rebuilding index: {str(e)}</div>'
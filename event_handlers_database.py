@@ -4,28 +4,46 @@
 import gradio as gr
 from database_components import (
     refresh_database_display, filter_chapters, search_chapters_handler,
+    load_chapter_page, next_chapter_page, previous_chapter_page, _filter_values,
     _get_stats_html, _get_story_choices, _get_character_choices
 )
 from database_models import (
-    create_chapter, update_chapter, delete_chapter, bulk_update_chapters
+    create_chapter, update_chapter, delete_chapter, bulk_update_chapters,
+    get_chapter_index, undo_last_operation, redo_last_operation
 )
+from chapter_sheets import export_chapters, import_chapter_sheet
+from document_store import thaw
+from event_handlers import with_session
 
 
 def setup_database_event_handlers(db_components):
     """Set up event handlers for the database interface."""
     
+    # Filter functionality
+    filter_inputs = [
+        db_components['story_filter'],
+        db_components['status_filter'],
+        db_components['act_filter']
+    ]
+    page_inputs = filter_inputs + [db_components['page_number'], db_components['page_size']]
+    page_outputs = [
+        db_components['chapters_table'],
+        db_components['page_number'],
+        db_components['page_info']
+    ]
+    
     # Search functionality
     db_components['search_btn'].click(
         fn=search_chapters_handler,
-        inputs=[db_components['search_input']],
-        outputs=[db_components['chapters_table']]
+        inputs=[db_components['search_input'], db_components['page_size']],
+        outputs=[db_components['chapters_table'], db_components['page_info']]
     )
     
     # Enter key search
     db_components['search_input'].submit(
         fn=search_chapters_handler,
-        inputs=[db_components['search_input']],
-        outputs=[db_components['chapters_table']]
+        inputs=[db_components['search_input'], db_components['page_size']],
+        outputs=[db_components['chapters_table'], db_components['page_info']]
     )
     
     # Refresh functionality
@@ -37,22 +55,29 @@ def setup_database_event_handlers(db_components):
             db_components['story_filter'],
             db_components['chapter_story']
         ]
+    ).then(
+        fn=load_chapter_page,
+        inputs=page_inputs,
+        outputs=page_outputs
     )
     
-    # Filter functionality
-    filter_inputs = [
-        db_components['story_filter'],
-        db_components['status_filter'],
-        db_components['act_filter']
-    ]
-    
     for filter_component in filter_inputs:
         filter_component.change(
             fn=filter_chapters,
-            inputs=filter_inputs,
-            outputs=[db_components['chapters_table']]
+            inputs=filter_inputs + [db_components['page_size']],
+            outputs=page_outputs
         )
     
+    # Pagination
+    db_components['next_page_btn'].click(fn=next_chapter_page, inputs=page_inputs, outputs=page_outputs)
+    db_components['prev_page_btn'].click(fn=previous_chapter_page, inputs=page_inputs, outputs=page_outputs)
+    db_components['page_number'].submit(fn=load_chapter_page, inputs=page_inputs, outputs=page_outputs)
+    db_components['page_size'].change(
+        fn=filter_chapters,
+        inputs=filter_inputs + [db_components['page_size']],
+        outputs=page_outputs
+    )
+    
     # Add chapter functionality
     db_components['add_chapter_btn'].click(
         fn=lambda: (gr.update(visible=True), gr.update(visible=False), False, ""),
@@ -82,19 +107,24 @@ def setup_database_event_handlers(db_components):
             db_components['chapter_characters'],
             db_components['chapter_location'],
             db_components['chapter_notes'],
-            db_components['database_status']
+            db_components['database_status'],
+            db_components['selected_chapter_version']
         ]
     )
     
     # Delete chapter functionality
     db_components['delete_chapter_btn'].click(
-        fn=handle_delete_chapter,
+        fn=with_session(handle_delete_chapter),
         inputs=[db_components['chapters_table']],
         outputs=[
             db_components['chapters_table'],
             db_components['stats_display'],
             db_components['database_status']
         ]
+    ).then(
+        fn=load_chapter_page,
+        inputs=page_inputs,
+        outputs=page_outputs
     )
     
     # Bulk update functionality
@@ -105,10 +135,11 @@ def setup_database_event_handlers(db_components):
     
     # Save chapter functionality
     db_components['save_chapter_btn'].click(
-        fn=handle_save_chapter,
+        fn=with_session(handle_save_chapter),
         inputs=[
             db_components['editing_mode'],
             db_components['selected_chapter_id'],
+            db_components['selected_chapter_version'],
             db_components['chapter_story'],
             db_components['chapter_act'],
             db_components['chapter_block'],
@@ -125,6 +156,10 @@ def setup_database_event_handlers(db_components):
             db_components['chapter_form'],
             db_components['database_status']
         ]
+    ).then(
+        fn=load_chapter_page,
+        inputs=page_inputs,
+        outputs=page_outputs
     ).then(
         fn=lambda: ("", 1, 1, "", "Not Started", "", [], "", ""),
         outputs=[
@@ -159,13 +194,16 @@ def setup_database_event_handlers(db_components):
     
     # Apply bulk updates
     db_components['apply_bulk_btn'].click(
-        fn=handle_bulk_update,
+        fn=with_session(handle_bulk_update),
         inputs=[
             db_components['chapters_table'],
             db_components['bulk_status'],
             db_components['bulk_location'],
-            db_components['bulk_notes']
-        ],
+            db_components['bulk_notes'],
+            db_components['bulk_act'],
+            db_components['bulk_clear'],
+            db_components['bulk_scope']
+        ] + filter_inputs,
         outputs=[
             db_components['chapters_table'],
             db_components['stats_display'],
@@ -173,23 +211,68 @@ def setup_database_event_handlers(db_components):
             db_components['database_status']
         ]
     ).then(
-        fn=lambda: ("", "", ""),
+        fn=load_chapter_page,
+        inputs=page_inputs,
+        outputs=page_outputs
+    ).then(
+        fn=lambda: ("", "", "", "", []),
         outputs=[
             db_components['bulk_status'],
             db_components['bulk_location'],
-            db_components['bulk_notes']
+            db_components['bulk_notes'],
+            db_components['bulk_act'],
+            db_components['bulk_clear']
         ]
     )
     
     # Cancel bulk form
     db_components['cancel_bulk_btn'].click(
-        fn=lambda: (gr.update(visible=False), "", "", ""),
+        fn=lambda: (gr.update(visible=False), "", "", "", "", []),
         outputs=[
             db_components['bulk_form'],
             db_components['bulk_status'],
             db_components['bulk_location'],
-            db_components['bulk_notes']
+            db_components['bulk_notes'],
+            db_components['bulk_act'],
+            db_components['bulk_clear']
+        ]
+    )
+    
+    # Undo / redo the last workspace change
+    for button, handler in ((db_components['undo_btn'], handle_undo), (db_components['redo_btn'], handle_redo)):
+        button.click(
+            fn=with_session(handler),
+            outputs=[
+                db_components['chapters_table'],
+                db_components['stats_display'],
+                db_components['database_status']
+            ]
+        ).then(
+            fn=load_chapter_page,
+            inputs=page_inputs,
+            outputs=page_outputs
+        )
+    
+    # Spreadsheet export of the filtered chapters
+    db_components['export_btn'].click(
+        fn=handle_export_chapters,
+        inputs=[db_components['export_format']] + filter_inputs,
+        outputs=[db_components['export_file'], db_components['database_status']]
+    )
+    
+    # Spreadsheet import
+    db_components['import_btn'].click(
+        fn=with_session(handle_import_sheet),
+        inputs=[db_components['import_file']],
+        outputs=[
+            db_components['chapters_table'],
+            db_components['stats_display'],
+            db_components['database_status']
         ]
+    ).then(
+        fn=load_chapter_page,
+        inputs=page_inputs,
+        outputs=page_outputs
     )
 
 
@@ -200,7 +283,7 @@ def handle_edit_chapter(table_data):
             gr.update(visible=False), gr.update(visible=False), False, "",
             gr.update(), gr.update(), gr.update(), gr.update(), gr.update(),
             gr.update(), gr.update(), gr.update(), gr.update(),
-            gr.update(value="❌ No chapter selected.", visible=True)
+            gr.update(value="❌ No chapter selected.", visible=True), None
         )
     
     # For now, edit the first row (in a real implementation, you'd handle row selection)
@@ -211,22 +294,22 @@ def handle_edit_chapter(table_data):
             gr.update(visible=False), gr.update(visible=False), False, "",
             gr.update(), gr.update(), gr.update(), gr.update(), gr.update(),
             gr.update(), gr.update(), gr.update(), gr.update(),
-            gr.update(value="❌ Invalid chapter selection.", visible=True)
+            gr.update(value="❌ Invalid chapter selection.", visible=True), None
         )
     
     # Load chapter data
-    from database_models import get_all_chapters
-    chapters = {c["id"]: c for c in get_all_chapters()}
+    from database_models import get_chapter
+    chapter = get_chapter(chapter_id)
     
-    if chapter_id not in chapters:
+    if chapter is None:
         return (
             gr.update(visible=False), gr.update(visible=False), False, "",
             gr.update(), gr.update(), gr.update(), gr.update(), gr.update(),
             gr.update(), gr.update(), gr.update(), gr.update(),
-            gr.update(value="❌ Chapter not found.", visible=True)
+            gr.update(value="❌ Chapter not found.", visible=True), None
         )
     
-    chapter = chapters[chapter_id]
+    chapter = thaw(chapter)
     
     return (
         gr.update(visible=True),  # chapter_form
@@ -242,7 +325,8 @@ def handle_edit_chapter(table_data):
         gr.update(value=chapter.get("characters", [])),  # chapter_characters
         gr.update(value=chapter.get("location", "")),  # chapter_location
         gr.update(value=chapter.get("notes", "")),  # chapter_notes
-        gr.update(value="", visible=False)  # database_status
+        gr.update(value="", visible=False),  # database_status
+        chapter.get("version", 0)  # selected_chapter_version
     )
 
 
@@ -278,7 +362,7 @@ def handle_delete_chapter(table_data):
     )
 
 
-def handle_save_chapter(editing_mode, selected_chapter_id, story_id, act_number, block_number, title, status, outline, characters, location, notes):
+def handle_save_chapter(editing_mode, selected_chapter_id, selected_chapter_version, story_id, act_number, block_number, title, status, outline, characters, location, notes):
     """Handle saving a chapter (create or update)."""
     if not title.strip():
         return (
@@ -302,7 +386,7 @@ def handle_save_chapter(editing_mode, selected_chapter_id, story_id, act_number,
                 "location": location,
                 "notes": notes
             }
-            message, updated_chapter = update_chapter(selected_chapter_id, updates)
+            message, updated_chapter = update_chapter(selected_chapter_id, updates, expected_version=selected_chapter_version)
         else:
             # Create new chapter
             message, new_chapter = create_chapter(
@@ -337,18 +421,20 @@ def handle_save_chapter(editing_mode, selected_chapter_id, story_id, act_number,
         )
 
 
-def handle_bulk_update(table_data, bulk_status, bulk_location, bulk_notes):
-    """Handle bulk updating selected chapters."""
-    if not table_data or len(table_data) == 0:
+def handle_bulk_update(table_data, bulk_status, bulk_location, bulk_notes, bulk_act="", bulk_clear=None,
+                       bulk_scope="Chapters on this page", story_filter="All", status_filter="All", act_filter="All"):
+    """Handle bulk updating the chapters on the current page, or all chapters matching the filters."""
+    if bulk_scope == "All chapters matching the filters":
+        chapter_ids = get_chapter_index().ids(*_filter_values(story_filter, status_filter, act_filter))
+    elif table_data is None or len(table_data) == 0:
         return (
             gr.update(),
             gr.update(),
             gr.update(visible=True),
             gr.update(value="❌ No chapters selected.", visible=True)
         )
-    
-    # Get all chapter IDs from the table (in a real implementation, you'd handle selection)
-    chapter_ids = table_data['ID'].tolist() if 'ID' in table_data.columns else []
+    else:
+        chapter_ids = table_data['ID'].tolist() if 'ID' in table_data.columns else []
     
     if not chapter_ids:
         return (
@@ -360,6 +446,8 @@ def handle_bulk_update(table_data, bulk_status, bulk_location, bulk_notes):
     
     # Prepare updates
     updates = {}
+    append = {}
+    clear = list(bulk_clear or [])
     
     if bulk_status:
         updates["status"] = bulk_status
@@ -368,11 +456,9 @@ def handle_bulk_update(table_data, bulk_status, bulk_location, bulk_notes):
         updates["location"] = bulk_location.strip()
     
     if bulk_notes.strip():
-        # For bulk notes, we append to existing notes
-        # This would need to be handled specially in the bulk_update_chapters function
-        updates["notes_append"] = bulk_notes.strip()
+        append["notes"] = bulk_notes.strip()
     
-    if not updates:
+    if not updates and not append and not clear and not bulk_act:
         return (
             gr.update(),
             gr.update(),
@@ -380,8 +466,9 @@ def handle_bulk_update(table_data, bulk_status, bulk_location, bulk_notes):
             gr.update(value="❌ No updates specified.", visible=True)
         )
     
-    # Apply bulk updates
-    message = bulk_update_chapters(chapter_ids[:5], updates)  # Limit to first 5 for demo
+    # Apply the updates and the move to another act in one write (and one undo step)
+    act_number = int(bulk_act.replace("Act ", "")) if bulk_act else None
+    message = bulk_update_chapters(chapter_ids, updates, append=append, clear=clear, act_number=act_number)
     
     # Refresh display
     from database_components import refresh_database_display
@@ -393,3 +480,55 @@ def handle_bulk_update(table_data, bulk_status, bulk_location, bulk_notes):
         gr.update(visible=False),  # Hide bulk form
         gr.update(value=message, visible=True)
     )
+
+
+def handle_export_chapters(export_format, story_filter, status_filter, act_filter):
+    """Handle exporting the filtered chapters to a spreadsheet."""
+    path, message = export_chapters(export_format, *_filter_values(story_filter, status_filter, act_filter))
+    return (
+        gr.update(value=path, visible=path is not None),
+        gr.update(value=message, visible=True)
+    )
+
+
+def handle_import_sheet(sheet_file):
+    """Handle importing an edited chapter spreadsheet."""
+    if sheet_file is None:
+        return (
+            gr.update(),
+            gr.update(),
+            gr.update(value="❌ No file selected.", visible=True)
+        )
+    
+    path = sheet_file if isinstance(sheet_file, str) else sheet_file.name
+    message, _ = import_chapter_sheet(path)
+    
+    # Refresh display
+    from database_components import refresh_database_display
+    new_table, new_stats, _, _ = refresh_database_display()
+    
+    return (
+        new_table,
+        new_stats,
+        gr.update(value=message, visible=True)
+    )
+
+
+def _after_replay(message):
+    """Refresh the table and statistics after an undo or redo."""
+    new_table, new_stats, _, _ = refresh_database_display()
+    return (
+        new_table,
+        new_stats,
+        gr.update(value=message, visible=True)
+    )
+
+
+def handle_undo():
+    """Handle undoing the last workspace change."""
+    return _after_replay(undo_last_operation())
+
+
+def handle_redo():
+    """Handle redoing the last undone workspace change."""
+    return _after_replay(redo_last_operation())
@@ -3,11 +3,12 @@
 
 import gradio as gr
 from models import (
-    create_new_project, load_project, save_script_content, update_word_count
+    create_new_project, load_project, save_script_content, update_word_count,
+    list_script_revisions, diff_script_revision, restore_script_revision
 )
 from enhancement_services import enhance_script_placeholder
 from export_services import export_project
-from event_handlers import enhanced_generate_tts, enhanced_extract_text
+from event_handlers import enhanced_generate_tts, enhanced_extract_text, with_session
 
 
 def setup_scripts_event_handlers(scripts_components):
@@ -15,7 +16,7 @@ def setup_scripts_event_handlers(scripts_components):
     
     # Project creation
     scripts_components['create_btn'].click(
-        fn=create_new_project,
+        fn=with_session(create_new_project),
         inputs=[scripts_components['new_project_name']],
         outputs=[scripts_components['create_status'], scripts_components['project_dropdown']]
     ).then(
@@ -28,6 +29,10 @@ def setup_scripts_event_handlers(scripts_components):
         fn=load_project,
         inputs=[scripts_components['project_dropdown']],
         outputs=[scripts_components['script_textbox'], scripts_components['notes_textbox'], scripts_components['word_count_display']]
+    ).then(
+        fn=refresh_revision_choices,
+        inputs=[scripts_components['project_dropdown']],
+        outputs=[scripts_components['revision_dropdown']]
     )
     
     # Word count update
@@ -39,12 +44,34 @@ def setup_scripts_event_handlers(scripts_components):
     
     # Save functionality
     scripts_components['save_btn'].click(
-        fn=save_script_content,
+        fn=with_session(save_script_content),
         inputs=[scripts_components['project_dropdown'], scripts_components['script_textbox'], scripts_components['notes_textbox']],
         outputs=[scripts_components['save_status']]
     ).then(
         lambda: gr.update(visible=True),
         outputs=[scripts_components['save_status']]
+    ).then(
+        fn=refresh_revision_choices,
+        inputs=[scripts_components['project_dropdown']],
+        outputs=[scripts_components['revision_dropdown']]
+    )
+    
+    # Revision history
+    scripts_components['compare_revision_btn'].click(
+        fn=handle_compare_revision,
+        inputs=[scripts_components['project_dropdown'], scripts_components['revision_dropdown'], scripts_components['script_textbox']],
+        outputs=[scripts_components['revision_diff'], scripts_components['revision_status']]
+    )
+    
+    scripts_components['restore_revision_btn'].click(
+        fn=with_session(handle_restore_revision),
+        inputs=[scripts_components['project_dropdown'], scripts_components['revision_dropdown']],
+        outputs=[
+            scripts_components['script_textbox'],
+            scripts_components['word_count_display'],
+            scripts_components['revision_status'],
+            scripts_components['revision_dropdown']
+        ]
     )
     
     # TTS functionality
@@ -86,3 +113,29 @@ def setup_scripts_event_handlers(scripts_components):
         lambda: (gr.update(visible=True), gr.update(visible=True)),
         outputs=[scripts_components['export_file'], scripts_components['export_status']]
     )
+
+
+def refresh_revision_choices(project_id):
+    """Refresh the revision list for the selected project."""
+    return gr.update(choices=list_script_revisions(project_id), value=None)
+
+
+def handle_compare_revision(project_id, revision, content):
+    """Show what changed between a saved revision and the editor."""
+    diff = diff_script_revision(project_id, revision, content or "")
+    if diff.startswith("❌"):
+        return gr.update(visible=False), gr.update(value=diff, visible=True)
+    return gr.update(value=diff, visible=True), gr.update(visible=False)
+
+
+def handle_restore_revision(project_id, revision):
+    """Restore a saved revision into the editor (saved as a new revision)."""
+    message, content = restore_script_revision(project_id, revision)
+    if content is None:
+        return gr.update(), gr.update(), gr.update(value=message, visible=True), gr.update()
+    return (
+        content,
+        update_word_count(content),
+        gr.update(value=message, visible=True),
+        refresh_revision_choices(project_id)
+    )
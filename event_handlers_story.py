@@ -6,7 +6,7 @@ from models import create_story, create_character, create_world_element
 from event_handlers import (
     query_knowledge_assistant, analyze_consistency, suggest_elements,
     enhance_with_context, rebuild_knowledge_index, display_stories,
-    display_characters, display_world_elements, perform_search
+    display_characters, display_world_elements, perform_search, with_session
 )
 
 
@@ -47,7 +47,7 @@ def setup_story_intelligence_event_handlers(story_components):
     
     # Story creation
     story_components['create_story_btn'].click(
-        fn=create_story,
+        fn=with_session(create_story),
         inputs=[story_components['new_story_title'], story_components['new_story_desc']],
         outputs=[story_components['story_status'], story_components['story_dropdown']]
     ).then(
@@ -60,7 +60,7 @@ def setup_story_intelligence_event_handlers(story_components):
     
     # Character creation
     story_components['create_char_btn'].click(
-        fn=create_character,
+        fn=with_session(create_character),
         inputs=[story_components['new_char_name'], story_components['new_char_desc']],
         outputs=[story_components['char_status'], story_components['character_dropdown']]
     ).then(
@@ -73,7 +73,7 @@ def setup_story_intelligence_event_handlers(story_components):
     
     # World element creation
     story_components['create_world_btn'].click(
-        fn=create_world_element,
+        fn=with_session(create_world_element),
         inputs=[story_components['new_world_name'], story_components['world_type'], story_components['new_world_desc']],
         outputs=[story_components['world_status'], story_components['world_dropdown']]
     ).then(
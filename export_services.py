@@ -5,7 +5,8 @@ import tempfile
 import json
 import os
 from gtts import gTTS
-from models import load_projects
+from models import get_entity
+from document_store import thaw
 from typing import Tuple, Optional
 
 
@@ -15,12 +16,10 @@ def export_project(project_id: str, export_type: str) -> Tuple[Optional[str], st
         return None, '<div class="status-error">❌ No project selected for export</div>'
     
     try:
-        data = load_projects()
-        if project_id not in data["projects"]:
+        project = get_entity("projects", project_id)
+        if project is None:
             return None, '<div class="status-error">❌ Selected project not found</div>'
         
-        project = data["projects"][project_id]
-        
         if export_type == "text":
             return export_as_text(project)
         elif export_type == "audio":
@@ -98,12 +97,12 @@ def export_as_audio(project: dict) -> Tuple[Optional[str], str]:
 def export_project_data_json(project_id: str) -> Tuple[Optional[str], str]:
     """Export project data as JSON (utility function)."""
     try:
-        data = load_projects()
-        if project_id not in data["projects"]:
+        project = get_entity("projects", project_id)
+        if project is None:
             return None, '<div class="status-error">❌ Project not found</div>'
         
         project_data = {
-            "project": data["projects"][project_id],
+            "project": thaw(project),
             "export_timestamp": time.time(),
             "export_format": "ScriptVoice JSON v1.0"
         }
@@ -1,7 +1,9 @@
 
 """Hybrid RAG service combining IONOS and local storage for ScriptVoice."""
 
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from config import EMBEDDING_BATCH_SIZE
 from ionos_collections import ionos_collections
 from vector_storage import LocalVectorStorage
 
@@ -36,6 +38,23 @@ class HybridRAGService:
         else:
             self.local_storage.add_content(content, content_type, content_id, title)
     
+    def add_contents(self, items: List[Tuple[str, str, str, str]], batch_size: Optional[int] = None,
+                     progress: Optional[Callable[[int, int], None]] = None, parallel: bool = False):
+        """Add many (content, content_type, content_id, title) items, embedding them in batches locally.
+        
+        `parallel` lets bulk jobs use the embedding process pool (see EMBEDDING_WORKERS).
+        """
+        if self.use_ionos:
+            items = [item for item in items if item[0].strip()]
+            for done, (content, content_type, content_id, title) in enumerate(items, 1):
+                self._add_content_ionos(content, content_type, content_id, title)
+                if progress:
+                    progress(done, len(items))
+        elif batch_size:
+            self.local_storage.add_contents(items, batch_size, progress, parallel)
+        else:
+            self.local_storage.add_contents(items, progress=progress, parallel=parallel)
+    
     def _add_content_ionos(self, content: str, content_type: str, content_id: str, title: str):
         """Add content to IONOS collections."""
         # Remove existing content first
@@ -67,6 +86,10 @@ class HybridRAGService:
         # IONOS removal would need to be implemented in ionos_collections
         # For now, we don't remove from IONOS as documents are replaced when re-added
     
+    def remove_contents(self, content_ids: List[str]):
+        """Remove several items from the vector database in one pass."""
+        self.local_storage.remove_contents(content_ids)
+    
     def search(self, query: str, k: int = 5, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search for similar content (IONOS or local)."""
         if self.use_ionos:
@@ -136,40 +159,76 @@ class HybridRAGService:
         if ionos_collections.is_available():
             ionos_collections.sync_projects_to_collections()
     
-    def rebuild_index_from_projects(self):
-        """Rebuild the entire vector index from current projects data."""
+    def rebuild_index_from_projects(self, batch_size: int = EMBEDDING_BATCH_SIZE,
+                                    progress: Callable[[str], None] = print) -> Optional[Dict[str, Any]]:
+        """Rebuild the entire vector index from current projects data.
+        
+        Returns rebuild statistics (items, chunks, seconds, chunks per second) for the local index.
+        """
         if self.use_ionos:
             self.sync_to_ionos()
-        else:
-            self._rebuild_local_index()
+            return None
+        return self._rebuild_local_index(batch_size, progress)
+    
+    def _workspace_items(self) -> List[Tuple[str, str, str, str]]:
+        """(content, content_type, content_id, title) for every indexed entity in the workspace."""
+        from models import get_projects_view
+        from database_models import rag_item, get_chapter_index, get_scene_tree
+        
+        data = get_projects_view()
+        items = []
+        
+        # Scripts, stories, characters and world elements
+        for collection in ("projects", "stories", "characters", "world_elements"):
+            for entity_id, record in data.get(collection, {}).items():
+                items.append(rag_item(collection, entity_id, record))
+        
+        # Chapters and scenes
+        story_titles = {story_id: story['title'] for story_id, story in data.get("stories", {}).items()}
+        chapter_index = get_chapter_index()
+        chapters = data.get("chapters", {})
+        for chapter_id, chapter in chapters.items():
+            number = chapter_index.display_number(chapter_id) if chapter_index else None
+            items.append(rag_item("chapters", chapter_id, chapter, story_titles.get(chapter.get("story_id"), ""), number))
+        
+        scene_tree = get_scene_tree()
+        for scene_id, scene in data.get("scenes", {}).items():
+            chapter = chapters.get(scene.get("chapter_id")) or {}
+            number = scene_tree.display_number(scene_id) if scene_tree else None
+            items.append(rag_item("scenes", scene_id, scene, story_titles.get(chapter.get("story_id"), ""), number))
+        
+        return items
     
-    def _rebuild_local_index(self):
-        """Rebuild local index from projects data."""
-        from models import load_projects
+    def _rebuild_local_index(self, batch_size: int = EMBEDDING_BATCH_SIZE,
+                             progress: Callable[[str], None] = print) -> Dict[str, Any]:
+        """Rebuild the local index in one pass over the workspace.
+        
+        The whole workspace is chunked first, then the chunks are embedded in batches of
+        `batch_size` (reusing cached embeddings) and the index is written to disk once.
+        """
+        started = time.time()
+        items = self._workspace_items()
         
         # Clear existing index
         self.local_storage.clear_and_rebuild()
         
-        # Load all projects data
-        data = load_projects()
-        
-        # Add stories
-        for story_id, story in data.get("stories", {}).items():
-            content = f"{story['title']}\n\n{story['description']}\n\n{story['content']}"
-            self.local_storage.add_content(content, "story", story_id, story['title'])
-        
-        # Add characters
-        for char_id, char in data.get("characters", {}).items():
-            content = f"{char['name']}\n\n{char['description']}\n\nTraits: {', '.join(char.get('traits', []))}\n\n{char.get('notes', '')}"
-            self.local_storage.add_content(content, "character", char_id, char['name'])
-        
-        # Add world elements
-        for elem_id, elem in data.get("world_elements", {}).items():
-            content = f"{elem['name']} ({elem['type']})\n\n{elem['description']}\n\nTags: {', '.join(elem.get('tags', []))}\n\n{elem.get('notes', '')}"
-            self.local_storage.add_content(content, "world_element", elem_id, elem['name'])
-        
-        # Add scripts
-        for proj_id, proj in data.get("projects", {}).items():
-            if proj.get('content'):
-                content = f"{proj['name']}\n\n{proj['content']}\n\nNotes: {proj.get('notes', '')}"
-                self.local_storage.add_content(content, "script", proj_id, proj['name'])
+        chunks = 0
+        
+        def report(done: int, total: int):
+            nonlocal chunks
+            chunks = done
+            elapsed = time.time() - started
+            progress(f"Indexed {done}/{total} chunks ({done / max(elapsed, 1e-6):.0f} chunks/s)")
+        
+        self.local_storage.add_contents(items, batch_size, report, parallel=True)
+        
+        elapsed = time.time() - started
+        stats = {
+            "items": len(items),
+            "chunks": chunks,
+            "seconds": round(elapsed, 2),
+            "chunks_per_second": round(chunks / max(elapsed, 1e-6), 1),
+        }
+        progress(f"Rebuilt index: {stats['items']} items, {chunks} chunks in {stats['seconds']}s "
+                 f"({stats['chunks_per_second']} chunks/s)")
+        return stats
@@ -47,6 +47,24 @@ def create_scripts_interface():
                     container=False
                 )
             
+            # Revision History - Collapsible
+            with gr.Accordion("🕘 Revision History", open=False):
+                revision_dropdown = gr.Dropdown(
+                    label="Saved Revisions",
+                    choices=[],
+                    container=False
+                )
+                with gr.Row():
+                    compare_revision_btn = gr.Button("🔍 Compare", elem_classes=["secondary-button"])
+                    restore_revision_btn = gr.Button("↩️ Restore", elem_classes=["secondary-button"])
+                revision_status = gr.HTML(visible=False)
+                revision_diff = gr.Textbox(
+                    label="Changes (revision → editor)",
+                    lines=10,
+                    interactive=False,
+                    visible=False
+                )
+            
             # Advanced Tools - Collapsible
             with gr.Accordion("🛠️ Advanced Tools", open=False):
                 # OCR Section
@@ -113,6 +131,11 @@ def create_scripts_interface():
         'save_status': save_status,
         'tts_status': tts_status,
         'notes_textbox': notes_textbox,
+        'revision_dropdown': revision_dropdown,
+        'compare_revision_btn': compare_revision_btn,
+        'restore_revision_btn': restore_revision_btn,
+        'revision_status': revision_status,
+        'revision_diff': revision_diff,
         'image_input': image_input,
         'ocr_btn': ocr_btn,
         'ocr_status': ocr_status,
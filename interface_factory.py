@@ -2,7 +2,8 @@
 """Main interface factory for ScriptVoice application."""
 
 import gradio as gr
-from models import load_projects
+from config import GRADIO_CONCURRENCY_LIMIT
+from models import list_entities
 from ui_components import CUSTOM_CSS, get_header_html
 from interface_components import create_scripts_interface, create_story_intelligence_interface
 from mood_board_components import create_mood_board_interface
@@ -18,8 +19,7 @@ def create_interface():
     """Create the main Gradio interface with improved UI."""
     
     # Load initial projects
-    data = load_projects()
-    project_choices = [(proj["name"], proj_id) for proj_id, proj in data["projects"].items()]
+    project_choices = [(proj["name"], proj_id) for proj_id, proj in list_entities("projects").items()]
     
     with gr.Blocks(
         title="ScriptVoice - AI-Powered Story Intelligence Platform", 
@@ -156,4 +156,7 @@ def create_interface():
             ]
         )
     
+    # Workspace mutations are serialized by the document store lock, so several events can run at once
+    app.queue(default_concurrency_limit=GRADIO_CONCURRENCY_LIMIT)
+    
     return app
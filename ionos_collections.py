@@ -277,7 +277,8 @@ class IONOSCollectionsService:
     
     def sync_projects_to_collections(self):
         """Sync all projects data to IONOS collections."""
-        from models import load_projects
+        from models import get_projects_view
+        from document_store import thaw
         
         if not self.is_available():
             print("IONOS collections not available - skipping sync")
@@ -285,7 +286,7 @@ class IONOSCollectionsService:
         
         print("Syncing projects to IONOS Document Collections...")
         
-        data = load_projects()
+        data = get_projects_view()
         
         # Sync stories
         for story_id, story in data.get("stories", {}).items():
@@ -293,7 +294,7 @@ class IONOSCollectionsService:
             metadata = {
                 "content_type": "story",
                 "content_id": story_id,
-                "tags": story.get("tags", [])
+                "tags": thaw(story.get("tags", []))
             }
             self.add_document("stories", content, story['title'], metadata)
         
@@ -303,7 +304,7 @@ class IONOSCollectionsService:
             metadata = {
                 "content_type": "character",
                 "content_id": char_id,
-                "traits": char.get("traits", [])
+                "traits": thaw(char.get("traits", []))
             }
             self.add_document("characters", content, char['name'], metadata)
         
@@ -314,7 +315,7 @@ class IONOSCollectionsService:
                 "content_type": "world_element",
                 "content_id": elem_id,
                 "element_type": elem['type'],
-                "tags": elem.get("tags", [])
+                "tags": thaw(elem.get("tags", []))
             }
             self.add_document("world_elements", content, elem['name'], metadata)
         
@@ -2,9 +2,17 @@
 """Main application entry point for ScriptVoice - Pure Gradio Application."""
 
 import os
-from interface_factory import create_interface
 from config import IONOS_API_TOKEN, OPENAI_API_KEY
 
+def create_interface():
+    """Build the Gradio app.
+
+    The UI (and with it the RAG service and its model) is imported here rather than at
+    module level, because embedding pool workers re-import this module when they spawn.
+    """
+    from interface_factory import create_interface as build_interface
+    return build_interface()
+
 def ensure_directories():
     """Ensure required directories exist."""
     directories = ["audio_output", "temp", "chromadb_storage", "generated_images", "mood_boards"]
@@ -1,101 +1,97 @@
 
 """Data models and storage functions for ScriptVoice."""
 
+import heapq
 import json
 import uuid
 from datetime import datetime
+from itertools import islice
 from typing import Dict, List, Any, Optional, Tuple
 from config import PROJECTS_FILE
-import os
+from document_store import document_store, ReadOnlyDict, StorageError, thaw
+from substring_index import search_entities
+# Imported here so every workspace change is recorded for undo/redo
+from operation_log import operation_log
+from revision_store import revision_store, text_diff
 
 def ensure_projects_file():
     """Ensure the projects file exists with proper structure."""
-    if not os.path.exists(PROJECTS_FILE):
-        default_data = {
-            "projects": {},
-            "stories": {},
-            "characters": {},
-            "world_elements": {}
-        }
-        save_projects(default_data)
+    if document_store.ensure_initialized():
         print(f"Created initial {PROJECTS_FILE}")
 
 def load_projects() -> Dict[str, Any]:
-    """Load projects data from JSON file."""
+    """Load a mutable copy of the projects data."""
     ensure_projects_file()
-    
-    try:
-        with open(PROJECTS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Ensure all required keys exist
-        required_keys = ["projects", "stories", "characters", "world_elements"]
-        for key in required_keys:
-            if key not in data:
-                data[key] = {}
-        
-        return data
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error loading projects file: {e}")
-        # Return default structure
-        return {
-            "projects": {},
-            "stories": {},
-            "characters": {},
-            "world_elements": {}
-        }
+    return document_store.load()
+
+def get_projects_view() -> ReadOnlyDict:
+    """Get a cached, read-only view of the projects data for display and lookups."""
+    ensure_projects_file()
+    return document_store.snapshot()
 
 def save_projects(data: Dict[str, Any]) -> bool:
-    """Save projects data to JSON file."""
-    try:
-        with open(PROJECTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        print(f"Error saving projects: {e}")
-        return False
+    """Save projects data; writes within the debounce window are coalesced."""
+    return document_store.save(data, label="Save workspace")
+
+def flush_projects() -> bool:
+    """Wait until all saved projects data is durable on disk."""
+    return document_store.flush()
+
+def get_entity(collection: str, entity_id: str) -> Optional[ReadOnlyDict]:
+    """Get a read-only view of a single entity without loading the whole workspace."""
+    ensure_projects_file()
+    return document_store.get_entity(collection, entity_id)
+
+def list_entities(collection: str) -> ReadOnlyDict:
+    """Get read-only summaries (no content/notes) of every entity in a collection."""
+    ensure_projects_file()
+    return document_store.list_entities(collection)
 
 def create_new_project(name: str) -> Tuple[str, List[Tuple[str, str]]]:
     """Create a new project and return status and updated choices."""
     if not name.strip():
         return "❌ Project name cannot be empty.", []
     
-    data = load_projects()
     project_id = str(uuid.uuid4())
     
-    # Check if project name already exists
-    for proj in data["projects"].values():
-        if proj["name"].lower() == name.strip().lower():
-            return "❌ Project name already exists.", [(proj["name"], proj_id) for proj_id, proj in data["projects"].items()]
+    try:
+        # The name check and insert share one lock so concurrent creates can't both pass the check
+        with document_store.transaction(label=f"Create project '{name.strip()}'") as txn:
+            projects = txn.list("projects")
+            
+            # Check if project name already exists
+            for proj in projects.values():
+                if proj["name"].lower() == name.strip().lower():
+                    return "❌ Project name already exists.", [(proj["name"], proj_id) for proj_id, proj in projects.items()]
+            
+            project = {
+                "name": name.strip(),
+                "content": "",
+                "notes": "",
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat()
+            }
+            txn.put("projects", project_id, project)
+    except StorageError:
+        return "❌ Error saving project.", []
     
-    data["projects"][project_id] = {
-        "name": name.strip(),
-        "content": "",
-        "notes": "",
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
-    }
+    # Update RAG index
+    try:
+        from rag_services import rag_service
+        from database_models import rag_item
+        rag_service.add_contents([rag_item("projects", project_id, project)])
+    except Exception as e:
+        print(f"Warning: Could not update RAG index: {e}")
     
-    if save_projects(data):
-        # Update RAG index
-        try:
-            from rag_services import rag_service
-            rag_service.add_content("", "script", project_id, name.strip())
-        except Exception as e:
-            print(f"Warning: Could not update RAG index: {e}")
-        
-        choices = [(proj["name"], proj_id) for proj_id, proj in data["projects"].items()]
-        return f"✅ Project '{name}' created successfully!", choices
-    else:
-        return "❌ Error saving project.", []
+    choices = [(proj["name"], proj_id) for proj_id, proj in list_entities("projects").items()]
+    return f"✅ Project '{name}' created successfully!", choices
 
 def load_project(project_id: str) -> Tuple[str, str, str]:
     """Load a specific project's content."""
     if not project_id:
         return "", "", "No words"
     
-    data = load_projects()
-    project = data["projects"].get(project_id, {})
+    project = get_entity("projects", project_id) or {}
     
     content = project.get("content", "")
     notes = project.get("notes", "")
@@ -103,32 +99,86 @@ def load_project(project_id: str) -> Tuple[str, str, str]:
     
     return content, notes, f"{word_count} words"
 
-def save_script_content(project_id: str, content: str, notes: str) -> str:
-    """Save script content and notes."""
+def save_script_content(project_id: str, content: str, notes: str, revision_note: str = "") -> str:
+    """Save script content and notes; changed content is added to the revision history."""
     if not project_id:
         return "❌ No project selected."
     
-    data = load_projects()
-    if project_id not in data["projects"]:
-        return "❌ Project not found."
+    try:
+        # Held across the save and the revision so revision numbers follow save order
+        with document_store.lock:
+            with document_store.transaction(label="Save script") as txn:
+                project = txn.get("projects", project_id)
+                if project is None:
+                    return "❌ Project not found."
+                
+                project["content"] = content
+                project["notes"] = notes
+                project["updated_at"] = datetime.now().isoformat()
+                txn.put("projects", project_id, project)
+            
+            # Only recorded once the save is committed, so history never holds unsaved text
+            try:
+                revision_store.record(project_id, content, revision_note)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not record script revision: {e}")
+    except StorageError:
+        return "❌ Error saving project."
     
-    data["projects"][project_id]["content"] = content
-    data["projects"][project_id]["notes"] = notes
-    data["projects"][project_id]["updated_at"] = datetime.now().isoformat()
+    # Update RAG index
+    try:
+        from rag_services import rag_service
+        from database_models import rag_item
+        rag_service.add_content(*rag_item("projects", project_id, project))
+    except Exception as e:
+        print(f"Warning: Could not update RAG index: {e}")
     
-    if save_projects(data):
-        # Update RAG index
-        try:
-            from rag_services import rag_service
-            project_name = data["projects"][project_id]["name"]
-            full_content = f"{project_name}\n\n{content}\n\nNotes: {notes}"
-            rag_service.add_content(full_content, "script", project_id, project_name)
-        except Exception as e:
-            print(f"Warning: Could not update RAG index: {e}")
-        
-        return "✅ Project saved successfully!"
-    else:
-        return "❌ Error saving project."
+    return "✅ Project saved successfully!"
+
+def list_script_revisions(project_id: str) -> List[Tuple[str, int]]:
+    """Revision choices for a project, newest first, as (label, revision number)."""
+    if not project_id:
+        return []
+    choices = []
+    for revision in revision_store.list_revisions(project_id):
+        saved = revision["created_at"][:16].replace("T", " ")
+        note = f" · {revision['note']}" if revision["note"] else ""
+        choices.append((f"#{revision['number']} · {saved} · {revision['words']} words{note}", revision["number"]))
+    return choices
+
+def diff_script_revision(project_id: str, revision: int, content: Optional[str] = None) -> str:
+    """Unified diff from a revision to `content` (the editor text), or to the latest revision."""
+    if not project_id or not revision:
+        return "❌ Select a project and a revision."
+    try:
+        old_text = revision_store.get(project_id, int(revision))
+        if old_text is None:
+            return "❌ Revision not found."
+        if content is None:
+            diff = revision_store.diff(project_id, int(revision))
+        else:
+            diff = text_diff(old_text, content, f"Revision {revision}", "Editor")
+        return diff or "No differences."
+    except (OSError, ValueError) as e:
+        return f"❌ Could not read revision history: {e}"
+
+def restore_script_revision(project_id: str, revision: int) -> Tuple[str, Optional[str]]:
+    """Save a revision's content again, as a new revision; returns status and the restored content."""
+    if not project_id or not revision:
+        return "❌ Select a project and a revision.", None
+    try:
+        content = revision_store.get(project_id, int(revision))
+    except (OSError, ValueError) as e:
+        return f"❌ Could not read revision history: {e}", None
+    if content is None:
+        return "❌ Revision not found.", None
+    
+    project = get_entity("projects", project_id) or {}
+    status = save_script_content(project_id, content, project.get("notes", ""),
+                                 revision_note=f"Restored revision {revision}")
+    if status.startswith("❌"):
+        return status, None
+    return f"✅ Restored revision {revision}.", content
 
 def update_word_count(content: str) -> str:
     """Update word count display."""
@@ -141,10 +191,9 @@ def create_story(title: str, description: str) -> Tuple[str, List[Tuple[str, str
     if not title.strip():
         return "❌ Story title cannot be empty.", []
     
-    data = load_projects()
     story_id = str(uuid.uuid4())
     
-    data["stories"][story_id] = {
+    story = {
         "title": title.strip(),
         "description": description.strip(),
         "content": "",
@@ -152,16 +201,16 @@ def create_story(title: str, description: str) -> Tuple[str, List[Tuple[str, str
         "updated_at": datetime.now().isoformat()
     }
     
-    if save_projects(data):
+    if document_store.put_entity("stories", story_id, story, label=f"Create story '{story['title']}'"):
         # Update RAG index
         try:
             from rag_services import rag_service
-            content = f"{title}\n\n{description}"
-            rag_service.add_content(content, "story", story_id, title)
+            from database_models import rag_item
+            rag_service.add_content(*rag_item("stories", story_id, story))
         except Exception as e:
             print(f"Warning: Could not update RAG index: {e}")
         
-        choices = [(story["title"], story_id) for story_id, story in data["stories"].items()]
+        choices = [(story["title"], story_id) for story_id, story in list_entities("stories").items()]
         return f"✅ Story '{title}' created successfully!", choices
     else:
         return "❌ Error saving story.", []
@@ -171,10 +220,9 @@ def create_character(name: str, description: str) -> Tuple[str, List[Tuple[str,
     if not name.strip():
         return "❌ Character name cannot be empty.", []
     
-    data = load_projects()
     char_id = str(uuid.uuid4())
     
-    data["characters"][char_id] = {
+    character = {
         "name": name.strip(),
         "description": description.strip(),
         "traits": [],
@@ -183,16 +231,16 @@ def create_character(name: str, description: str) -> Tuple[str, List[Tuple[str,
         "updated_at": datetime.now().isoformat()
     }
     
-    if save_projects(data):
+    if document_store.put_entity("characters", char_id, character, label=f"Create character '{character['name']}'"):
         # Update RAG index
         try:
             from rag_services import rag_service
-            content = f"{name}\n\n{description}"
-            rag_service.add_content(content, "character", char_id, name)
+            from database_models import rag_item
+            rag_service.add_content(*rag_item("characters", char_id, character))
         except Exception as e:
             print(f"Warning: Could not update RAG index: {e}")
         
-        choices = [(char["name"], char_id) for char_id, char in data["characters"].items()]
+        choices = [(char["name"], char_id) for char_id, char in list_entities("characters").items()]
         return f"✅ Character '{name}' created successfully!", choices
     else:
         return "❌ Error saving character.", []
@@ -202,10 +250,9 @@ def create_world_element(name: str, element_type: str, description: str) -> Tupl
     if not name.strip():
         return "❌ Element name cannot be empty.", []
     
-    data = load_projects()
     elem_id = str(uuid.uuid4())
     
-    data["world_elements"][elem_id] = {
+    element = {
         "name": name.strip(),
         "type": element_type,
         "description": description.strip(),
@@ -215,68 +262,74 @@ def create_world_element(name: str, element_type: str, description: str) -> Tupl
         "updated_at": datetime.now().isoformat()
     }
     
-    if save_projects(data):
+    if document_store.put_entity("world_elements", elem_id, element, label=f"Create world element '{element['name']}'"):
         # Update RAG index
         try:
             from rag_services import rag_service
-            content = f"{name} ({element_type})\n\n{description}"
-            rag_service.add_content(content, "world_element", elem_id, name)
+            from database_models import rag_item
+            rag_service.add_content(*rag_item("world_elements", elem_id, element))
         except Exception as e:
             print(f"Warning: Could not update RAG index: {e}")
         
-        choices = [(elem["name"], elem_id) for elem_id, elem in data["world_elements"].items()]
+        choices = [(elem["name"], elem_id) for elem_id, elem in list_entities("world_elements").items()]
         return f"✅ World element '{name}' created successfully!", choices
     else:
         return "❌ Error saving world element.", []
 
-def get_all_stories() -> List[Dict[str, Any]]:
-    """Get all stories."""
-    data = load_projects()
-    return list(data["stories"].values())
+def query_entities(collection: str, where: Optional[Dict[str, Any]] = None,
+                   sort_by: Optional[str] = None, descending: bool = False,
+                   offset: int = 0, limit: Optional[int] = None,
+                   fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Get one page of entity summaries matching `where` (field -> value) and the total count.
+    
+    Results keep creation order unless `sort_by` names a field; with `fields`, each result
+    is a plain dict holding just those fields.
+    """
+    entities = list_entities(collection)
+    end = None if limit is None else offset + limit
+    if not where and sort_by is None and not descending:
+        # Plain paging only touches the requested slice
+        page = list(islice(entities.values(), offset, end))
+        total = len(entities)
+    else:
+        summaries = [s for s in entities.values() if all(s.get(k) == v for k, v in (where or {}).items())]
+        total = len(summaries)
+        if sort_by is not None:
+            sort_key = lambda s: (s.get(sort_by) is None, s.get(sort_by) if s.get(sort_by) is not None else 0)
+            if end is None:
+                summaries = sorted(summaries, key=sort_key, reverse=descending)
+            else:
+                summaries = (heapq.nlargest if descending else heapq.nsmallest)(end, summaries, key=sort_key)
+        elif descending:
+            summaries.reverse()
+        page = summaries[offset:end]
+    
+    if fields is not None:
+        page = [{field: thaw(s.get(field)) for field in fields} for s in page]
+    return page, total
+
+def get_all_stories(offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Get summaries of all stories, or of one page of them."""
+    return query_entities("stories", offset=offset, limit=limit)[0]
 
-def get_all_characters() -> List[Dict[str, Any]]:
-    """Get all characters."""
-    data = load_projects()
-    return list(data["characters"].values())
+def get_all_characters(offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Get summaries of all characters, or of one page of them."""
+    return query_entities("characters", offset=offset, limit=limit)[0]
 
-def get_all_world_elements() -> List[Dict[str, Any]]:
-    """Get all world elements."""
-    data = load_projects()
-    return list(data["world_elements"].values())
+def get_all_world_elements(offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Get summaries of all world elements, or of one page of them."""
+    return query_entities("world_elements", offset=offset, limit=limit)[0]
 
 def search_content(query: str) -> Dict[str, List[Dict[str, Any]]]:
-    """Search across all content types."""
+    """Search across all content types for an exact (case-insensitive) substring.
+
+    Each list is ranked by BM25 relevance, then by creation time.
+    """
     if not query.strip():
         return {"stories": [], "characters": [], "world_elements": []}
     
-    data = load_projects()
-    query_lower = query.lower()
-    
-    results = {
-        "stories": [],
-        "characters": [],
-        "world_elements": []
+    ensure_projects_file()
+    return {
+        collection: search_entities(query, collection)
+        for collection in ("stories", "characters", "world_elements")
     }
-    
-    # Search stories
-    for story in data["stories"].values():
-        if (query_lower in story["title"].lower() or 
-            query_lower in story["description"].lower() or
-            query_lower in story.get("content", "").lower()):
-            results["stories"].append(story)
-    
-    # Search characters
-    for char in data["characters"].values():
-        if (query_lower in char["name"].lower() or 
-            query_lower in char["description"].lower() or
-            query_lower in char.get("notes", "").lower()):
-            results["characters"].append(char)
-    
-    # Search world elements
-    for elem in data["world_elements"].values():
-        if (query_lower in elem["name"].lower() or 
-            query_lower in elem["description"].lower() or
-            query_lower in elem.get("notes", "").lower()):
-            results["world_elements"].append(elem)
-    
-    return results
@@ -4,7 +4,7 @@
 import gradio as gr
 from image_generation_service import image_generator
 from context_helpers import get_story_context, get_character_context, get_world_context
-from models import load_projects
+from models import list_entities
 
 def create_mood_board_interface():
     """Create the mood board interface for Gradio."""
@@ -182,20 +182,18 @@ def save_mood_board(images, name):
 def populate_mood_board_dropdowns():
     """Populate the mood board dropdowns with story elements."""
     try:
-        data = load_projects()
-        
         # Get stories
-        stories = data.get("stories", {})
+        stories = list_entities("stories")
         story_choices = [(story.get("title", f"Story {story_id}"), story_id) 
                         for story_id, story in stories.items()]
         
         # Get characters
-        characters = data.get("characters", {})
+        characters = list_entities("characters")
         character_choices = [(char.get("name", f"Character {char_id}"), char_id) 
                            for char_id, char in characters.items()]
         
         # Get world elements
-        world_elements = data.get("world_elements", {})
+        world_elements = list_entities("world_elements")
         world_choices = [(elem.get("name", f"Element {elem_id}"), elem_id) 
                         for elem_id, elem in world_elements.items()]
         
@@ -0,0 +1,216 @@
+"""Bounded undo/redo log of workspace changes, kept as per-entity field deltas."""
+
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, NamedTuple, Optional, Tuple
+from config import UNDO_LOG_SIZE
+from blob_store import is_blob_ref
+from document_store import DocumentStore, ConflictError, document_store, thaw
+from storage_backends import EntityChange
+
+# Marks a field that did not exist on one side of a delta
+ABSENT = "$absent"
+
+# Bookkeeping fields that are not part of a delta; the store bumps versions itself
+IGNORED_FIELDS = ("version",)
+
+# Sessions whose undo history is kept; the least recently active one is dropped beyond this
+MAX_SESSIONS = 64
+
+# Session the current thread's commits are recorded under (None outside the UI, e.g. scripts)
+_current_session: ContextVar[Optional[str]] = ContextVar("operation_session", default=None)
+
+
+@contextmanager
+def operation_session(session_id: Optional[str]):
+    """Record commits made inside the block to, and undo/redo from, `session_id`'s history."""
+    token = _current_session.set(session_id)
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+
+
+class EntityDelta(NamedTuple):
+    """The fields of one entity before and after a change.
+
+    For an update, `before` and `after` hold only the fields that changed. When the
+    entity did not exist on one side, that side is None and the other side holds the
+    whole record. Long text fields stay blob references, so deltas remain small.
+    """
+    collection: str
+    entity_id: str
+    before: Optional[Dict[str, Any]]
+    after: Optional[Dict[str, Any]]
+
+
+class Operation(NamedTuple):
+    """One committed change set, e.g. a bulk update, with what is needed to revert it."""
+    label: str
+    deltas: Tuple[EntityDelta, ...]
+    created_at: str
+
+
+def entity_delta(collection: str, entity_id: str, previous: Optional[Dict[str, Any]],
+                 record: Optional[Dict[str, Any]]) -> Optional[EntityDelta]:
+    """Delta between two stored versions of an entity, or None if nothing changed."""
+    if previous is None and record is None:
+        return None
+    if previous is None or record is None:
+        full = thaw(previous if record is None else record, resolve=False)
+        for field in IGNORED_FIELDS:
+            full.pop(field, None)
+        return EntityDelta(collection, entity_id, full if record is None else None, full if previous is None else None)
+
+    fields = [
+        field for field in set(previous) | set(record)
+        if field not in IGNORED_FIELDS and previous.get(field, ABSENT) != record.get(field, ABSENT)
+    ]
+    if not fields:
+        return None
+    return EntityDelta(
+        collection, entity_id,
+        {field: thaw(previous.get(field, ABSENT), resolve=False) for field in fields},
+        {field: thaw(record.get(field, ABSENT), resolve=False) for field in fields},
+    )
+
+
+class OperationLog:
+    """Undo and redo stacks per session, fed by the document store's commit recorder.
+
+    Every labelled commit (and any unlabelled one, as "Edit") becomes an Operation of the
+    session that made it (see operation_session); a new operation clears that session's
+    redo stack, and only its last `max_operations` are kept. Undo and redo apply the
+    stored deltas in one transaction, touching only the entities the operation changed.
+    An entity edited again since the operation, by any session, is not overwritten; the
+    undo is refused with a ConflictError instead.
+    """
+
+    def __init__(self, store: DocumentStore = document_store, max_operations: int = UNDO_LOG_SIZE,
+                 max_sessions: int = MAX_SESSIONS):
+        self.store = store
+        self.max_operations = max_operations
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[Optional[str], Tuple[deque, deque]]" = OrderedDict()
+        self._replaying = False
+        store.add_recorder(self._record)
+        store.retain_blobs(self.blob_refs)
+
+    def _stacks(self) -> Tuple["deque[Operation]", "deque[Operation]"]:
+        """Undo and redo stacks of the current session, created on first use."""
+        session_id = _current_session.get()
+        stacks = self._sessions.get(session_id)
+        if stacks is None:
+            stacks = (deque(maxlen=self.max_operations), deque(maxlen=self.max_operations))
+            self._sessions[session_id] = stacks
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return stacks
+
+    def _record(self, label: Optional[str], changes: List[EntityChange],
+                previous: List[Optional[Dict[str, Any]]]):
+        if self._replaying:
+            return
+        deltas = tuple(
+            delta for delta in (
+                entity_delta(collection, entity_id, before, record)
+                for (collection, entity_id, record), before in zip(changes, previous)
+            ) if delta is not None
+        )
+        if deltas:
+            undo, redo = self._stacks()
+            undo.append(Operation(label or "Edit", deltas, datetime.now().isoformat()))
+            redo.clear()
+
+    def can_undo(self) -> bool:
+        with self.store.lock:
+            return bool(self._stacks()[0])
+
+    def can_redo(self) -> bool:
+        with self.store.lock:
+            return bool(self._stacks()[1])
+
+    def history(self) -> List[Tuple[str, str, int]]:
+        """(label, time, entities changed) for each of the session's undoable operations, newest first."""
+        with self.store.lock:
+            return [(op.label, op.created_at, len(op.deltas)) for op in reversed(self._stacks()[0])]
+
+    def undo(self) -> Optional[Operation]:
+        """Revert the session's last operation and return it, or None if there is nothing to undo."""
+        with self.store.lock:
+            undo, redo = self._stacks()
+            if not undo:
+                return None
+            operation = undo[-1]
+            self._replay(operation, undo=True)
+            undo.pop()
+            redo.append(operation)
+            return operation
+
+    def redo(self) -> Optional[Operation]:
+        """Re-apply the session's last undone operation and return it, or None if there is nothing to redo."""
+        with self.store.lock:
+            undo, redo = self._stacks()
+            if not redo:
+                return None
+            operation = redo[-1]
+            self._replay(operation, undo=False)
+            redo.pop()
+            undo.append(operation)
+            return operation
+
+    def _replay(self, operation: Operation, undo: bool):
+        """Move the operation's entities from one side of their deltas to the other."""
+        deltas = reversed(operation.deltas) if undo else operation.deltas
+        self._replaying = True
+        try:
+            with self.store.transaction() as txn:
+                for delta in deltas:
+                    expected, target = (delta.after, delta.before) if undo else (delta.before, delta.after)
+                    current = txn.get_stored(delta.collection, delta.entity_id)
+                    if not self._matches(current, expected, whole=delta.before is None or delta.after is None):
+                        raise ConflictError(
+                            f"{delta.collection} entity {delta.entity_id} changed after '{operation.label}'"
+                        )
+                    if target is None:
+                        txn.delete(delta.collection, delta.entity_id)
+                        continue
+                    if current is None or delta.before is None or delta.after is None:
+                        record = thaw(target, resolve=False)
+                    else:
+                        record = current
+                        for field, value in target.items():
+                            if value == ABSENT:
+                                record.pop(field, None)
+                            else:
+                                record[field] = thaw(value, resolve=False)
+                    if current is not None:
+                        record["version"] = current.get("version", 0)
+                    txn.put(delta.collection, delta.entity_id, record)
+        finally:
+            self._replaying = False
+
+    @staticmethod
+    def _matches(current: Optional[Dict[str, Any]], expected: Optional[Dict[str, Any]], whole: bool) -> bool:
+        """Whether an entity still looks the way the operation left it."""
+        if expected is None or current is None:
+            return expected is None and current is None
+        fields = set(expected) | (set(current) - set(IGNORED_FIELDS) if whole else set())
+        return all(current.get(field, ABSENT) == expected.get(field, ABSENT) for field in fields)
+
+    def blob_refs(self) -> Iterator[Dict[str, Any]]:
+        """Blob references held by logged deltas, so blob collection keeps them."""
+        for stack in (stack for stacks in list(self._sessions.values()) for stack in stacks):
+            for operation in list(stack):
+                for delta in operation.deltas:
+                    for side in (delta.before, delta.after):
+                        for value in (side or {}).values():
+                            if is_blob_ref(value):
+                                yield value
+
+
+# Global operation log instance
+operation_log = OperationLog()
@@ -0,0 +1,257 @@
+"""Script revision history: periodic full snapshots with compressed line deltas in between."""
+
+import difflib
+import json
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from config import REVISIONS_DIR, REVISION_SNAPSHOT_INTERVAL
+
+# fcntl is POSIX-only; elsewhere appends are only serialized within this process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Entry header: lengths of the JSON metadata and of the compressed payload that follow it
+HEADER = struct.Struct("<II")
+
+# Latest revisions kept in memory as delta bases, by project
+TIP_CACHE_SIZE = 16
+
+
+def line_delta(base: str, text: str) -> List[Any]:
+    """Line-level delta turning `base` into `text`.
+
+    Each op is either [start, end], copying base lines start:end, or a list of new lines.
+    """
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+
+    # Edits are usually local: only the middle between the common head and tail is matched
+    head = 0
+    limit = min(len(base_lines), len(lines))
+    while head < limit and base_lines[head] == lines[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and base_lines[-1 - tail] == lines[-1 - tail]:
+        tail += 1
+
+    ops: List[Any] = [[0, head]] if head else []
+    matcher = difflib.SequenceMatcher(None, base_lines[head:len(base_lines) - tail], lines[head:len(lines) - tail],
+                                      autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([head + i1, head + i2])
+        elif j2 > j1:
+            ops.append([lines[head + j1:head + j2]])
+    if tail:
+        ops.append([len(base_lines) - tail, len(base_lines)])
+    return ops
+
+
+def apply_delta(base: str, ops: List[Any]) -> str:
+    """Rebuild a text from its base and a line_delta."""
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if len(op) == 2:
+            parts.extend(base_lines[op[0]:op[1]])
+        else:
+            parts.extend(op[0])
+    return "".join(parts)
+
+
+def text_diff(old_text: str, new_text: str, old_label: str, new_label: str, context: int = 3) -> str:
+    """Unified line diff between two texts."""
+    return "".join(difflib.unified_diff(
+        old_text.splitlines(keepends=True), new_text.splitlines(keepends=True), old_label, new_label, n=context
+    ))
+
+
+class RevisionStore:
+    """Append-only revision log per project under `root`.
+
+    Every REVISION_SNAPSHOT_INTERVAL-th revision is a full snapshot; the ones in between
+    are zlib-compressed line deltas against the previous revision. Saving appends one
+    entry and diffs against the cached latest text, so it costs the same however long the
+    history is; reading a revision decodes at most one snapshot and the deltas after it.
+    Only the entry headers are scanned to list revisions.
+    """
+
+    def __init__(self, root: str = REVISIONS_DIR, snapshot_interval: int = REVISION_SNAPSHOT_INTERVAL):
+        self.root = root
+        self.snapshot_interval = max(snapshot_interval, 1)
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._ends: Dict[str, int] = {}
+        self._tips: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _path(self, project_id: str) -> str:
+        return os.path.join(self.root, f"{project_id}.rev")
+
+    def _scan(self, project_id: str) -> List[Dict[str, Any]]:
+        """Load entry metadata, picking up entries appended since the last scan (e.g. by another process)."""
+        entries = self._entries.setdefault(project_id, [])
+        offset = self._ends.get(project_id, 0)
+        path = self._path(project_id)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size == offset:
+            return entries
+
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            while True:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                meta_length, payload_length = HEADER.unpack(header)
+                meta_bytes = f.read(meta_length)
+                if len(meta_bytes) < meta_length or f.seek(payload_length, os.SEEK_CUR) > size:
+                    break
+                try:
+                    meta = json.loads(meta_bytes.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break
+                meta["start"] = offset
+                meta["offset"] = offset + HEADER.size + meta_length
+                meta["payload_length"] = payload_length
+                entries.append(meta)
+                offset = meta["offset"] + payload_length
+        if offset != size:
+            print(f"Warning: Ignoring incomplete revision entry in {path}")
+        self._ends[project_id] = offset
+        return entries
+
+    def _payload(self, project_id: str, meta: Dict[str, Any]) -> Any:
+        with open(self._path(project_id), 'rb') as f:
+            f.seek(meta["offset"])
+            payload = f.read(meta["payload_length"])
+        if zlib.crc32(payload) != meta["crc"]:
+            raise ValueError(f"revision {meta['number']} of project {project_id} is corrupt")
+        return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+    def _text(self, project_id: str, entries: List[Dict[str, Any]], number: int) -> str:
+        """Rebuild a revision from the nearest snapshot at or before it."""
+        tip = self._tips.get(project_id)
+        if tip is not None and tip[0] == number:
+            return tip[1]
+        start = number - 1
+        while entries[start]["kind"] != "snapshot":
+            start -= 1
+        text = self._payload(project_id, entries[start])
+        for meta in entries[start + 1:number]:
+            text = apply_delta(text, self._payload(project_id, meta))
+        return text
+
+    def _drop_torn_tail(self, project_id: str, entries: List[Dict[str, Any]], f):
+        """Truncate what follows the last intact entry: bytes that don't parse as an entry,
+        or a last entry failing its CRC check, as left by a crash mid-append.
+
+        Called with the file lock held, so no other writer can be midway through an append.
+        """
+        if entries:
+            meta = entries[-1]
+            f.seek(meta["offset"])
+            if zlib.crc32(f.read(meta["payload_length"])) != meta["crc"]:
+                entries.pop()
+                self._ends[project_id] = meta["start"]
+                tip = self._tips.get(project_id)
+                if tip is not None and tip[0] == meta["number"]:
+                    del self._tips[project_id]
+        end = self._ends.get(project_id, 0)
+        if f.seek(0, os.SEEK_END) != end:
+            print(f"Warning: Dropping incomplete revision entry in {self._path(project_id)}")
+            f.truncate(end)
+
+    def record(self, project_id: str, content: str, note: str = "") -> Optional[int]:
+        """Append `content` as the project's next revision; returns its number, or None if unchanged.
+
+        The file is locked from the scan to the append, so revisions appended by other
+        processes in the meantime are picked up rather than overwritten.
+        """
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._path(project_id), 'a+b') as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                entries = self._scan(project_id)
+                self._drop_torn_tail(project_id, entries, f)
+                return self._append(project_id, entries, content, note, f)
+
+    def _append(self, project_id: str, entries: List[Dict[str, Any]], content: str, note: str, f) -> Optional[int]:
+        """Write the next revision at the end of the (locked) file."""
+        number = len(entries) + 1
+        previous = self._text(project_id, entries, number - 1) if entries else ""
+        if content == previous:
+            return None
+
+        last_snapshot = max((meta["number"] for meta in entries[-self.snapshot_interval:]
+                             if meta["kind"] == "snapshot"), default=0)
+        kind = "snapshot" if not entries or number - last_snapshot >= self.snapshot_interval else "delta"
+        body = content if kind == "snapshot" else line_delta(previous, content)
+        payload = zlib.compress(json.dumps(body, ensure_ascii=False).encode('utf-8'))
+        meta = {
+            "number": number,
+            "kind": kind,
+            "created_at": datetime.now().isoformat(),
+            "words": len(content.split()),
+            "chars": len(content),
+            "note": note,
+            "crc": zlib.crc32(payload),
+        }
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+
+        f.write(HEADER.pack(len(meta_bytes), len(payload)) + meta_bytes + payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+        meta["start"] = self._ends.get(project_id, 0)
+        meta["offset"] = meta["start"] + HEADER.size + len(meta_bytes)
+        meta["payload_length"] = len(payload)
+        entries.append(meta)
+        self._ends[project_id] = meta["offset"] + len(payload)
+        self._tips[project_id] = (number, content)
+        self._tips.move_to_end(project_id)
+        while len(self._tips) > TIP_CACHE_SIZE:
+            self._tips.popitem(last=False)
+        return number
+
+    def list_revisions(self, project_id: str) -> List[Dict[str, Any]]:
+        """Revision number, time, word count, note and stored size, newest first."""
+        with self._lock:
+            return [
+                dict({key: meta[key] for key in ("number", "created_at", "words", "chars", "note", "kind")},
+                     stored_bytes=meta["payload_length"])
+                for meta in reversed(self._scan(project_id))
+            ]
+
+    def get(self, project_id: str, number: int) -> Optional[str]:
+        """Text of a revision, or None if it does not exist."""
+        with self._lock:
+            entries = self._scan(project_id)
+            if not 1 <= number <= len(entries):
+                return None
+            return self._text(project_id, entries, number)
+
+    def latest_number(self, project_id: str) -> int:
+        """Number of the latest revision (0 if the project has none)."""
+        with self._lock:
+            return len(self._scan(project_id))
+
+    def diff(self, project_id: str, old: int, new: Optional[int] = None, context: int = 3) -> Optional[str]:
+        """Unified diff between two revisions (`new` defaults to the latest)."""
+        with self._lock:
+            new = new or self.latest_number(project_id)
+            old_text, new_text = self.get(project_id, old), self.get(project_id, new)
+            if old_text is None or new_text is None:
+                return None
+            return text_diff(old_text, new_text, f"Revision {old}", f"Revision {new}", context)
+
+
+# Global revision store instance
+revision_store = RevisionStore()
@@ -0,0 +1,221 @@
+"""Story -> act -> block -> chapter -> scene tree over chapters and scenes."""
+
+from bisect import bisect_left, insort
+from typing import Dict, Any, List, Optional, Set, Tuple
+from config import SCENE_INDEX_FILE
+from entity_index import EntityIndex
+from chapter_index import chapter_rank, _as_int
+
+
+def _name_key(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class SceneTree(EntityIndex):
+    """Parent-indexed tree held as adjacency lists, plus scenes by character and location.
+
+    Every node keeps its children in display order: a story its act numbers, an act its
+    block numbers, a block its chapters and a chapter its scenes (both by rank). Scenes
+    point at their chapter only, so moving a chapter re-links one node and its scenes
+    follow without being rewritten. A subtree query walks just that subtree, or, when a
+    character or location filter is more selective, checks the few matching scenes'
+    ancestors instead.
+    """
+
+    collections = ("chapters", "scenes")
+
+    def __init__(self, path: Optional[str] = SCENE_INDEX_FILE, **kwargs):
+        super().__init__(path=path, **kwargs)
+
+    def _reset(self):
+        # Adjacency lists: story id -> act numbers -> block numbers -> (rank, chapter id) -> (rank, scene id)
+        self._acts: Dict[str, List[int]] = {}
+        self._blocks: Dict[Tuple[str, int], List[int]] = {}
+        self._chapters: Dict[Tuple[str, int, int], List[Tuple[str, str]]] = {}
+        self._scenes: Dict[str, List[Tuple[str, str]]] = {}
+        # Parent links
+        self._chapter_parent: Dict[str, Tuple[Tuple[str, int, int], str]] = {}
+        self._scene_parent: Dict[str, Tuple[str, str]] = {}
+        # Attribute postings over scenes
+        self._by_character: Dict[str, Set[str]] = {}
+        self._by_location: Dict[str, Set[str]] = {}
+        self._scene_names: Dict[str, Tuple[Tuple[str, ...], str]] = {}
+
+    # Maintenance
+
+    def _add(self, collection: str, entity_id: str, record: Dict[str, Any]):
+        if collection == "chapters":
+            block = (record.get("story_id") or "", _as_int(record.get("act_number")), _as_int(record.get("block_number")))
+            rank = chapter_rank(record)
+            if block not in self._chapters:
+                self._link(block)
+            insort(self._chapters[block], (rank, entity_id))
+            self._chapter_parent[entity_id] = (block, rank)
+            return
+
+        chapter_id = record.get("chapter_id") or ""
+        rank = record.get("rank") or ""
+        insort(self._scenes.setdefault(chapter_id, []), (rank, entity_id))
+        self._scene_parent[entity_id] = (chapter_id, rank)
+        characters = tuple(sorted({_name_key(name) for name in record.get("characters") or [] if str(name).strip()}))
+        location = _name_key(record.get("location") or "")
+        for name in characters:
+            self._by_character.setdefault(name, set()).add(entity_id)
+        if location:
+            self._by_location.setdefault(location, set()).add(entity_id)
+        self._scene_names[entity_id] = (characters, location)
+
+    def _remove(self, collection: str, entity_id: str):
+        if collection == "chapters":
+            parent = self._chapter_parent.pop(entity_id, None)
+            if parent is not None:
+                block, rank = parent
+                self._discard(self._chapters, block, (rank, entity_id))
+                if block not in self._chapters:
+                    self._unlink(block)
+            return
+
+        parent = self._scene_parent.pop(entity_id, None)
+        if parent is None:
+            return
+        chapter_id, rank = parent
+        self._discard(self._scenes, chapter_id, (rank, entity_id))
+        characters, location = self._scene_names.pop(entity_id)
+        for name in characters:
+            self._discard_posting(self._by_character, name, entity_id)
+        if location:
+            self._discard_posting(self._by_location, location, entity_id)
+
+    def _link(self, block: Tuple[str, int, int]):
+        """Create an empty block node, and its act and story nodes if needed."""
+        story_id, act_number, block_number = block
+        self._chapters[block] = []
+        if (story_id, act_number) not in self._blocks:
+            self._blocks[(story_id, act_number)] = []
+            insort(self._acts.setdefault(story_id, []), act_number)
+        insort(self._blocks[(story_id, act_number)], block_number)
+
+    def _unlink(self, block: Tuple[str, int, int]):
+        """Drop an emptied block node, and its act and story nodes if they emptied too."""
+        story_id, act_number, block_number = block
+        self._discard(self._blocks, (story_id, act_number), block_number)
+        if (story_id, act_number) not in self._blocks:
+            self._discard(self._acts, story_id, act_number)
+
+    @staticmethod
+    def _discard(children: Dict[Any, list], node: Any, child: Any):
+        """Remove a child from a sorted adjacency list, dropping the list once empty."""
+        items = children.get(node)
+        if not items:
+            return
+        position = bisect_left(items, child)
+        if position < len(items) and items[position] == child:
+            del items[position]
+        if not items:
+            del children[node]
+
+    @staticmethod
+    def _discard_posting(postings: Dict[str, Set[str]], key: str, scene_id: str):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(scene_id)
+            if not ids:
+                del postings[key]
+
+    def _get_state(self):
+        return (self._acts, self._blocks, self._chapters, self._scenes, self._chapter_parent,
+                self._scene_parent, self._by_character, self._by_location, self._scene_names)
+
+    def _set_state(self, state):
+        (self._acts, self._blocks, self._chapters, self._scenes, self._chapter_parent,
+         self._scene_parent, self._by_character, self._by_location, self._scene_names) = state
+
+    # Queries
+
+    def _chapters_in(self, story_id: str, act_number: Optional[int], block_number: Optional[int]) -> List[str]:
+        """Chapter ids under a story, act or block node, in display order."""
+        acts = [_as_int(act_number)] if act_number is not None else self._acts.get(story_id, [])
+        chapter_ids = []
+        for act in acts:
+            blocks = [_as_int(block_number)] if block_number is not None else self._blocks.get((story_id, act), [])
+            for block in blocks:
+                chapter_ids.extend(chapter_id for _, chapter_id in self._chapters.get((story_id, act, block), ()))
+        return chapter_ids
+
+    def _order_key(self, scene_id: str) -> Optional[tuple]:
+        """Display-order key of a scene, found by following its parent links."""
+        chapter_id, scene_rank = self._scene_parent[scene_id]
+        parent = self._chapter_parent.get(chapter_id)
+        if parent is None:
+            return None
+        block, rank = parent
+        return block + (rank, chapter_id, scene_rank, scene_id)
+
+    def scene_ids(self, story_id: Optional[str] = None, act_number: Optional[int] = None,
+                  block_number: Optional[int] = None, chapter_id: Optional[str] = None,
+                  character: Optional[str] = None, location: Optional[str] = None) -> List[str]:
+        """Ids of the scenes in a subtree (a chapter, or a story/act/block) in display order,
+        optionally only those featuring a character and/or set at a location (ignoring case).
+        """
+        with self._lock:
+            self.sync()
+            postings = []
+            if character:
+                postings.append(self._by_character.get(_name_key(character), set()))
+            if location:
+                postings.append(self._by_location.get(_name_key(location), set()))
+            matching = set.intersection(*postings) if postings else None
+
+            if chapter_id is not None:
+                scenes = [scene_id for _, scene_id in self._scenes.get(chapter_id, ())]
+                return scenes if matching is None else [s for s in scenes if s in matching]
+
+            if story_id is None or (matching is not None and len(matching) < len(self._scene_parent) // 8):
+                # No story to walk, or few scenes match the filters: check where each candidate
+                # sits instead of walking the subtree
+                keys = []
+                for scene_id in (matching if matching is not None else self._scene_parent):
+                    key = self._order_key(scene_id)
+                    if key is None or (story_id is not None and key[0] != story_id):
+                        continue
+                    if act_number is not None and key[1] != _as_int(act_number):
+                        continue
+                    if block_number is not None and key[2] != _as_int(block_number):
+                        continue
+                    keys.append(key)
+                return [key[-1] for key in sorted(keys)]
+
+            scenes = []
+            for chapter in self._chapters_in(story_id, act_number, block_number):
+                scenes.extend(
+                    scene_id for _, scene_id in self._scenes.get(chapter, ())
+                    if matching is None or scene_id in matching
+                )
+            return scenes
+
+    def scene_count(self, chapter_id: str) -> int:
+        """Number of scenes in a chapter."""
+        with self._lock:
+            self.sync()
+            return len(self._scenes.get(chapter_id, ()))
+
+    def last_rank(self, chapter_id: str) -> Optional[str]:
+        """Rank of the last scene in a chapter, or None if it has no scenes."""
+        with self._lock:
+            self.sync()
+            scenes = self._scenes.get(chapter_id)
+            return scenes[-1][0] if scenes else None
+
+    def display_number(self, scene_id: str) -> Optional[int]:
+        """1-based position of a scene within its chapter."""
+        with self._lock:
+            self.sync()
+            parent = self._scene_parent.get(scene_id)
+            if parent is None:
+                return None
+            chapter_id, rank = parent
+            return bisect_left(self._scenes[chapter_id], (rank, scene_id)) + 1
+
+
+# Global scene tree instance
+scene_tree = SceneTree()
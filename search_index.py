@@ -0,0 +1,139 @@
+"""Inverted full-text index with BM25 ranking over workspace entities."""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+from config import SEARCH_INDEX_FILE, RRF_K
+from entity_index import EntityIndex
+
+# Text fields indexed for each searchable collection
+SEARCH_FIELDS = {
+    "projects": ("name", "content", "notes"),
+    "stories": ("title", "description", "content"),
+    "characters": ("name", "description", "notes"),
+    "world_elements": ("name", "description", "notes"),
+    "chapters": ("title", "outline", "notes", "location"),
+}
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def searchable_text(collection: str, record: Dict[str, Any]) -> str:
+    """Join the indexed fields of a record into one string."""
+    return "\n".join(
+        value for value in (record.get(field) for field in SEARCH_FIELDS.get(collection, ()))
+        if isinstance(value, str)
+    )
+
+
+class FullTextIndex(EntityIndex):
+    """Per-collection postings (term -> entity id -> term frequency) scored with Okapi BM25."""
+
+    collections = tuple(SEARCH_FIELDS)
+
+    def __init__(self, path: Optional[str] = SEARCH_INDEX_FILE, k1: float = 1.2, b: float = 0.75, **kwargs):
+        self.k1 = k1
+        self.b = b
+        super().__init__(path=path, **kwargs)
+
+    def _reset(self):
+        self._postings: Dict[str, Dict[str, Dict[str, int]]] = {c: {} for c in self.collections}
+        self._lengths: Dict[str, Dict[str, int]] = {c: {} for c in self.collections}
+        self._total_length: Dict[str, int] = {c: 0 for c in self.collections}
+        self._doc_terms: Dict[str, Dict[str, Tuple[str, ...]]] = {c: {} for c in self.collections}
+
+    def _add(self, collection: str, entity_id: str, record: Dict[str, Any]):
+        tokens = tokenize(searchable_text(collection, record))
+        counts = Counter(tokens)
+        postings = self._postings[collection]
+        for term, frequency in counts.items():
+            postings.setdefault(term, {})[entity_id] = frequency
+        self._doc_terms[collection][entity_id] = tuple(counts)
+        self._lengths[collection][entity_id] = len(tokens)
+        self._total_length[collection] += len(tokens)
+
+    def _remove(self, collection: str, entity_id: str):
+        postings = self._postings[collection]
+        for term in self._doc_terms[collection].pop(entity_id, ()):
+            documents = postings.get(term)
+            if documents is not None:
+                documents.pop(entity_id, None)
+                if not documents:
+                    del postings[term]
+        self._total_length[collection] -= self._lengths[collection].pop(entity_id, 0)
+
+    def _get_state(self):
+        return self._postings, self._lengths, self._total_length, self._doc_terms
+
+    def _set_state(self, state):
+        self._postings, self._lengths, self._total_length, self._doc_terms = state
+
+    def scores(self, query: str, collection: str) -> Dict[str, float]:
+        """Return the BM25 score of every entity in a collection that matches a query term."""
+        if collection not in SEARCH_FIELDS:
+            return {}
+        terms = set(tokenize(query))
+        if not terms:
+            return {}
+
+        with self._lock:
+            self.sync()
+            postings = self._postings[collection]
+            lengths = self._lengths[collection]
+            document_count = len(lengths)
+            if not document_count:
+                return {}
+            average_length = self._total_length[collection] / document_count or 1.0
+
+            scores: Dict[str, float] = {}
+            # k1 * (1 - b + b * length / average_length), split into a constant and a per-length part
+            norm_base = self.k1 * (1 - self.b)
+            norm_scale = self.k1 * self.b / average_length
+            for term in terms:
+                documents = postings.get(term)
+                if not documents:
+                    continue
+                idf = math.log(1 + (document_count - len(documents) + 0.5) / (len(documents) + 0.5))
+                weight = idf * (self.k1 + 1)
+                get = scores.get
+                for entity_id, frequency in documents.items():
+                    scores[entity_id] = get(entity_id, 0.0) + weight * frequency / (frequency + norm_base + norm_scale * lengths[entity_id])
+        return scores
+
+    def search(self, query: str, collection: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return (entity id, BM25 score) pairs for a collection, best match first."""
+        scores = self.scores(query, collection)
+        if limit is None:
+            return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K,
+                           limit: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Merge ranked id lists into (id, score) pairs, best first.
+
+    Each list contributes 1 / (k + rank) for every id it contains (ranks start at 1), so
+    ids ranked high by several lists rise to the top. Repeated ids within one list only
+    count at their best rank.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        seen = set()
+        for rank, entity_id in enumerate(ranking, 1):
+            if entity_id in seen:
+                continue
+            seen.add(entity_id)
+            scores[entity_id] = scores.get(entity_id, 0.0) + 1.0 / (k + rank)
+    if limit is None:
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+# Global full-text index instance
+search_index = FullTextIndex()
@@ -0,0 +1,721 @@
+"""Pluggable persistence backends for the ScriptVoice workspace."""
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Optional, NamedTuple, Tuple
+from config import (
+    PROJECTS_FILE, SQLITE_DB_FILE, STORAGE_BACKEND,
+    JOURNAL_FILE, JOURNAL_COMPACT_BYTES, SAVE_DEBOUNCE_MS, WORKSPACE_DIR
+)
+
+# fcntl is POSIX-only; elsewhere locking falls back to in-process only
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+REQUIRED_COLLECTIONS = ["projects", "stories", "characters", "world_elements"]
+
+# Large text fields left out of entity summaries used by listing views
+SUMMARY_EXCLUDED_FIELDS = {"content", "notes"}
+
+
+def default_document() -> Dict[str, Any]:
+    """Return an empty workspace document."""
+    return {key: {} for key in REQUIRED_COLLECTIONS}
+
+
+def summarize(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the lightweight fields of an entity record."""
+    return {key: value for key, value in record.items() if key not in SUMMARY_EXCLUDED_FIELDS}
+
+
+def normalize_document(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Ensure all required collections exist on a loaded document."""
+    for key in REQUIRED_COLLECTIONS:
+        if key not in data:
+            data[key] = {}
+    return data
+
+
+class EntityChange(NamedTuple):
+    """A single entity write; a record of None means the entity was deleted."""
+    collection: str
+    entity_id: str
+    record: Optional[Dict[str, Any]]
+
+
+def file_fingerprint(path: str) -> Any:
+    """Return (mtime_ns, size) for a file, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def atomic_write_json(path: str, document: Dict[str, Any]):
+    """Write JSON to a temp file, fsync it and rename it over `path`."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def apply_changes(document: Dict[str, Any], changes: List["EntityChange"]):
+    """Apply entity changes to a plain document in place."""
+    for collection, entity_id, record in changes:
+        entities = document.setdefault(collection, {})
+        if record is None:
+            entities.pop(entity_id, None)
+        else:
+            entities[entity_id] = record
+
+
+class InterProcessLock:
+    """Reentrant advisory file lock shared by every process using the workspace.
+
+    Setting `retained` while holding the lock keeps the file lock after the outermost
+    exit, so other processes stay out until the holder clears it (see JSONFileBackend).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.retained = False
+        self._guard = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._guard.acquire()
+        try:
+            if self._depth == 0 and self._file is None and fcntl is not None:
+                self._file = open(self.path, 'a')
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        except Exception:
+            self._guard.release()
+            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None and not self.retained:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._guard.release()
+        return False
+
+
+class StorageBackend(ABC):
+    """Base class for workspace persistence backends."""
+
+    name = "base"
+    # Backends that can serve single entities and summaries without a full load
+    supports_partial_load = False
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """Return True if the backend already holds a workspace."""
+
+    @abstractmethod
+    def fingerprint(self) -> Any:
+        """Return a cheap token that changes whenever the stored data changes."""
+
+    @abstractmethod
+    def load(self) -> Dict[str, Any]:
+        """Load the full workspace document."""
+
+    @abstractmethod
+    def commit(self, changes: List[EntityChange], document: Dict[str, Any]) -> bool:
+        """Persist entity changes; `document` is the full document after they were applied
+        (None for partial-load backends when nothing has loaded it)."""
+
+    def load_manifest(self) -> Dict[str, Any]:
+        """Load collection -> id -> summary without reading heavy fields."""
+        return {
+            collection: {entity_id: summarize(record) for entity_id, record in entities.items()}
+            for collection, entities in self.load().items()
+        }
+
+    def load_entity(self, collection: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Load a single entity record."""
+        return self.load().get(collection, {}).get(entity_id)
+
+    def flush(self) -> bool:
+        """Block until every accepted commit is durable; backends that write synchronously need not override."""
+        return True
+
+    def use_process_lock(self, lock: InterProcessLock):
+        """Called with the workspace lock commits run under; backends that write after
+        commit() returns must keep other processes out until they have written."""
+
+
+class JSONFileBackend(StorageBackend):
+    """Stores the whole workspace in a single JSON file, coalescing bursts of saves into one write.
+
+    While a coalesced write is pending the workspace lock stays held, so another process
+    cannot read the outdated file and commit over it; it waits until the write lands.
+    A failed write stays pending and is retried every RETRY_SECONDS.
+    """
+
+    name = "json"
+    RETRY_SECONDS = 1.0
+
+    def __init__(self, path: str = PROJECTS_FILE, debounce_seconds: float = SAVE_DEBOUNCE_MS / 1000):
+        self.path = path
+        self.debounce_seconds = debounce_seconds
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._timer: Optional[threading.Timer] = None
+        self._version = 0
+        self._written: Any = None
+        self._process_lock: Optional[InterProcessLock] = None
+
+    def use_process_lock(self, lock: InterProcessLock):
+        self._process_lock = lock
+
+    def exists(self) -> bool:
+        return self._pending is not None or os.path.exists(self.path)
+
+    def fingerprint(self) -> Any:
+        with self._lock:
+            current = file_fingerprint(self.path)
+            # Our own (possibly still pending) writes must not look like external edits
+            if self._pending is not None or (current is not None and current == self._written):
+                return ("local", self._version)
+            return current
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._pending is not None:
+                return self._pending
+        if not os.path.exists(self.path):
+            return default_document()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"Error loading projects file: {e}")
+            return default_document()
+        return normalize_document(data)
+
+    def commit(self, changes: List[EntityChange], document: Dict[str, Any]) -> bool:
+        with self._lock:
+            self._pending = document
+            self._version += 1
+            if self.debounce_seconds <= 0:
+                if not self.flush():
+                    # Rejected: the caller reloads the last written document
+                    self._pending = None
+                    return False
+                return True
+            if self._process_lock is not None:
+                # Called under the workspace lock; keep it until the write lands
+                self._process_lock.retained = True
+            self._schedule(self.debounce_seconds)
+        return True
+
+    def _schedule(self, delay: float):
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _release_process_lock(self):
+        """Let other processes in once nothing is left pending."""
+        if self._process_lock is None:
+            return
+        with self._process_lock:
+            with self._lock:
+                if self._pending is None:
+                    self._process_lock.retained = False
+
+    def flush(self) -> bool:
+        """Write any pending document now; returns once it is durable on disk."""
+        with self._write_lock:
+            with self._lock:
+                document = self._pending
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if document is None:
+                return True
+
+            try:
+                atomic_write_json(self.path, document)
+            except Exception as e:
+                print(f"Error saving projects: {e}")
+                if self.debounce_seconds > 0:
+                    self._schedule(self.RETRY_SECONDS)
+                return False
+
+            with self._lock:
+                self._written = file_fingerprint(self.path)
+                # A newer commit may have arrived while we were writing; leave it pending
+                if self._pending is document:
+                    self._pending = None
+        # Outside the write lock: a thread holding the workspace lock may be waiting on it
+        self._release_process_lock()
+        return True
+
+
+class JournaledJSONBackend(StorageBackend):
+    """Appends each commit to a JSON-lines journal and periodically folds it into the snapshot."""
+
+    name = "journal"
+
+    def __init__(self, path: str = PROJECTS_FILE, journal_path: str = JOURNAL_FILE,
+                 compact_bytes: int = JOURNAL_COMPACT_BYTES):
+        self.path = path
+        self.journal_path = journal_path
+        self.rotated_path = f"{journal_path}.old"
+        self.compact_bytes = compact_bytes
+        self._lock = threading.RLock()
+        self._latest: Optional[Dict[str, Any]] = None
+        self._compact_requested = threading.Event()
+        self._compactor = threading.Thread(target=self._compaction_loop, name="journal-compactor", daemon=True)
+        self._compactor.start()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or os.path.exists(self.journal_path)
+
+    def fingerprint(self) -> Any:
+        with self._lock:
+            return (
+                file_fingerprint(self.path),
+                file_fingerprint(self.rotated_path),
+                file_fingerprint(self.journal_path)
+            )
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            data = JSONFileBackend(self.path, debounce_seconds=0).load()
+            for journal in (self.rotated_path, self.journal_path):
+                self._replay(journal, data)
+            self._latest = data
+            return data
+
+    def _replay(self, journal_path: str, data: Dict[str, Any]):
+        """Apply every complete record in a journal file to `data`."""
+        if not os.path.exists(journal_path):
+            return
+        good_offset = 0
+        with open(journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    # A torn trailing record from a crash mid-append; everything before it is intact
+                    print(f"Warning: Dropping incomplete journal record in {journal_path}")
+                    break
+                apply_changes(data, [EntityChange(*change) for change in entry["changes"]])
+                good_offset += len(line)
+            else:
+                return
+        with open(journal_path, 'r+b') as f:
+            f.truncate(good_offset)
+
+    def commit(self, changes: List[EntityChange], document: Dict[str, Any]) -> bool:
+        try:
+            with self._lock:
+                self._latest = document
+                if not os.path.exists(self.path):
+                    atomic_write_json(self.path, document)
+                    return True
+                if not changes:
+                    return True
+
+                entry = {"changes": [list(change) for change in changes]}
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                    journal_size = f.tell()
+
+            if journal_size >= self.compact_bytes:
+                self._compact_requested.set()
+            return True
+        except Exception as e:
+            print(f"Error writing projects journal: {e}")
+            return False
+
+    def _compaction_loop(self):
+        """Background worker that compacts the journal whenever a commit asks for it."""
+        while True:
+            self._compact_requested.wait()
+            self._compact_requested.clear()
+            self.compact()
+
+    def compact(self) -> bool:
+        """Fold the journal into a fresh snapshot without blocking writers while it serializes."""
+        with self._lock:
+            if self._latest is None:
+                return False
+            if not os.path.exists(self.rotated_path):
+                if not os.path.exists(self.journal_path):
+                    return True
+                # New commits go to a fresh journal while the captured document is written out
+                os.replace(self.journal_path, self.rotated_path)
+            document = self._latest
+
+        try:
+            atomic_write_json(self.path, document)
+            os.remove(self.rotated_path)
+            print("Compacted projects journal into snapshot")
+            return True
+        except Exception as e:
+            # The rotated journal is still replayed on load, so nothing is lost
+            print(f"Error compacting projects journal: {e}")
+            return False
+
+
+class ShardedBackend(StorageBackend):
+    """Stores one JSON file per entity plus a manifest of entity summaries per collection.
+
+    Layout: `<root>/<collection>/<id>.json` and `<root>/manifests/<collection>.json`.
+    Saving one entity writes that entity's file and its collection's manifest only.
+    """
+
+    name = "sharded"
+    supports_partial_load = True
+
+    def __init__(self, root: str = WORKSPACE_DIR, import_from: Optional[str] = PROJECTS_FILE):
+        self.root = root
+        self.manifest_dir = os.path.join(root, "manifests")
+        self._lock = threading.RLock()
+        self._manifests: Dict[str, Tuple[Any, Dict[str, Any]]] = {}
+
+        legacy_manifest = os.path.join(root, "manifest.json")
+        if not self.exists() and os.path.exists(legacy_manifest):
+            self._split_manifest(legacy_manifest)
+        if not self.exists() and import_from and os.path.exists(import_from):
+            import_json_file(import_from, self)
+
+    def _split_manifest(self, path: str):
+        """Convert a single workspace manifest.json into per-collection manifests."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading workspace manifest: {e}")
+            return
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        for collection, entities in manifest.items():
+            atomic_write_json(self._manifest_path(collection), entities)
+        os.remove(path)
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.manifest_dir)
+
+    def _manifest_fingerprints(self) -> Dict[str, Any]:
+        """Return collection -> fingerprint of its manifest file."""
+        try:
+            names = os.listdir(self.manifest_dir)
+        except OSError:
+            return {}
+        return {
+            name[:-len(".json")]: file_fingerprint(os.path.join(self.manifest_dir, name))
+            for name in names if name.endswith(".json")
+        }
+
+    def fingerprint(self) -> Any:
+        return tuple(sorted(self._manifest_fingerprints().items()))
+
+    def _manifest_path(self, collection: str) -> str:
+        return os.path.join(self.manifest_dir, f"{collection}.json")
+
+    def _entity_path(self, collection: str, entity_id: str) -> str:
+        """Return the file holding one entity, refusing ids that would escape the workspace."""
+        for part in (collection, entity_id):
+            if not part or part in (".", "..") or "/" in part or os.sep in part:
+                raise ValueError(f"Invalid workspace path component: {part!r}")
+        if collection == "manifests":
+            raise ValueError(f"Invalid workspace collection: {collection!r}")
+        return os.path.join(self.root, collection, f"{entity_id}.json")
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """Return the cached manifests, re-reading those another writer replaced."""
+        with self._lock:
+            fingerprints = self._manifest_fingerprints()
+            for collection in list(self._manifests):
+                if collection not in fingerprints:
+                    del self._manifests[collection]
+            for collection, fingerprint in fingerprints.items():
+                cached = self._manifests.get(collection)
+                if cached is not None and cached[0] == fingerprint:
+                    continue
+                entities = {}
+                try:
+                    with open(self._manifest_path(collection), 'r', encoding='utf-8') as f:
+                        entities = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"Error loading {collection} manifest: {e}")
+                self._manifests[collection] = (fingerprint, entities)
+
+            manifest = default_document()
+            manifest.update({collection: entities for collection, (_, entities) in self._manifests.items()})
+            return manifest
+
+    def load_manifest(self) -> Dict[str, Any]:
+        return {collection: dict(entities) for collection, entities in self._read_manifest().items()}
+
+    def load_entity(self, collection: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._entity_path(collection, entity_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            print(f"Error loading {collection} entity {entity_id}: {e}")
+            return None
+
+    def load(self) -> Dict[str, Any]:
+        data = default_document()
+        for collection, entities in self._read_manifest().items():
+            data[collection] = {}
+            for entity_id in entities:
+                record = self.load_entity(collection, entity_id)
+                if record is not None:
+                    data[collection][entity_id] = record
+        return data
+
+    def commit(self, changes: List[EntityChange], document: Optional[Dict[str, Any]]) -> bool:
+        try:
+            with self._lock:
+                manifest = self._read_manifest()
+                touched = {}
+                for collection, entity_id, record in changes:
+                    path = self._entity_path(collection, entity_id)
+                    if collection not in touched:
+                        touched[collection] = dict(manifest.get(collection) or {})
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                    if record is None:
+                        if os.path.exists(path):
+                            os.remove(path)
+                        touched[collection].pop(entity_id, None)
+                    else:
+                        atomic_write_json(path, record)
+                        touched[collection][entity_id] = summarize(record)
+
+                os.makedirs(self.manifest_dir, exist_ok=True)
+                for collection, entities in touched.items():
+                    path = self._manifest_path(collection)
+                    atomic_write_json(path, entities)
+                    self._manifests[collection] = (file_fingerprint(path), entities)
+            return True
+        except Exception as e:
+            print(f"Error saving sharded workspace: {e}")
+            return False
+
+
+# Extra indexed columns per entity table, mirrored out of each record's JSON
+ENTITY_TABLES = {
+    "projects": [],
+    "stories": [],
+    "characters": [],
+    "world_elements": [],
+    "chapters": [
+        ("story_id", "TEXT"),
+        ("act_number", "INTEGER"),
+        ("block_number", "INTEGER"),
+        ("rank", "TEXT"),
+        ("status", "TEXT"),
+    ],
+    "scenes": [
+        ("chapter_id", "TEXT"),
+        ("status", "TEXT"),
+    ],
+}
+
+ENTITY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_chapters_story ON chapters (story_id)",
+    "DROP INDEX IF EXISTS idx_chapters_order",
+    "CREATE INDEX IF NOT EXISTS idx_chapters_rank ON chapters (story_id, act_number, block_number, rank)",
+    "CREATE INDEX IF NOT EXISTS idx_chapters_status ON chapters (status)",
+    "CREATE INDEX IF NOT EXISTS idx_scenes_chapter ON scenes (chapter_id)",
+] + [
+    f"CREATE INDEX IF NOT EXISTS idx_{table}_updated ON {table} (updated_at)"
+    for table in ENTITY_TABLES
+]
+
+
+class SQLiteBackend(StorageBackend):
+    """Stores each entity type in its own SQLite table so edits touch single rows.
+
+    Entities are loaded on demand: a lookup reads one row and listings read the summaries,
+    so opening a large workspace doesn't parse every record up front.
+    """
+
+    name = "sqlite"
+    supports_partial_load = True
+
+    def __init__(self, path: str = SQLITE_DB_FILE, import_from: Optional[str] = PROJECTS_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        is_new = not os.path.exists(path)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+        if is_new and import_from and os.path.exists(import_from):
+            import_json_file(import_from, self)
+
+    def _create_schema(self):
+        """Create entity tables and indexes if they do not exist yet."""
+        with self._lock, self.conn:
+            for table, columns in ENTITY_TABLES.items():
+                extra = "".join(f", {name} {col_type}" for name, col_type in columns)
+                self.conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    f"(id TEXT PRIMARY KEY, updated_at TEXT{extra}, data TEXT NOT NULL)"
+                )
+                self._add_missing_columns(table, columns)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS other_entities "
+                "(collection TEXT NOT NULL, id TEXT NOT NULL, updated_at TEXT, data TEXT NOT NULL, "
+                "PRIMARY KEY (collection, id))"
+            )
+            for statement in ENTITY_INDEXES:
+                self.conn.execute(statement)
+
+    def _add_missing_columns(self, table: str, columns: List[tuple]):
+        """Add mirror columns introduced since the table was created and fill them from the stored records.
+
+        Columns that are no longer mirrored (e.g. chapters.chapter_number) are left in place and stay NULL.
+        """
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        missing = [(name, col_type) for name, col_type in columns if name not in existing]
+        if not missing:
+            return
+        for name, col_type in missing:
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+        assignments = ", ".join(f"{name} = ?" for name, _ in missing)
+        rows = self.conn.execute(f"SELECT id, data FROM {table}").fetchall()
+        for entity_id, raw in rows:
+            record = json.loads(raw)
+            self.conn.execute(
+                f"UPDATE {table} SET {assignments} WHERE id = ?",
+                [record.get(name) for name, _ in missing] + [entity_id]
+            )
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def fingerprint(self) -> Any:
+        with self._lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self) -> Dict[str, Any]:
+        data = default_document()
+        with self._lock:
+            for table in ENTITY_TABLES:
+                rows = self.conn.execute(f"SELECT id, data FROM {table}")
+                data[table] = {entity_id: json.loads(raw) for entity_id, raw in rows}
+            for collection, entity_id, raw in self.conn.execute("SELECT collection, id, data FROM other_entities"):
+                data.setdefault(collection, {})[entity_id] = json.loads(raw)
+        return data
+
+    def load_manifest(self) -> Dict[str, Any]:
+        manifest = default_document()
+        with self._lock:
+            for table in ENTITY_TABLES:
+                rows = self.conn.execute(f"SELECT id, data FROM {table}")
+                manifest[table] = {entity_id: summarize(json.loads(raw)) for entity_id, raw in rows}
+            for collection, entity_id, raw in self.conn.execute("SELECT collection, id, data FROM other_entities"):
+                manifest.setdefault(collection, {})[entity_id] = summarize(json.loads(raw))
+        return manifest
+
+    def load_entity(self, collection: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if collection in ENTITY_TABLES:
+                row = self.conn.execute(f"SELECT data FROM {collection} WHERE id = ?", (entity_id,)).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT data FROM other_entities WHERE collection = ? AND id = ?", (collection, entity_id)
+                ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def commit(self, changes: List[EntityChange], document: Dict[str, Any]) -> bool:
+        try:
+            with self._lock, self.conn:
+                for change in changes:
+                    self._apply(change)
+            return True
+        except Exception as e:
+            print(f"Error saving projects to SQLite: {e}")
+            return False
+
+    def _apply(self, change: EntityChange):
+        """Write a single entity change inside the current transaction."""
+        collection, entity_id, record = change
+        if collection not in ENTITY_TABLES:
+            if record is None:
+                self.conn.execute("DELETE FROM other_entities WHERE collection = ? AND id = ?", (collection, entity_id))
+            else:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO other_entities (collection, id, updated_at, data) VALUES (?, ?, ?, ?)",
+                    (collection, entity_id, record.get("updated_at"), json.dumps(record, ensure_ascii=False))
+                )
+            return
+
+        if record is None:
+            self.conn.execute(f"DELETE FROM {collection} WHERE id = ?", (entity_id,))
+            return
+
+        columns = ["id", "updated_at"] + [name for name, _ in ENTITY_TABLES[collection]] + ["data"]
+        values = [entity_id, record.get("updated_at")]
+        values += [record.get(name) for name, _ in ENTITY_TABLES[collection]]
+        values.append(json.dumps(record, ensure_ascii=False))
+        placeholders = ", ".join("?" for _ in columns)
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO {collection} ({', '.join(columns)}) VALUES ({placeholders})",
+            values
+        )
+
+
+def document_changes(document: Dict[str, Any]) -> List[EntityChange]:
+    """Express a whole document as a list of entity writes."""
+    changes = []
+    for collection, entities in document.items():
+        if isinstance(entities, dict):
+            for entity_id, record in entities.items():
+                changes.append(EntityChange(collection, entity_id, record))
+    return changes
+
+
+def import_json_file(json_path: str, backend: StorageBackend) -> bool:
+    """One-shot import of an existing projects.json into another backend."""
+    source = JSONFileBackend(json_path, debounce_seconds=0)
+    if not source.exists():
+        print(f"Nothing to import: {json_path} does not exist")
+        return False
+
+    document = source.load()
+    changes = document_changes(document)
+    if backend.commit(changes, document):
+        print(f"Imported {len(changes)} entities from {json_path} into {backend.name} storage")
+        return True
+    return False
+
+
+def create_backend(name: str = STORAGE_BACKEND) -> StorageBackend:
+    """Create the storage backend selected in config."""
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "journal":
+        return JournaledJSONBackend()
+    if name == "sharded":
+        return ShardedBackend()
+    if name != "json":
+        print(f"Warning: Unknown storage backend '{name}', falling back to JSON")
+    return JSONFileBackend()
@@ -0,0 +1,153 @@
+"""Trigram index that narrows exact substring searches to a few candidate entities."""
+
+from itertools import groupby
+from typing import Dict, List, Any, Optional, Set, Tuple
+from config import SUBSTRING_INDEX_FILE
+from entity_index import EntityIndex
+from search_index import SEARCH_FIELDS, search_index
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the set of 3-character slices of a (lowercased) string."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SubstringIndex(EntityIndex):
+    """Per-collection trigram postings over the lowercased searchable fields.
+
+    A query of three or more characters can only occur in an entity that contains all
+    of its trigrams; shorter queries can only occur inside one of the trigrams that
+    contain them, or in a field shorter than three characters. Candidates are then
+    verified with a plain `in` check, so matches are exactly those of a full scan.
+    """
+
+    collections = tuple(SEARCH_FIELDS)
+
+    def __init__(self, path: Optional[str] = SUBSTRING_INDEX_FILE, **kwargs):
+        super().__init__(path=path, **kwargs)
+
+    def _reset(self):
+        # Postings hold small integer document numbers rather than id strings to keep them compact
+        self._postings: Dict[str, Dict[str, Set[int]]] = {c: {} for c in self.collections}
+        self._numbers: Dict[str, Dict[str, int]] = {c: {} for c in self.collections}
+        self._ids: Dict[str, Dict[int, str]] = {c: {} for c in self.collections}
+        self._doc_trigrams: Dict[str, Dict[int, tuple]] = {c: {} for c in self.collections}
+        self._short_fields: Dict[str, Set[int]] = {c: set() for c in self.collections}
+        self._next_number = 0
+
+    def _add(self, collection: str, entity_id: str, record: Dict[str, Any]):
+        number = self._next_number
+        self._next_number += 1
+        self._numbers[collection][entity_id] = number
+        self._ids[collection][number] = entity_id
+
+        grams: Set[str] = set()
+        for field in SEARCH_FIELDS[collection]:
+            value = record.get(field)
+            if not isinstance(value, str) or not value:
+                continue
+            value = value.lower()
+            if len(value) < 3:
+                self._short_fields[collection].add(number)
+            grams |= trigrams(value)
+
+        postings = self._postings[collection]
+        for gram in grams:
+            postings.setdefault(gram, set()).add(number)
+        self._doc_trigrams[collection][number] = tuple(grams)
+
+    def _remove(self, collection: str, entity_id: str):
+        number = self._numbers[collection].pop(entity_id, None)
+        if number is None:
+            return
+        del self._ids[collection][number]
+        self._short_fields[collection].discard(number)
+        postings = self._postings[collection]
+        for gram in self._doc_trigrams[collection].pop(number, ()):
+            numbers = postings.get(gram)
+            if numbers is not None:
+                numbers.discard(number)
+                if not numbers:
+                    del postings[gram]
+
+    def _get_state(self):
+        return (self._postings, self._numbers, self._ids, self._doc_trigrams,
+                self._short_fields, self._next_number)
+
+    def _set_state(self, state):
+        (self._postings, self._numbers, self._ids, self._doc_trigrams,
+         self._short_fields, self._next_number) = state
+
+    def candidates(self, query_lower: str, collection: str) -> List[str]:
+        """Return ids of entities that may contain `query_lower` in a searchable field."""
+        with self._lock:
+            self.sync()
+            postings = self._postings[collection]
+            if len(query_lower) >= 3:
+                sets = sorted((postings.get(gram, set()) for gram in trigrams(query_lower)), key=len)
+                numbers = set(sets[0]).intersection(*sets[1:])
+            else:
+                numbers = set(self._short_fields[collection])
+                for gram, gram_numbers in postings.items():
+                    if query_lower in gram:
+                        numbers |= gram_numbers
+            ids = self._ids[collection]
+            return [ids[number] for number in numbers]
+
+    def search(self, query: str, collection: str) -> List[Tuple[str, Any]]:
+        """Return (id, entity) pairs whose searchable fields contain `query`, ignoring case."""
+        query_lower = query.lower()
+        if not query_lower or collection not in SEARCH_FIELDS:
+            return []
+
+        matches = []
+        for entity_id in self.candidates(query_lower, collection):
+            record = self.store.get_entity(collection, entity_id)
+            if record is not None and contains(record, query_lower, collection):
+                matches.append((entity_id, record))
+        return matches
+
+
+def contains(record: Dict[str, Any], query_lower: str, collection: str) -> bool:
+    """Whether a searchable field of the record contains the lowercased query."""
+    return any(
+        isinstance(record.get(field), str) and query_lower in record.get(field).lower()
+        for field in SEARCH_FIELDS[collection]
+    )
+
+
+def search_entities(query: str, collection: str, limit: Optional[int] = None) -> List[Any]:
+    """Exact substring matches for a collection, best BM25 match first, then oldest first.
+
+    With a `limit`, candidates are put in that order from their summaries and only
+    verified until enough matches are found, so common words don't load every entity.
+    """
+    scores = search_index.scores(query, collection)
+    if limit is None:
+        matches = substring_index.search(query, collection)
+        matches.sort(key=lambda match: (-scores.get(match[0], 0.0), match[1].get("created_at", "")))
+        return [record for _, record in matches]
+
+    query_lower = query.lower()
+    if not query_lower or collection not in SEARCH_FIELDS or limit <= 0:
+        return []
+    store = substring_index.store
+    summaries = store.list_entities(collection)
+    candidates = substring_index.candidates(query_lower, collection)
+    candidates.sort(key=lambda entity_id: -scores.get(entity_id, 0.0))
+    results = []
+    # Ties on score are broken by age, looked up only for the score groups that are reached
+    for _, group in groupby(candidates, key=lambda entity_id: scores.get(entity_id, 0.0)):
+        group = [entity_id for entity_id in group if entity_id in summaries]
+        group.sort(key=lambda entity_id: summaries[entity_id].get("created_at", ""))
+        for entity_id in group:
+            record = store.get_entity(collection, entity_id)
+            if record is not None and contains(record, query_lower, collection):
+                results.append(record)
+                if len(results) >= limit:
+                    return results
+    return results
+
+
+# Global trigram index instance
+substring_index = SubstringIndex()
@@ -0,0 +1,39 @@
+"""Shared pytest setup: import modules from the repository root and run each test in a scratch directory."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_store import DocumentStore
+from storage_backends import JSONFileBackend
+
+
+@pytest.fixture(autouse=True)
+def workspace_dir(tmp_path, monkeypatch):
+    """Relative data paths from config (projects.json, blobs/, projects.lock, ...) land in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def store(workspace_dir):
+    """Empty workspace store writing projects.json immediately; modules override it to patch it in."""
+    store = DocumentStore(JSONFileBackend("projects.json", debounce_seconds=0))
+    store.ensure_initialized()
+    return store
+
+
+def put_chapter(store, chapter_id, story_id="s1", act=1, block=1, number=None, **fields):
+    """Save a chapter with every field a chapter form fills in; `number` sets the legacy chapter_number."""
+    record = {
+        "id": chapter_id, "title": chapter_id, "story_id": story_id, "act_number": act, "block_number": block,
+        "status": "draft", "outline": "", "location": "", "notes": "", "characters": [],
+        "created_at": chapter_id, "updated_at": chapter_id,
+    }
+    if number is not None:
+        record["chapter_number"] = number
+    record.update(fields)
+    store.put_entity("chapters", chapter_id, record)
@@ -0,0 +1,43 @@
+"""Tests for storing long text fields as content-addressed blobs."""
+
+import json
+import os
+
+from blob_store import BlobStore, is_blob_ref
+from document_store import DocumentStore
+from storage_backends import JSONFileBackend
+
+
+def test_long_fields_are_stored_once_and_resolved_on_read():
+    store = DocumentStore(JSONFileBackend("projects.json", debounce_seconds=0))
+    store.ensure_initialized()
+    long_text = "line of dialogue\n" * 200
+    store.put_entity("projects", "p1", {"id": "p1", "name": "Pilot", "content": long_text, "notes": "short"})
+    store.put_entity("projects", "p2", {"id": "p2", "name": "Copy", "content": long_text})
+
+    with open("projects.json", encoding="utf-8") as f:
+        stored = json.load(f)["projects"]
+    assert is_blob_ref(stored["p1"]["content"]) and stored["p1"]["notes"] == "short"
+    assert stored["p1"]["content"] == stored["p2"]["content"]
+    assert sum(len(files) for _, _, files in os.walk("blobs")) == 1
+
+    assert store.get_entity("projects", "p1")["content"] == long_text
+    assert store.load()["projects"]["p1"]["content"] == long_text
+
+
+def test_unreferenced_blobs_are_collected():
+    store = DocumentStore(JSONFileBackend("projects.json", debounce_seconds=0))
+    store.ensure_initialized()
+    store.put_entity("projects", "p1", {"id": "p1", "content": "a" * 5000})
+    store.put_entity("projects", "p1", dict(store.load()["projects"]["p1"], content="b" * 5000))
+
+    assert store.collect_blobs() == 1
+    assert store.load()["projects"]["p1"]["content"] == "b" * 5000
+
+
+def test_cache_stays_within_its_budget_and_rereads_evicted_blobs(tmp_path):
+    blobs = BlobStore(root=str(tmp_path / "blobs"), cache_bytes=10, min_chars=1)
+    first, second = blobs.put("12345678"), blobs.put("abcdefgh")
+    assert blobs._cached_bytes <= 10
+    assert blobs.get(first) == "12345678"
+    assert blobs.matches(second, "abcdefgh") and not blobs.matches(second, "abcdefgX")
@@ -0,0 +1,113 @@
+"""Tests for bulk importing entities from JSONL and CSV files."""
+
+import json
+import sys
+import types
+
+import pytest
+
+import bulk_import
+import chapter_index as chapter_index_module
+from chapter_index import ChapterIndex
+from database_models import rag_item
+
+
+class RecordingRAGService:
+    def __init__(self):
+        self.batches = []
+
+    def add_contents(self, items, batch_size=None, progress=None, parallel=False):
+        self.batches.append(list(items))
+        if progress:
+            progress(len(items), len(items))
+
+
+@pytest.fixture
+def store(store, monkeypatch):
+    monkeypatch.setattr(bulk_import, "document_store", store)
+    monkeypatch.setattr(chapter_index_module, "chapter_index", ChapterIndex(path=None, store=store))
+    return store
+
+
+@pytest.fixture
+def rag_service(monkeypatch):
+    service = RecordingRAGService()
+    monkeypatch.setitem(sys.modules, "rag_services", types.SimpleNamespace(rag_service=service))
+    return service
+
+
+def write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return path
+
+
+def test_imported_entities_are_embedded_with_the_same_text_as_a_save(store, rag_service):
+    path = write_jsonl("import.jsonl", [
+        {"type": "story", "id": "s1", "title": "Tides", "description": "Harbor town", "content": "Once"},
+        {"type": "character", "id": "c1", "name": "Mara", "description": "Pilot", "traits": ["brave"]},
+        {"type": "chapter", "id": "ch1", "title": "Arrival", "story": "Tides", "outline": "She lands"},
+    ])
+
+    message, _ = bulk_import.bulk_import(path, progress=lambda text: None)
+
+    assert message.startswith("✅")
+    expected = [
+        rag_item("stories", "s1", store.get_entity("stories", "s1")),
+        rag_item("characters", "c1", store.get_entity("characters", "c1")),
+        rag_item("chapters", "ch1", store.get_entity("chapters", "ch1"), "Tides", 1),
+    ]
+    assert rag_service.batches == [expected]
+
+
+def test_invalid_records_abort_the_import_unless_skipped(store, rag_service):
+    path = write_jsonl("import.jsonl", [
+        {"type": "character", "name": "Mara"},
+        {"type": "character", "description": "no name"},
+        {"type": "chapter", "title": "Lost", "story": "Missing story"},
+        {"type": "chapter", "title": "Orphan", "story_id": "missing-id"},
+        {"type": "spaceship", "name": "?"},
+    ])
+
+    message, stats = bulk_import.bulk_import(path, progress=lambda text: None)
+    assert message.startswith("❌") and len(stats["errors"]) == 4
+    assert any("unknown story_id 'missing-id'" in error for error in stats["errors"])
+    assert dict(store.list_entities("characters")) == {}
+
+    message, stats = bulk_import.bulk_import(path, skip_invalid=True, progress=lambda text: None)
+    assert message.startswith("✅") and stats["imported"] == {"characters": 1}
+
+
+def test_chapters_may_name_the_id_of_a_story_imported_alongside_them(store, rag_service):
+    path = write_jsonl("import.jsonl", [
+        {"type": "chapter", "title": "Arrival", "story_id": "s9"},
+        {"type": "story", "id": "s9", "title": "Tides"},
+    ])
+
+    message, stats = bulk_import.bulk_import(path, progress=lambda text: None)
+    assert message.startswith("✅") and stats["imported"] == {"stories": 1, "chapters": 1}
+    chapter, = store.list_entities("chapters").values()
+    assert chapter["story_id"] == "s9"
+
+
+def test_csv_chapters_are_saved_in_one_commit_after_existing_chapters(store, rag_service):
+    store.put_entity("stories", "s1", {"id": "s1", "title": "Tides", "description": "", "content": ""})
+    store.put_entity("chapters", "old", {"id": "old", "title": "Old", "story_id": "s1", "act_number": 1,
+                                         "block_number": 1, "chapter_number": 1, "outline": "", "location": "", "notes": ""})
+    with open("chapters.csv", "w", encoding="utf-8", newline="") as f:
+        f.write("title,story,chapter_number,characters\n"
+                "Third,Tides,3,Mara;Idris\n"
+                "Second,Tides,2,\n")
+    commits = []
+    store.add_listener(lambda changes, previous, generation: commits.append(changes))
+
+    message, stats = bulk_import.bulk_import("chapters.csv", default_type="chapter", progress=lambda text: None)
+
+    assert message.startswith("✅") and stats["imported"] == {"chapters": 2}
+    assert len(commits) == 1 and len(rag_service.batches) == 1
+    titles = [store.get_entity("chapters", chapter_id)["title"]
+              for chapter_id in chapter_index_module.chapter_index.chapter_ids("s1")]
+    assert titles == ["Old", "Second", "Third"]
+    third = next(c for c in store.load()["chapters"].values() if c["title"] == "Third")
+    assert third["characters"] == ["Mara", "Idris"] and "chapter_number" not in third
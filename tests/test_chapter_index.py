@@ -0,0 +1,66 @@
+"""Tests for the ordered chapter index and fractional chapter ranks."""
+
+import pytest
+
+from chapter_index import ChapterIndex, rank_between, ranks_between, legacy_rank
+from conftest import put_chapter
+
+
+def test_numbers_and_counts_follow_the_story_act_order(store):
+    index = ChapterIndex(path=None, store=store)
+    put_chapter(store, "a2", act=2, number=1)
+    put_chapter(store, "a1b2", act=1, block=2, number=1)
+    put_chapter(store, "a1b1", act=1, block=1, number=7, status="final")
+    put_chapter(store, "other", story_id="s2", number=1)
+
+    assert index.chapter_ids("s1") == ["a1b1", "a1b2", "a2"]
+    assert index.chapter_ids("s1", act_number=1) == ["a1b1", "a1b2"]
+    assert [index.display_number(c) for c in ("a1b1", "a1b2", "a2", "other")] == [1, 2, 1, 1]
+    assert index.act_size("s1", 1) == 2 and index.act_size("s1", 3) == 0
+    assert index.count() == 4 and index.count("s1", status="draft") == 2 and index.count(act_number=2) == 1
+
+    store.delete_entity("chapters", "a1b1")
+    assert index.display_number("a1b2") == 1 and index.count("s1", act_number=1) == 1
+
+
+@pytest.mark.parametrize("before, after", [
+    (None, None), ("V", None), (None, "V"), ("V", "W"), ("V", "V1"), ("Vz", "W"), ("0001", "0002"), ("zzz", None),
+])
+def test_rank_between_sorts_strictly_between_its_bounds(before, after):
+    rank = rank_between(before, after)
+    assert (before or "") < rank and (after is None or rank < after)
+    assert not rank.endswith("0")
+
+
+def test_rank_between_rejects_bounds_out_of_order():
+    with pytest.raises(ValueError):
+        rank_between("W", "V")
+    with pytest.raises(ValueError):
+        rank_between("V", "V")
+
+
+def test_repeated_inserts_at_one_spot_stay_ordered_and_short():
+    low, high = "V", "W"
+    ranks = []
+    for _ in range(200):
+        high = rank_between(low, high)
+        ranks.append(high)
+    assert ranks == sorted(ranks, reverse=True)
+    assert max(len(rank) for rank in ranks) < 60
+
+    appended = ranks_between(None, None, 500)
+    assert appended == sorted(appended) and len(set(appended)) == 500
+    # Appending steps the last digit, so ranks gain one digit per ~60 chapters added at the end
+    assert len(appended[-1]) <= 2 + 500 // 60
+
+
+@pytest.mark.parametrize("before, after, count", [(None, None, 5), ("A", "B", 7), ("A", "A1", 3), ("V", None, 0)])
+def test_ranks_between_returns_count_ascending_ranks(before, after, count):
+    ranks = ranks_between(before, after, count)
+    assert len(ranks) == count and ranks == sorted(set(ranks))
+    assert all((before or "") < rank and (after is None or rank < after) for rank in ranks)
+
+
+def test_legacy_numbers_keep_their_order_next_to_ranks():
+    assert legacy_rank(2) < legacy_rank(10) < legacy_rank(62) < legacy_rank(1000)
+    assert rank_between(legacy_rank(3), legacy_rank(4)) < legacy_rank(4)
@@ -0,0 +1,76 @@
+"""Tests for exporting the chapter table to a sheet and importing the edited sheet."""
+
+import csv
+
+import pytest
+
+import chapter_sheets
+import database_models
+from chapter_index import ChapterIndex
+from conftest import put_chapter
+
+
+@pytest.fixture
+def store(store, monkeypatch):
+    index = ChapterIndex(path=None, store=store)
+    monkeypatch.setattr(chapter_sheets, "document_store", store)
+    monkeypatch.setattr(chapter_sheets, "chapter_index", index)
+    monkeypatch.setattr(database_models, "get_entity_store", lambda: store)
+    monkeypatch.setattr(database_models, "get_chapter_index", lambda: index)
+    monkeypatch.setattr(database_models, "get_rag_service", lambda: None)
+
+    store.put_entity("stories", "s1", {"id": "s1", "title": "Tides"})
+    for number in (1, 2, 3):
+        put_chapter(store, f"c{number}", number=number, title=f"Chapter {number}", characters=["Mara"], status="Draft")
+    return store
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def test_export_writes_filtered_chapters_in_display_order(store):
+    path, message = chapter_sheets.export_chapters("csv", story_id="s1")
+    rows = read_csv(path)
+    assert message.startswith("✅ Exported 3")
+    assert rows[0] == chapter_sheets.SHEET_COLUMNS
+    assert [row[0] for row in rows[1:]] == ["c1", "c2", "c3"]
+    assert rows[1][1:6] == ["Tides", "1", "1", "1", "Chapter 1"]
+    assert chapter_sheets.export_chapters("pdf")[0] is None
+
+
+def test_import_saves_only_changed_cells_and_new_rows_in_one_commit(store):
+    path, _ = chapter_sheets.export_chapters("csv")
+    rows = read_csv(path)
+    rows[2][chapter_sheets.SHEET_COLUMNS.index("Status")] = "Done"
+    rows[3][chapter_sheets.SHEET_COLUMNS.index("Characters")] = "Mara; Idris"
+    rows.append(["", "Tides", "1", "1", "", "Epilogue", "", "", "", "", ""])
+    write_csv("edited.csv", rows)
+    commits = []
+    store.add_listener(lambda changes, previous, generation: commits.append(changes))
+
+    message, stats = chapter_sheets.import_chapter_sheet("edited.csv")
+
+    assert message.startswith("✅"), message
+    assert stats["unchanged"] == 1 and stats["updated"] == 2 and stats["created"] == 1
+    assert len(commits) == 1
+    assert store.get_entity("chapters", "c2")["status"] == "Done"
+    assert list(store.get_entity("chapters", "c3")["characters"]) == ["Mara", "Idris"]
+    assert store.get_entity("chapters", "c1")["version"] == 1
+    titles = [store.get_entity("chapters", c)["title"] for c in chapter_sheets.chapter_index.chapter_ids("s1")]
+    assert titles == ["Chapter 1", "Chapter 2", "Chapter 3", "Epilogue"]
+
+
+def test_invalid_rows_abort_the_import(store):
+    write_csv("edited.csv", [chapter_sheets.SHEET_COLUMNS,
+                             ["c1", "Tides", "x", "1", "1", "Chapter 1", "", "", "", "Draft", ""],
+                             ["c2", "Tides", "1", "1", "2", "Chapter 2", "", "", "", "Finished", ""]])
+    message, stats = chapter_sheets.import_chapter_sheet("edited.csv")
+    assert message.startswith("❌") and len(stats["errors"]) == 2
+    assert store.get_entity("chapters", "c2")["status"] == "Draft"
@@ -0,0 +1,56 @@
+"""Tests for the running chapter statistics."""
+
+import random
+from collections import Counter
+
+import pytest
+
+from chapter_stats import ChapterStatistics, count_words
+from document_store import DocumentStore
+from storage_backends import JSONFileBackend
+
+STATUSES = ("Not Started", "Draft", "In Progress", "Done")
+
+
+def recount(store):
+    """Statistics computed the slow way, by walking every chapter."""
+    chapters = store.load()["chapters"].values()
+    return {
+        "total": len(chapters),
+        "words": sum(count_words(c) for c in chapters),
+        "by_status": dict(Counter(c["status"] for c in chapters)),
+        "by_act": dict(Counter(c["act_number"] for c in chapters)),
+    }
+
+
+def test_running_totals_match_a_recount_after_random_edits(store):
+    stats = ChapterStatistics(path=None, store=store)
+    rng = random.Random(7)
+    for step in range(150):
+        chapter_id = f"c{rng.randrange(20)}"
+        if rng.random() < 0.2:
+            store.delete_entity("chapters", chapter_id)
+            continue
+        store.put_entity("chapters", chapter_id, {
+            "id": chapter_id, "story_id": f"s{rng.randrange(3)}", "act_number": rng.randrange(1, 4),
+            "status": rng.choice(STATUSES), "outline": "word " * rng.randrange(5), "content": "more words " * rng.randrange(3),
+        })
+
+    totals = stats.totals()
+    assert {key: totals[key] for key in ("total", "words", "by_status", "by_act")} == recount(store)
+
+
+def test_story_progress_and_persisted_totals(store):
+    stats = ChapterStatistics(path="chapter_stats.pkl", store=store)
+    for number, status in enumerate(["Done", "Done", "Draft", "Not Started"]):
+        store.put_entity("chapters", f"c{number}", {"id": f"c{number}", "story_id": "s1", "act_number": 1,
+                                                    "status": status, "outline": "two words"})
+    assert stats.story_totals("s1") == {"chapters": 4, "done": 2, "words": 8, "progress": 50.0}
+    assert stats.story_totals("missing")["progress"] == 0.0
+    assert stats.save()
+
+    other = DocumentStore(JSONFileBackend("projects.json", debounce_seconds=0))
+    other.delete_entity("chapters", "c0")
+    reopened = ChapterStatistics(path="chapter_stats.pkl",
+                                 store=DocumentStore(JSONFileBackend("projects.json", debounce_seconds=0)))
+    assert reopened.story_totals("s1")["done"] == 1
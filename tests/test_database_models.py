@@ -0,0 +1,211 @@
+"""Tests for the database model helpers that keep the vector index in step with the workspace."""
+
+import pytest
+
+import database_models
+from conftest import put_chapter
+from database_models import rag_item, _refresh_vectors
+from operation_log import OperationLog
+
+
+class RecordingRAGService:
+    def __init__(self):
+        self.added = []
+        self.removed = []
+
+    def add_content(self, *item):
+        self.added.append(item)
+
+    def add_contents(self, items):
+        self.added.extend(items)
+
+    def remove_content(self, content_id):
+        self.removed.append(content_id)
+
+    def remove_contents(self, content_ids):
+        self.removed.extend(content_ids)
+
+
+@pytest.fixture
+def chapter_index(store, monkeypatch):
+    """Chapter index over the test store, used by the chapter functions in database_models."""
+    from chapter_index import ChapterIndex
+
+    index = ChapterIndex(path=None, store=store)
+    monkeypatch.setattr(database_models, "get_entity_store", lambda: store)
+    monkeypatch.setattr(database_models, "get_chapter_index", lambda: index)
+    return index
+
+
+@pytest.fixture
+def scene_tree(store, monkeypatch):
+    from scene_index import SceneTree
+
+    tree = SceneTree(path=None, store=store)
+    monkeypatch.setattr(database_models, "get_scene_tree", lambda: tree)
+    return tree
+
+
+@pytest.fixture
+def rag_service(monkeypatch):
+    service = RecordingRAGService()
+    monkeypatch.setattr(database_models, "get_rag_service", lambda: service)
+    return service
+
+
+def test_rag_item_covers_every_indexed_field():
+    character = {"name": "Mara", "description": "A pilot", "traits": ["brave", "rash"], "notes": "Scar on left hand"}
+    content, content_type, content_id, title = rag_item("characters", "c1", character)
+    assert (content_type, content_id, title) == ("character", "c1", "Mara")
+    for text in ("A pilot", "brave, rash", "Scar on left hand"):
+        assert text in content
+
+    story = {"title": "Tides", "description": "Harbor town", "content": "Once upon a time"}
+    assert "Once upon a time" in rag_item("stories", "s1", story)[0]
+
+
+def test_undo_reembeds_entities_with_the_same_text_as_a_rebuild(store, rag_service):
+    log = OperationLog(store=store)
+    store.put_entity("stories", "s1", {"title": "Tides", "description": "Harbor town", "content": "Draft one"})
+    with store.transaction(label="Edit story") as txn:
+        story = txn.get("stories", "s1")
+        story["content"] = "Draft two"
+        txn.put("stories", "s1", story)
+
+    operation = log.undo()
+    _refresh_vectors(store, operation)
+    restored = store.get_entity("stories", "s1")
+    assert rag_service.added == [rag_item("stories", "s1", restored)]
+    assert "Draft one" in rag_service.added[0][0]
+
+
+def test_undo_skips_entities_whose_indexed_fields_did_not_change(store, rag_service):
+    log = OperationLog(store=store)
+    store.put_entity("stories", "s1", {"title": "Tides", "description": "", "content": "", "status": "draft"})
+    with store.transaction(label="Edit story") as txn:
+        story = txn.get("stories", "s1")
+        story["status"] = "final"
+        txn.put("stories", "s1", story)
+
+    _refresh_vectors(store, log.undo())
+    assert rag_service.added == []
+
+    _refresh_vectors(store, log.undo())
+    assert rag_service.removed == ["s1"]
+
+
+def test_bulk_update_moves_chapters_to_another_act_in_the_same_undo_step(store, rag_service, monkeypatch):
+    from chapter_index import ChapterIndex
+
+    index = ChapterIndex(path=None, store=store)
+    log = OperationLog(store=store)
+    monkeypatch.setattr(database_models, "get_entity_store", lambda: store)
+    monkeypatch.setattr(database_models, "get_chapter_index", lambda: index)
+    for number, (chapter_id, act) in enumerate([("c1", 1), ("c2", 1), ("c3", 2)], start=1):
+        store.put_entity("chapters", chapter_id, {
+            "id": chapter_id, "title": chapter_id, "story_id": "s1", "act_number": act,
+            "block_number": 1, "chapter_number": number, "status": "draft", "outline": "", "location": "", "notes": "",
+        })
+    commits = []
+    store.add_listener(lambda changes, previous, generation: commits.append(changes))
+
+    message = database_models.bulk_update_chapters(["c1", "c2", "c3"], {"status": "final"}, act_number=2)
+
+    assert message.startswith("✅") and "2 moved to Act 2" in message
+    assert len(commits) == 1
+    assert index.chapter_ids("s1") == ["c3", "c1", "c2"]
+    assert all(store.get_entity("chapters", c)["status"] == "final" for c in ("c1", "c2", "c3"))
+    assert {item[2] for item in rag_service.added} == {"c1", "c2"}
+
+    log.undo()
+    assert [store.get_entity("chapters", c)["act_number"] for c in ("c1", "c2")] == [1, 1]
+    assert all(store.get_entity("chapters", c)["status"] == "draft" for c in ("c1", "c2", "c3"))
+
+
+def test_query_chapters_pages_filters_and_projects(store, chapter_index):
+    for number in range(1, 8):
+        put_chapter(store, f"c{number}", act=1 if number <= 4 else 2, number=number,
+                    status="final" if number % 2 else "draft", word_count=10 * (8 - number))
+    put_chapter(store, "other", story_id="s2", number=1)
+
+    rows, total = database_models.query_chapters("s1", offset=2, limit=3)
+    assert total == 7 and [row["id"] for row in rows] == ["c3", "c4", "c5"]
+
+    rows, total = database_models.query_chapters("s1", status="final", act_number=2, fields=["id", "status"])
+    assert total == 2 and rows == [{"id": "c5", "status": "final"}, {"id": "c7", "status": "final"}]
+
+    rows, _ = database_models.query_chapters(sort_by="word_count", limit=2)
+    assert [row["id"] for row in rows] == ["c7", "c6"]
+    rows, _ = database_models.query_chapters("s1", descending=True, limit=2)
+    assert [row["id"] for row in rows] == ["c7", "c6"]
+    assert len(database_models.get_all_chapters()) == 8
+
+
+def test_created_chapters_are_appended_to_their_block(store, chapter_index, rag_service):
+    put_chapter(store, "legacy", number=5)
+    for title in ("One", "Two", "Three"):
+        message, _ = database_models.create_chapter("s1", 1, 1, title)
+        assert message.startswith("✅")
+
+    titles = [store.get_entity("chapters", c)["title"] for c in chapter_index.chapter_ids("s1")]
+    assert titles == ["legacy", "One", "Two", "Three"]
+    assert [item[3] for item in rag_service.added] == [" - Chapter 2: One", " - Chapter 3: Two", " - Chapter 4: Three"]
+
+
+def test_moving_a_chapter_rewrites_only_that_chapter(store, chapter_index, rag_service):
+    for number in range(1, 5):
+        put_chapter(store, f"c{number}", number=number)
+    put_chapter(store, "act2", act=2, number=1)
+    commits = []
+    store.add_listener(lambda changes, previous, generation: commits.append([change.entity_id for change in changes]))
+
+    assert database_models.move_chapter("c4", after_id="c1").startswith("✅")
+    assert database_models.move_chapter("c1", before_id="act2").startswith("✅")
+
+    assert commits == [["c4"], ["c1"]]
+    assert chapter_index.chapter_ids("s1") == ["c4", "c2", "c3", "c1", "act2"]
+    assert [chapter_index.display_number(c) for c in ("c4", "c3", "c1")] == [1, 3, 1]
+    # Only the move across acts changes the indexed text
+    assert [item[2] for item in rag_service.added] == ["c1"]
+    assert "❌" in database_models.move_chapter("c2", after_id="missing")
+
+
+def test_bulk_update_appends_clears_and_skips_unchanged_chapters(store, chapter_index, rag_service):
+    put_chapter(store, "c1", notes="First note", characters=["Mara"], status="Draft")
+    put_chapter(store, "c2", notes="", characters=[], status="Done", location="Dock")
+    commits = []
+    store.add_listener(lambda changes, previous, generation: commits.append({change.entity_id for change in changes}))
+
+    message = database_models.bulk_update_chapters(
+        ["c1", "c2", "missing"], {"status": "Done"}, append={"notes": "Revisit", "characters": "Idris"}, clear=["location"]
+    )
+    assert message.startswith("✅ Updated 2 chapters")
+    assert commits == [{"c1", "c2"}]
+    c1, c2 = store.get_entity("chapters", "c1"), store.get_entity("chapters", "c2")
+    assert (c1["notes"], list(c1["characters"]), c1["status"]) == ("First note\nRevisit", ["Mara", "Idris"], "Done")
+    assert (c2["notes"], list(c2["characters"]), c2["location"]) == ("Revisit", ["Idris"], "")
+
+    rag_service.added.clear()
+    message = database_models.bulk_update_chapters(["c1", "c2"], {"status": "Done"})
+    assert "(2 already up to date)" in message and len(commits) == 1 and rag_service.added == []
+    assert database_models.bulk_update_chapters(["c1"], {"id": "x"}).startswith("❌")
+
+
+def test_scenes_are_created_moved_queried_and_deleted_with_their_chapter(store, chapter_index, scene_tree, rag_service):
+    put_chapter(store, "c1", number=1)
+    put_chapter(store, "c2", act=2, number=1)
+    _, first = database_models.create_scene("c1", "Arrival", characters=["Mara"], location="Dock")
+    _, second = database_models.create_scene("c1", "Market", characters=["Idris"])
+    _, third = database_models.create_scene("c2", "Storm", characters=["mara"])
+    assert database_models.create_scene("missing", "Lost")[0].startswith("❌")
+
+    assert [s["title"] for s in database_models.get_scenes_for_chapter("c1")] == ["Arrival", "Market"]
+    assert [s["title"] for s in database_models.query_scenes("s1", character="MARA")] == ["Arrival", "Storm"]
+
+    database_models.update_scene(first["id"], {"chapter_id": "c2"})
+    assert [s["title"] for s in database_models.query_scenes("s1", act_number=2)] == ["Storm", "Arrival"]
+
+    assert database_models.delete_scene(second["id"]).startswith("✅")
+    assert database_models.delete_chapter("c2").startswith("✅")
+    assert dict(store.list_entities("scenes")) == {}
+    assert set(rag_service.removed) == {second["id"], "c2", first["id"], third["id"]}
@@ -0,0 +1,164 @@
+"""Tests for the in-process document store and its read-modify-write transactions."""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from document_store import DocumentStore, ConflictError, thaw
+from storage_backends import JSONFileBackend, default_document
+
+
+def make_store(debounce_seconds=0.0):
+    store = DocumentStore(JSONFileBackend("projects.json", debounce_seconds=debounce_seconds))
+    store.ensure_initialized()
+    return store
+
+
+def test_debounced_write_keeps_other_processes_out_until_it_lands():
+    first, second = make_store(debounce_seconds=0.3), make_store()
+    with first.transaction() as txn:
+        txn.put("projects", "p1", {"id": "p1", "name": "one"})
+
+    # A second writer (its own lock file handle, as in another process) must not read the
+    # file before the first writer's coalesced save is on disk
+    def edit():
+        with second.transaction() as txn:
+            record = txn.get("projects", "p1")
+            record["name"] = "two"
+            txn.put("projects", "p1", record)
+
+    worker = threading.Thread(target=edit)
+    started = time.monotonic()
+    worker.start()
+    worker.join(5)
+    assert not worker.is_alive()
+    assert time.monotonic() - started >= 0.2
+
+    assert first.get_entity("projects", "p1")["name"] == "two"
+    assert first.get_entity("projects", "p1")["version"] == 2
+
+
+def test_repeated_reads_reuse_the_cached_parse(monkeypatch):
+    store = make_store()
+    store.put_entity("projects", "p1", {"id": "p1", "name": "one"})
+    loads = []
+    real_load = store.backend.load
+    monkeypatch.setattr(store.backend, "load", lambda: (loads.append(1), real_load())[1])
+    monkeypatch.setattr("builtins.open", lambda *args, **kwargs: pytest.fail("projects.json was re-read"))
+
+    for _ in range(3):
+        assert store.get_entity("projects", "p1")["name"] == "one"
+        assert list(store.list_entities("projects")) == ["p1"]
+    assert loads == []
+
+
+def test_an_external_edit_to_projects_json_invalidates_the_cache():
+    store = make_store()
+    store.put_entity("projects", "p1", {"id": "p1", "name": "one"})
+    assert store.get_entity("projects", "p1")["name"] == "one"
+
+    with open("projects.json", encoding="utf-8") as f:
+        data = json.load(f)
+    data["projects"]["p1"]["name"] = "edited elsewhere"
+    with open("projects.json", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    stat = os.stat("projects.json")
+    os.utime("projects.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert store.get_entity("projects", "p1")["name"] == "edited elsewhere"
+
+
+def test_cached_views_are_read_only_and_thaw_returns_an_independent_copy():
+    store = make_store()
+    store.put_entity("characters", "c1", {"id": "c1", "name": "Mara", "traits": ["brave"]})
+    character = store.get_entity("characters", "c1")
+
+    with pytest.raises(TypeError):
+        character["name"] = "changed"
+    with pytest.raises(TypeError):
+        character["traits"][0] = "timid"
+    with pytest.raises(AttributeError):
+        character["traits"].append("timid")
+
+    copy = thaw(character)
+    copy["name"] = "changed"
+    copy["traits"].append("timid")
+    assert store.get_entity("characters", "c1")["name"] == "Mara"
+    assert list(store.get_entity("characters", "c1")["traits"]) == ["brave"]
+
+
+def test_save_rewrites_only_changed_entities_without_rehashing_long_texts(monkeypatch):
+    from blob_store import blob_store
+
+    store = make_store()
+    long_text = "word " * 1000
+    for number in range(3):
+        store.put_entity("projects", f"p{number}", {"id": f"p{number}", "name": str(number), "content": long_text + str(number)})
+    data = store.load()
+    data["projects"]["p1"]["name"] = "renamed"
+
+    hashed = []
+    real_ref = blob_store.ref
+    monkeypatch.setattr(blob_store, "ref", lambda text: (hashed.append(text), real_ref(text))[1])
+    committed = []
+    store.add_listener(lambda changes, previous, generation: committed.extend(changes))
+    assert store.save(data)
+
+    assert [change.entity_id for change in committed] == ["p1"]
+    assert len(hashed) <= 1
+    assert store.get_entity("projects", "p1")["content"] == long_text + "1"
+
+
+def test_stale_version_is_rejected_and_nothing_is_written():
+    store = make_store()
+    store.put_entity("projects", "p1", {"id": "p1", "name": "one"})
+    stale = store.load()["projects"]["p1"]
+
+    with store.transaction() as txn:
+        record = txn.get("projects", "p1")
+        record["name"] = "two"
+        txn.put("projects", "p1", record)
+
+    with pytest.raises(ConflictError):
+        with store.transaction() as txn:
+            txn.put("projects", "p2", {"id": "p2", "name": "new"})
+            stale["name"] = "overwritten"
+            txn.put("projects", "p1", stale)
+
+    reloaded = make_store()
+    assert reloaded.get_entity("projects", "p1")["name"] == "two"
+    assert reloaded.get_entity("projects", "p2") is None
+
+
+def test_versioned_delete_refuses_an_entity_edited_since_it_was_read():
+    store = make_store()
+    store.put_entity("projects", "p1", {"id": "p1", "name": "one"})
+    version = store.get_entity("projects", "p1")["version"]
+    store.put_entity("projects", "p1", dict(store.get_entity("projects", "p1"), name="two"))
+
+    with pytest.raises(ConflictError):
+        with store.transaction() as txn:
+            txn.delete("projects", "p1", version=version)
+    assert store.get_entity("projects", "p1")["name"] == "two"
+
+
+def test_concurrent_increments_from_many_threads_are_not_lost():
+    store = make_store()
+    store.put_entity("projects", "p1", {"id": "p1", "name": "counter", "count": 0})
+
+    def increment():
+        for _ in range(20):
+            with store.transaction() as txn:
+                record = txn.get("projects", "p1")
+                record["count"] += 1
+                txn.put("projects", "p1", record)
+
+    workers = [threading.Thread(target=increment) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert make_store().get_entity("projects", "p1")["count"] == 80
@@ -0,0 +1,52 @@
+"""Tests for the memory-mapped embedding cache."""
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache, text_key
+
+
+def small_cache(slots=3):
+    cache = EmbeddingCache(root="cache", max_mb=0, dtype="float32")
+    cache.max_bytes = slots * 4 * 4
+    return cache
+
+
+def vectors(*values):
+    return np.array([[value] * 4 for value in values], dtype="float32")
+
+
+def test_keys_ignore_whitespace_differences_but_not_the_model():
+    assert text_key("m", "a  b\n") == text_key("m", "a b")
+    assert text_key("m", "a b") != text_key("other", "a b")
+
+
+def test_least_recently_used_vector_is_evicted():
+    cache = small_cache()
+    cache.put_many("m", ["a", "b", "c"], vectors(1, 2, 3))
+    assert cache.get_many("m", ["a"], 4)[0][0] == 1
+    cache.put_many("m", ["d"], vectors(4))
+
+    found = cache.get_many("m", ["a", "b", "c", "d"], 4)
+    assert [vector is not None for vector in found] == [True, False, True, True]
+    assert (cache.hits, cache.misses) == (4, 1)
+
+
+def test_cache_is_reopened_with_its_contents_and_usage_order():
+    cache = small_cache()
+    cache.put_many("m", ["a", "b", "c"], vectors(1, 2, 3))
+    cache.get_many("m", ["a"], 4)
+    cache.flush()
+
+    reopened = small_cache()
+    assert reopened.get_many("m", ["c"], 4)[0][0] == 3
+    reopened.put_many("m", ["d"], vectors(4))
+    found = reopened.get_many("m", ["a", "b", "c", "d"], 4)
+    assert [vector is not None for vector in found] == [True, False, True, True]
+
+
+def test_slot_overwritten_by_another_text_reads_as_a_miss():
+    cache = small_cache(slots=1)
+    cache.put_many("m", ["a"], vectors(1))
+    slot = cache._slots[text_key("m", "a")]
+    cache._keys[slot] = np.frombuffer(text_key("m", "z"), dtype="uint8")
+    assert cache.get_many("m", ["a"], 4) == [None]
@@ -0,0 +1,23 @@
+"""Tests for the embedding worker processes."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import embedding_pool
+from embedding_pool import THREAD_VARIABLES, _WorkerContext
+
+
+def test_workers_start_with_thread_caps_that_the_parent_does_not_keep(monkeypatch):
+    for variable in THREAD_VARIABLES:
+        monkeypatch.delenv(variable, raising=False)
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=_WorkerContext(3)) as executor:
+        seen = list(executor.map(os.getenv, THREAD_VARIABLES))
+
+    assert seen == ["3"] * len(THREAD_VARIABLES)
+    assert all(variable not in os.environ for variable in THREAD_VARIABLES)
+
+
+def test_no_pool_below_two_workers(monkeypatch):
+    monkeypatch.setattr(embedding_pool, "EMBEDDING_WORKERS", 1)
+    assert embedding_pool.get_embedding_pool() is None
@@ -0,0 +1,75 @@
+"""Tests for script saving and its revision history."""
+
+import sys
+import types
+
+import pytest
+
+import models
+from database_models import rag_item
+from revision_store import RevisionStore
+
+
+@pytest.fixture
+def store(store, monkeypatch):
+    store.put_entity("projects", "p1", {"id": "p1", "name": "Pilot", "content": "", "notes": ""})
+    monkeypatch.setattr(models, "document_store", store)
+    return store
+
+
+@pytest.fixture
+def revisions(monkeypatch):
+    revisions = RevisionStore(root="revisions", snapshot_interval=3)
+    monkeypatch.setattr(models, "revision_store", revisions)
+    return revisions
+
+
+def test_a_new_project_is_indexed_like_a_saved_one(store, monkeypatch):
+    batches = []
+    monkeypatch.setitem(sys.modules, "rag_services", types.SimpleNamespace(
+        rag_service=types.SimpleNamespace(add_contents=batches.append)))
+
+    status, choices = models.create_new_project("  Sequel ")
+    assert status.startswith("✅")
+    project_id = next(project_id for name, project_id in choices if name == "Sequel")
+    assert batches == [[rag_item("projects", project_id, store.get_entity("projects", project_id))]]
+
+
+def test_saves_record_revisions_only_when_the_text_changes(store, revisions):
+    assert models.save_script_content("p1", "one", "").startswith("✅")
+    assert models.save_script_content("p1", "one", "new notes").startswith("✅")
+    assert models.save_script_content("p1", "one\ntwo", "").startswith("✅")
+    assert [revision for _, revision in models.list_script_revisions("p1")] == [2, 1]
+
+    status, content = models.restore_script_revision("p1", 1)
+    assert status.startswith("✅") and content == "one"
+    assert store.get_entity("projects", "p1")["content"] == "one"
+    assert revisions.latest_number("p1") == 3
+
+
+def test_failed_save_records_no_revision(store, revisions, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(store.backend, "commit", lambda changes, document: False)
+        assert models.save_script_content("p1", "never saved", "").startswith("❌")
+    assert revisions.latest_number("p1") == 0
+
+    # Saving the same text again must still record it
+    assert models.save_script_content("p1", "never saved", "").startswith("✅")
+    assert revisions.get("p1", 1) == "never saved"
+
+
+def test_query_entities_pages_filters_sorts_and_projects(store):
+    for number in range(5):
+        store.put_entity("characters", f"c{number}", {
+            "id": f"c{number}", "name": f"Name {number}", "role": "lead" if number < 2 else "extra", "age": 50 - number,
+        })
+
+    page, total = models.query_entities("characters", offset=1, limit=2)
+    assert total == 5 and [c["id"] for c in page] == ["c1", "c2"]
+
+    page, total = models.query_entities("characters", where={"role": "extra"}, sort_by="age", limit=2, fields=["id"])
+    assert total == 3 and page == [{"id": "c4"}, {"id": "c3"}]
+
+    page, _ = models.query_entities("characters", descending=True, limit=1)
+    assert page[0]["id"] == "c4"
+    assert [c["id"] for c in models.get_all_characters(offset=3)] == ["c3", "c4"]
@@ -0,0 +1,77 @@
+"""Tests for the per-session undo/redo log."""
+
+import pytest
+
+from document_store import ConflictError
+from operation_log import OperationLog, operation_session
+
+
+@pytest.fixture
+def log(store):
+    return OperationLog(store=store, max_operations=3)
+
+
+def rename(store, entity_id, name, label="Rename"):
+    with store.transaction(label=label) as txn:
+        record = txn.get("projects", entity_id)
+        record["name"] = name
+        txn.put("projects", entity_id, record)
+
+
+def test_undo_and_redo_move_only_the_changed_fields(store, log):
+    store.put_entity("projects", "p1", {"id": "p1", "name": "draft", "notes": "n"}, label="Create project")
+    rename(store, "p1", "final")
+
+    assert log.undo().label == "Rename"
+    assert (store.get_entity("projects", "p1")["name"], store.get_entity("projects", "p1")["notes"]) == ("draft", "n")
+    assert log.redo().label == "Rename"
+    assert store.get_entity("projects", "p1")["name"] == "final"
+
+    log.undo()
+    assert log.undo().label == "Create project"
+    assert store.get_entity("projects", "p1") is None
+    assert log.undo() is None
+    log.redo()
+    assert store.get_entity("projects", "p1")["name"] == "draft"
+
+
+def test_new_operation_clears_redo_and_history_is_bounded(store, log):
+    store.put_entity("projects", "p1", {"id": "p1", "name": "0"}, label="Create project")
+    for number in range(1, 5):
+        rename(store, "p1", str(number), label=f"Rename {number}")
+    assert [label for label, _, _ in log.history()] == ["Rename 4", "Rename 3", "Rename 2"]
+
+    log.undo()
+    assert log.can_redo()
+    rename(store, "p1", "x")
+    assert not log.can_redo()
+
+
+def test_undo_refuses_to_overwrite_a_later_edit(store, log):
+    store.put_entity("projects", "p1", {"id": "p1", "name": "a"})
+    with operation_session("first"):
+        rename(store, "p1", "b")
+    with operation_session("second"):
+        rename(store, "p1", "c")
+
+    with operation_session("first"):
+        with pytest.raises(ConflictError):
+            log.undo()
+        assert log.can_undo()
+    assert store.get_entity("projects", "p1")["name"] == "c"
+
+
+def test_sessions_undo_only_their_own_changes(store, log):
+    store.put_entity("projects", "p1", {"id": "p1", "name": "a"})
+    store.put_entity("projects", "p2", {"id": "p2", "name": "x"})
+    with operation_session("first"):
+        rename(store, "p1", "b")
+    with operation_session("second"):
+        rename(store, "p2", "y")
+
+    with operation_session("first"):
+        assert [label for label, _, _ in log.history()] == ["Rename"]
+        log.undo()
+        assert log.undo() is None
+    assert store.get_entity("projects", "p1")["name"] == "a"
+    assert store.get_entity("projects", "p2")["name"] == "y"
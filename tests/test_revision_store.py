@@ -0,0 +1,99 @@
+"""Tests for script revision history and its line deltas."""
+
+import os
+import random
+
+import pytest
+
+from revision_store import RevisionStore, apply_delta, line_delta
+
+
+@pytest.mark.parametrize("base, text", [
+    ("", ""),
+    ("", "new\ntext"),
+    ("one\ntwo\nthree\n", ""),
+    ("one\ntwo\nthree\n", "one\n2\nthree\n"),
+    ("one\ntwo\nthree", "zero\none\ntwo\nthree\nfour"),
+    ("a\nb\na\nb\n", "b\na\nb\na\n"),
+    ("same\n", "same"),
+    ("line\r\nother\r\n", "line\r\nchanged\r\n"),
+])
+def test_apply_delta_rebuilds_the_text(base, text):
+    assert apply_delta(base, line_delta(base, text)) == text
+
+
+def test_apply_delta_rebuilds_random_edits():
+    rng = random.Random(3)
+    words = ["INT. HOUSE", "MARA", "(quietly)", "We leave tonight.", "", "CUT TO:"]
+    base = "\n".join(rng.choice(words) for _ in range(200))
+    for _ in range(50):
+        lines = base.splitlines()
+        for _ in range(rng.randrange(1, 5)):
+            position = rng.randrange(len(lines) + 1)
+            if rng.random() < 0.5 and position < len(lines):
+                del lines[position]
+            else:
+                lines.insert(position, rng.choice(words))
+        text = "\n".join(lines)
+        assert apply_delta(base, line_delta(base, text)) == text
+        base = text
+
+
+def test_local_edit_copies_the_unchanged_lines():
+    base = "".join(f"line {number}\n" for number in range(1000))
+    text = base.replace("line 500\n", "line five hundred\n")
+    assert line_delta(base, text) == [[0, 500], [["line five hundred\n"]], [501, 1000]]
+
+
+def test_every_revision_is_rebuilt_after_a_restart():
+    revisions = RevisionStore(root="revisions", snapshot_interval=4)
+    texts = [f"draft {number}\n" + "shared line\n" * number for number in range(1, 11)]
+    assert [revisions.record("p1", text) for text in texts] == list(range(1, 11))
+    assert revisions.record("p1", texts[-1]) is None
+
+    kinds = [revision["kind"] for revision in reversed(revisions.list_revisions("p1"))]
+    assert kinds == ["snapshot", "delta", "delta", "delta"] * 2 + ["snapshot", "delta"]
+
+    reopened = RevisionStore(root="revisions", snapshot_interval=4)
+    assert [reopened.get("p1", number) for number in range(1, 11)] == texts
+    assert reopened.get("p1", 11) is None and reopened.get("p1", 0) is None
+    assert "+draft 10" in reopened.diff("p1", 9)
+
+
+def test_a_torn_entry_is_ignored_and_overwritten():
+    revisions = RevisionStore(root="revisions")
+    revisions.record("p1", "first")
+    with open(os.path.join("revisions", "p1.rev"), "ab") as f:
+        f.write(b"\x10\x00\x00\x00partial")
+
+    reopened = RevisionStore(root="revisions")
+    assert reopened.latest_number("p1") == 1
+    assert reopened.record("p1", "second") == 2
+    assert RevisionStore(root="revisions").get("p1", 2) == "second"
+
+
+def test_revisions_appended_by_another_writer_are_kept():
+    ours = RevisionStore(root="revisions")
+    theirs = RevisionStore(root="revisions")
+    assert ours.record("p1", "first") == 1
+    assert theirs.record("p1", "first\nsecond") == 2
+    assert ours.record("p1", "first\nsecond\nthird") == 3
+
+    reopened = RevisionStore(root="revisions")
+    assert [reopened.get("p1", number) for number in (1, 2, 3)] == ["first", "first\nsecond", "first\nsecond\nthird"]
+
+
+def test_a_last_entry_failing_its_crc_is_dropped():
+    revisions = RevisionStore(root="revisions")
+    revisions.record("p1", "first")
+    revisions.record("p1", "second")
+    path = os.path.join("revisions", "p1.rev")
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    reopened = RevisionStore(root="revisions")
+    assert reopened.record("p1", "third") == 2
+    assert RevisionStore(root="revisions").get("p1", 2) == "third"
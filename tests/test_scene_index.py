@@ -0,0 +1,66 @@
+"""Tests for the story/act/block/chapter/scene tree."""
+
+import pytest
+
+from scene_index import SceneTree
+
+
+def add_chapter(store, chapter_id, story_id, act, block, rank):
+    store.put_entity("chapters", chapter_id, {
+        "id": chapter_id, "story_id": story_id, "act_number": act, "block_number": block, "rank": rank
+    })
+
+
+def add_scene(store, scene_id, chapter_id, rank, characters=(), location=""):
+    store.put_entity("scenes", scene_id, {
+        "id": scene_id, "chapter_id": chapter_id, "rank": rank,
+        "characters": list(characters), "location": location
+    })
+
+
+@pytest.fixture
+def tree(store):
+    add_chapter(store, "c1", "s1", 1, 1, "a")
+    add_chapter(store, "c2", "s1", 2, 1, "a")
+    add_chapter(store, "c3", "s1", 2, 2, "a")
+    add_chapter(store, "c4", "s2", 2, 1, "a")
+    add_scene(store, "x1", "c1", "a", ["Mara"], "Harbor")
+    add_scene(store, "x2", "c2", "b", ["mara", "Ilan"], "Tower")
+    add_scene(store, "x3", "c2", "a", ["Ilan"], "harbor")
+    add_scene(store, "x4", "c3", "a", ["Mara"])
+    add_scene(store, "x5", "c4", "a", ["Mara"], "Harbor")
+    return SceneTree(store=store, path=None)
+
+
+def test_subtree_queries_return_scenes_in_display_order(tree):
+    assert tree.scene_ids() == ["x1", "x3", "x2", "x4", "x5"]
+    assert tree.scene_ids("s1") == ["x1", "x3", "x2", "x4"]
+    assert tree.scene_ids("s1", act_number=2) == ["x3", "x2", "x4"]
+    assert tree.scene_ids("s1", act_number=2, block_number=2) == ["x4"]
+    assert tree.scene_ids(chapter_id="c2") == ["x3", "x2"]
+
+
+def test_act_and_block_filters_apply_without_a_story(tree):
+    assert tree.scene_ids(act_number=2) == ["x3", "x2", "x4", "x5"]
+    assert tree.scene_ids(act_number=2, block_number=1) == ["x3", "x2", "x5"]
+    assert tree.scene_ids(act_number=2, character="MARA") == ["x2", "x4", "x5"]
+
+
+def test_character_and_location_filters_ignore_case(tree):
+    assert tree.scene_ids("s1", character="mara") == ["x1", "x2", "x4"]
+    assert tree.scene_ids(location="HARBOR") == ["x1", "x3", "x5"]
+    assert tree.scene_ids("s1", character="Ilan", location="harbor") == ["x3"]
+    assert tree.scene_ids(character="nobody") == []
+
+
+def test_moving_a_chapter_carries_its_scenes(store, tree):
+    tree.scene_ids()
+    chapter = dict(store.get_entity("chapters", "c1"))
+    chapter.update(act_number=3, block_number=1)
+    store.put_entity("chapters", "c1", chapter)
+    assert tree.scene_ids("s1", act_number=3) == ["x1"]
+    assert tree.scene_ids("s1", act_number=1) == []
+
+    store.delete_entity("scenes", "x3")
+    assert tree.scene_ids(chapter_id="c2") == ["x2"]
+    assert tree.display_number("x2") == 1
@@ -0,0 +1,90 @@
+"""Tests for the BM25 full-text index and reciprocal rank fusion."""
+
+import pytest
+
+from document_store import DocumentStore
+from search_index import FullTextIndex, reciprocal_rank_fusion, tokenize
+from storage_backends import JSONFileBackend
+
+
+def chapter(title, outline="", notes=""):
+    return {"title": title, "outline": outline, "notes": notes, "location": ""}
+
+
+def test_tokenize_lowercases_words():
+    assert tokenize("The Harbor, at NIGHT!") == ["the", "harbor", "at", "night"]
+
+
+def test_bm25_ranks_rarer_terms_and_denser_matches_higher(store):
+    index = FullTextIndex(path=None, store=store)
+    store.put_entity("chapters", "dense", chapter("Storm", "storm storm over the harbor"))
+    store.put_entity("chapters", "sparse", chapter("Harbor", "a long walk past the harbor and the market and the docks"))
+    store.put_entity("chapters", "other", chapter("Market", "the market at dawn"))
+
+    ranked = [entity_id for entity_id, _ in index.search("storm harbor", "chapters")]
+    assert ranked == ["dense", "sparse"]
+    assert index.search("the", "chapters", limit=2)[0][1] < index.search("storm", "chapters")[0][1]
+    assert index.search("nothing", "chapters") == []
+    assert index.search("storm", "unknown") == []
+
+
+def test_index_follows_edits_and_deletes(store):
+    index = FullTextIndex(path=None, store=store)
+    store.put_entity("chapters", "c1", chapter("Storm"))
+    assert [entity_id for entity_id, _ in index.search("storm", "chapters")] == ["c1"]
+
+    store.put_entity("chapters", "c1", dict(store.load()["chapters"]["c1"], title="Calm"))
+    assert index.search("storm", "chapters") == []
+    assert [entity_id for entity_id, _ in index.search("calm", "chapters")] == ["c1"]
+
+    store.delete_entity("chapters", "c1")
+    assert index.search("calm", "chapters") == []
+
+
+def test_saved_index_is_reused_and_reconciled_after_a_restart(store):
+    index = FullTextIndex(path="search_index.pkl", store=store)
+    store.put_entity("chapters", "c1", chapter("Storm"))
+    store.put_entity("chapters", "c2", chapter("Harbor"))
+    index.sync()
+    assert index.save()
+
+    # Edited while the index was not running
+    other = DocumentStore(JSONFileBackend("projects.json", debounce_seconds=0))
+    other.put_entity("chapters", "c2", dict(other.load()["chapters"]["c2"], title="Storm harbor"))
+    other.delete_entity("chapters", "c1")
+
+    reopened = FullTextIndex(path="search_index.pkl", store=DocumentStore(JSONFileBackend("projects.json", debounce_seconds=0)))
+    assert [entity_id for entity_id, _ in reopened.search("storm", "chapters")] == ["c2"]
+
+
+def test_reciprocal_rank_fusion_prefers_ids_ranked_high_by_several_lists():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d", "a"]], k=60)
+    assert [entity_id for entity_id, _ in fused] == ["a", "c", "b", "d"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["c"]], k=60, limit=1) == [("c", pytest.approx(1 / 63 + 1 / 61))]
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_rank_chapters_merges_keyword_and_semantic_matches(store, monkeypatch):
+    import database_models
+    import substring_index
+    from substring_index import SubstringIndex
+
+    monkeypatch.setattr(substring_index, "substring_index", SubstringIndex(path=None, store=store))
+    monkeypatch.setattr(substring_index, "search_index", FullTextIndex(path=None, store=store))
+    monkeypatch.setattr(database_models, "get_entity_store", lambda: store)
+    monkeypatch.setattr(database_models, "get_search_entities", lambda: substring_index.search_entities)
+
+    class SemanticSearch:
+        def search(self, query, k, content_type):
+            ids = ["calm", "storm", "storm", "deleted"]
+            return [{"metadata": {"content_id": entity_id}} for entity_id in ids]
+
+    monkeypatch.setattr(database_models, "get_rag_service", lambda: SemanticSearch())
+    for entity_id, title in [("storm", "Storm at sea"), ("squall", "Storm warning"), ("calm", "Calm waters")]:
+        store.put_entity("chapters", entity_id, dict(chapter(title), id=entity_id))
+
+    ranked = database_models.rank_chapters("storm")
+    assert [chapter["id"] for chapter, _ in ranked][:1] == ["storm"]
+    assert {chapter["id"] for chapter, _ in ranked} == {"storm", "squall", "calm"}
+    assert len(database_models.rank_chapters("storm", top_k=1)) == 1
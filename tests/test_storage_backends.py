@@ -0,0 +1,201 @@
+"""Tests for the workspace storage backends."""
+
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+import storage_backends
+from storage_backends import JSONFileBackend, EntityChange, default_document
+
+
+def document_with(name):
+    document = default_document()
+    document["projects"]["p1"] = {"id": "p1", "name": name}
+    return document
+
+
+def test_json_backend_coalesces_saves_into_one_write(monkeypatch):
+    writes = []
+    real_write = storage_backends.atomic_write_json
+    monkeypatch.setattr(storage_backends, "atomic_write_json",
+                        lambda path, document: (writes.append(document), real_write(path, document)))
+    backend = JSONFileBackend("projects.json", debounce_seconds=0.1)
+    for name in ("a", "b", "c"):
+        document = document_with(name)
+        backend.commit([EntityChange("projects", "p1", document["projects"]["p1"])], document)
+
+    assert writes == []
+    assert backend.load()["projects"]["p1"]["name"] == "c"
+    assert backend.flush()
+    assert len(writes) == 1
+    assert JSONFileBackend("projects.json", debounce_seconds=0).load()["projects"]["p1"]["name"] == "c"
+
+
+def test_json_backend_retries_a_failed_write(monkeypatch):
+    monkeypatch.setattr(JSONFileBackend, "RETRY_SECONDS", 0.05)
+    real_write = storage_backends.atomic_write_json
+    failures = [OSError("disk full")]
+
+    def flaky_write(path, document):
+        if failures:
+            raise failures.pop()
+        real_write(path, document)
+
+    monkeypatch.setattr(storage_backends, "atomic_write_json", flaky_write)
+    backend = JSONFileBackend("projects.json", debounce_seconds=0.01)
+    document = document_with("kept")
+    backend.commit([EntityChange("projects", "p1", document["projects"]["p1"])], document)
+
+    deadline = time.monotonic() + 2
+    while not os.path.exists("projects.json") and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not failures
+    assert JSONFileBackend("projects.json", debounce_seconds=0).load()["projects"]["p1"]["name"] == "kept"
+
+
+def test_backend_missing_an_abstract_method_cannot_be_created():
+    class Incomplete(storage_backends.StorageBackend):
+        def exists(self):
+            return False
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_sqlite_backend_imports_projects_json_and_writes_single_rows():
+    JSONFileBackend("projects.json", debounce_seconds=0).commit([], document_with("imported"))
+    backend = storage_backends.SQLiteBackend("projects.db")
+    assert backend.load()["projects"]["p1"]["name"] == "imported"
+
+    chapter = {"id": "c1", "story_id": "s1", "act_number": 2, "status": "draft", "updated_at": "t1"}
+    before = backend.fingerprint()
+    assert backend.commit([EntityChange("chapters", "c1", chapter), EntityChange("projects", "p1", None)], {})
+    assert backend.fingerprint() == before  # data_version only moves for other connections' writes
+
+    reopened = storage_backends.SQLiteBackend("projects.db")
+    data = reopened.load()
+    assert data["chapters"] == {"c1": chapter}
+    assert data["projects"] == {}
+    assert reopened.conn.execute("SELECT act_number, status FROM chapters").fetchall() == [(2, "draft")]
+
+    reopened.commit([EntityChange("chapters", "c1", None)], {})
+    assert backend.fingerprint() != before
+
+
+def test_sqlite_backend_adds_the_rank_column_to_an_older_database():
+    conn = sqlite3.connect("projects.db")
+    conn.execute("CREATE TABLE chapters (id TEXT PRIMARY KEY, updated_at TEXT, story_id TEXT, act_number INTEGER, "
+                 "block_number INTEGER, chapter_number INTEGER, status TEXT, data TEXT NOT NULL)")
+    conn.execute("CREATE INDEX idx_chapters_order ON chapters (story_id, act_number, block_number, chapter_number)")
+    chapter = {"id": "c1", "story_id": "s1", "act_number": 1, "block_number": 1, "rank": "V", "updated_at": "t1"}
+    conn.execute("INSERT INTO chapters (id, data) VALUES ('c1', ?)", (json.dumps(chapter),))
+    conn.commit()
+    conn.close()
+
+    backend = storage_backends.SQLiteBackend("projects.db", import_from=None)
+    assert backend.conn.execute("SELECT rank FROM chapters").fetchall() == [("V",)]
+    indexes = {row[1] for row in backend.conn.execute("PRAGMA index_list(chapters)")}
+    assert "idx_chapters_rank" in indexes and "idx_chapters_order" not in indexes
+
+    moved = dict(chapter, rank="k")
+    assert backend.commit([EntityChange("chapters", "c1", moved)], {})
+    assert backend.conn.execute("SELECT rank FROM chapters").fetchall() == [("k",)]
+    assert backend.load()["chapters"] == {"c1": moved}
+
+
+def test_sqlite_backend_serves_a_store_one_row_at_a_time(monkeypatch):
+    from document_store import DocumentStore
+
+    backend = storage_backends.SQLiteBackend("projects.db", import_from=None)
+    project = {"id": "p1", "name": "Pilot", "content": "Long script text", "notes": "Draft"}
+    assert backend.commit([EntityChange("projects", "p1", project),
+                           EntityChange("timelines", "t1", {"id": "t1", "name": "Main"})], {})
+
+    store = DocumentStore(backend)
+    monkeypatch.setattr(backend, "load", lambda: pytest.fail("the whole workspace was loaded"))
+    assert dict(store.list_entities("projects")) == {"p1": {"id": "p1", "name": "Pilot"}}
+    assert store.get_entity("projects", "p1")["content"] == "Long script text"
+    assert store.get_entity("timelines", "t1")["name"] == "Main"
+    assert store.get_entity("projects", "missing") is None
+
+
+def test_journal_replays_commits_over_the_snapshot_and_truncates_a_torn_record():
+    backend = storage_backends.JournaledJSONBackend("projects.json", "projects.journal.jsonl")
+    assert backend.commit([], document_with("snapshot"))
+    for name in ("first", "second"):
+        document = document_with(name)
+        assert backend.commit([EntityChange("projects", "p1", document["projects"]["p1"])], document)
+    assert JSONFileBackend("projects.json", debounce_seconds=0).load()["projects"]["p1"]["name"] == "snapshot"
+
+    intact_size = os.path.getsize("projects.journal.jsonl")
+    with open("projects.journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"changes": [["projects", "p1", {"id": "p1", "na')
+
+    recovered = storage_backends.JournaledJSONBackend("projects.json", "projects.journal.jsonl")
+    assert recovered.load()["projects"]["p1"]["name"] == "second"
+    assert os.path.getsize("projects.journal.jsonl") == intact_size
+
+
+def test_journal_compaction_folds_the_journal_into_the_snapshot():
+    backend = storage_backends.JournaledJSONBackend("projects.json", "projects.journal.jsonl")
+    backend.commit([], document_with("snapshot"))
+    document = document_with("journaled")
+    backend.commit([EntityChange("projects", "p1", document["projects"]["p1"])], document)
+
+    assert backend.compact()
+    assert not os.path.exists("projects.journal.jsonl")
+    assert not os.path.exists(backend.rotated_path)
+    assert JSONFileBackend("projects.json", debounce_seconds=0).load()["projects"]["p1"]["name"] == "journaled"
+
+
+def test_sharded_backend_writes_one_file_per_entity_and_a_summary_manifest():
+    backend = storage_backends.ShardedBackend("workspace", import_from=None)
+    project = {"id": "p1", "name": "Pilot", "content": "Long script text"}
+    assert backend.commit([EntityChange("projects", "p1", project)], None)
+
+    assert backend.load_entity("projects", "p1") == project
+    assert backend.load_manifest()["projects"]["p1"] == {"id": "p1", "name": "Pilot"}
+    assert os.path.exists(os.path.join("workspace", "projects", "p1.json"))
+    assert os.path.exists(os.path.join("workspace", "manifests", "projects.json"))
+
+    other = storage_backends.ShardedBackend("workspace", import_from=None)
+    assert other.commit([EntityChange("projects", "p1", None)], None)
+    assert backend.load()["projects"] == {}
+    assert not os.path.exists(os.path.join("workspace", "projects", "p1.json"))
+
+
+def test_sharded_backend_rewrites_only_the_manifests_of_changed_collections(monkeypatch):
+    backend = storage_backends.ShardedBackend("workspace", import_from=None)
+    assert backend.commit([EntityChange("projects", "p1", {"id": "p1", "name": "Pilot"}),
+                           EntityChange("chapters", "c1", {"id": "c1", "title": "One"})], None)
+
+    written = []
+    real_write = storage_backends.atomic_write_json
+    monkeypatch.setattr(storage_backends, "atomic_write_json", lambda path, data: (written.append(path), real_write(path, data)))
+    assert backend.commit([EntityChange("chapters", "c2", {"id": "c2", "title": "Two"})], None)
+    assert written == [os.path.join("workspace", "chapters", "c2.json"), os.path.join("workspace", "manifests", "chapters.json")]
+
+    other = storage_backends.ShardedBackend("workspace", import_from=None)
+    assert set(other.load_manifest()["chapters"]) == {"c1", "c2"}
+    assert other.load_manifest()["projects"] == {"p1": {"id": "p1", "name": "Pilot"}}
+
+
+def test_sharded_backend_splits_a_single_manifest_from_an_older_workspace():
+    os.makedirs(os.path.join("workspace", "projects"))
+    with open(os.path.join("workspace", "projects", "p1.json"), "w", encoding="utf-8") as f:
+        json.dump({"id": "p1", "name": "Pilot", "content": "Text"}, f)
+    with open(os.path.join("workspace", "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"projects": {"p1": {"id": "p1", "name": "Pilot"}}}, f)
+
+    backend = storage_backends.ShardedBackend("workspace", import_from=None)
+    assert backend.exists() and not os.path.exists(os.path.join("workspace", "manifest.json"))
+    assert backend.load()["projects"] == {"p1": {"id": "p1", "name": "Pilot", "content": "Text"}}
+
+
+def test_sharded_backend_refuses_ids_that_escape_the_workspace():
+    backend = storage_backends.ShardedBackend("workspace", import_from=None)
+    assert not backend.commit([EntityChange("projects", "../evil", {"id": "x"})], None)
+    assert not os.path.exists("evil.json")
@@ -0,0 +1,48 @@
+"""Tests for the trigram index behind exact substring search."""
+
+import pytest
+
+import substring_index as substring_module
+from search_index import FullTextIndex
+from substring_index import SubstringIndex, contains
+
+
+NAMES = ["O'Malley", "Omar", "Mara", "Al", "harbor master", "Harbormaster Quinn", ""]
+
+
+@pytest.fixture
+def store(store):
+    for number, name in enumerate(NAMES):
+        store.put_entity("characters", f"c{number}", {
+            "name": name, "description": "", "notes": "", "created_at": f"2024-01-0{number + 1}",
+        })
+    return store
+
+
+@pytest.mark.parametrize("query", ["o'ma", "OM", "a", "al", "harbor", "r m", "rbormaster q", "zz", "xyzzy"])
+def test_matches_are_exactly_those_of_a_full_scan(store, query):
+    index = SubstringIndex(path=None, store=store)
+    expected = {
+        entity_id for entity_id, record in store.list_entities("characters").items()
+        if contains(record, query.lower(), "characters")
+    }
+    assert {entity_id for entity_id, _ in index.search(query, "characters")} == expected
+
+
+def test_candidates_follow_renames(store):
+    index = SubstringIndex(path=None, store=store)
+    assert [entity_id for entity_id, _ in index.search("omar", "characters")] == ["c1"]
+
+    store.put_entity("characters", "c1", dict(store.load()["characters"]["c1"], name="Idris"))
+    assert index.search("omar", "characters") == []
+    assert [entity_id for entity_id, _ in index.search("dri", "characters")] == ["c1"]
+
+
+def test_search_entities_orders_by_bm25_then_age_and_stops_at_the_limit(store, monkeypatch):
+    monkeypatch.setattr(substring_module, "substring_index", SubstringIndex(path=None, store=store))
+    monkeypatch.setattr(substring_module, "search_index", FullTextIndex(path=None, store=store))
+
+    names = [record["name"] for record in substring_module.search_entities("harbor", "characters")]
+    assert names == ["harbor master", "Harbormaster Quinn"]
+    names = [record["name"] for record in substring_module.search_entities("ma", "characters", limit=2)]
+    assert names == ["O'Malley", "Omar"]
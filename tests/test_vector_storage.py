@@ -0,0 +1,150 @@
+"""Tests for the local FAISS vector store: removal by id and chunk-level re-embedding."""
+
+import hashlib
+import importlib.util
+import sys
+import types
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from embedding_cache import EmbeddingCache
+
+
+class FakeModel:
+    """Deterministic stand-in for the sentence transformer that records what it encodes."""
+
+    def __init__(self, *args, **kwargs):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return 384
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.encoded.extend(texts)
+        return np.array([
+            np.random.default_rng(int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "little"))
+            .standard_normal(384).astype("float32")
+            for text in texts
+        ])
+
+
+class Document:
+    def __init__(self, page_content, metadata=None):
+        self.page_content = page_content
+        self.metadata = metadata or {}
+
+
+class ParagraphSplitter:
+    """Stand-in for langchain's splitter: one chunk per paragraph."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def split_text(self, text):
+        return [paragraph for paragraph in text.split("\n\n") if paragraph.strip()]
+
+
+@pytest.fixture(scope="module")
+def vector_storage():
+    """vector_storage, imported with stand-ins for sentence_transformers and langchain where they're missing."""
+    stubs = {
+        "sentence_transformers": types.SimpleNamespace(SentenceTransformer=FakeModel),
+        "langchain": types.SimpleNamespace(),
+        "langchain.text_splitter": types.SimpleNamespace(RecursiveCharacterTextSplitter=ParagraphSplitter),
+        "langchain.docstore": types.SimpleNamespace(),
+        "langchain.docstore.document": types.SimpleNamespace(Document=Document),
+    }
+    with pytest.MonkeyPatch.context() as patch:
+        for root in ("sentence_transformers", "langchain"):
+            if importlib.util.find_spec(root) is None:
+                for name, module in stubs.items():
+                    if name.split(".")[0] == root:
+                        patch.setitem(sys.modules, name, module)
+        # Re-imported on top of the stubs, and dropped again so later imports see the real packages
+        for name in ("vector_storage", "document_chunking"):
+            patch.delitem(sys.modules, name, raising=False)
+        import vector_storage
+        yield vector_storage
+        for name in ("vector_storage", "document_chunking"):
+            sys.modules.pop(name, None)
+
+
+@pytest.fixture
+def storage(monkeypatch, vector_storage):
+    if not vector_storage.USE_FAISS:
+        pytest.skip("needs the FAISS backend")
+    monkeypatch.setattr(vector_storage, "SentenceTransformer", FakeModel)
+    monkeypatch.setattr(vector_storage, "embedding_cache", EmbeddingCache(root="embedding_cache", max_mb=1))
+    return vector_storage.LocalVectorStorage()
+
+
+def paragraphs(*words):
+    """Text whose paragraphs are long enough to become one chunk each."""
+    return "\n\n".join(" ".join([word] * 80) for word in words)
+
+
+def vector_ids(storage, content_id):
+    """Chunk text -> vector id of a content item's chunks."""
+    return {storage.documents[vector_id].page_content: vector_id for vector_id in storage.content_ids[content_id]}
+
+
+def test_removing_an_item_keeps_the_other_vectors_without_re_encoding(storage):
+    storage.add_contents([(paragraphs("alpha", "beta"), "script", "a", "A"),
+                          (paragraphs("gamma"), "script", "b", "B")])
+    kept = vector_ids(storage, "b")
+    storage.model.encoded.clear()
+
+    storage.remove_contents(["a"])
+
+    assert storage.model.encoded == []
+    assert set(storage.content_ids) == {"b"} and storage.index.ntotal == 1
+    assert vector_ids(storage, "b") == kept
+    # The surviving vector is still the one its text was embedded as
+    result, = storage.search(paragraphs("gamma"), k=5)
+    assert result["metadata"]["content_id"] == "b" and result["score"] == pytest.approx(1.0, abs=1e-5)
+
+    reopened = type(storage)()
+    assert set(reopened.content_ids) == {"b"} and reopened.index.ntotal == 1
+
+
+def test_cached_embeddings_are_reused_after_the_item_was_removed(storage):
+    storage.add_content(paragraphs("alpha"), "script", "a", "A")
+    storage.remove_content("a")
+    storage.model.encoded.clear()
+
+    storage.add_content(paragraphs("alpha"), "script", "a", "A")
+    assert storage.model.encoded == []
+    assert storage.index.ntotal == 1
+
+
+def test_editing_one_paragraph_re_embeds_only_that_chunk(storage):
+    storage.add_content(paragraphs("alpha", "beta", "gamma"), "script", "a", "A")
+    before = vector_ids(storage, "a")
+    storage.model.encoded.clear()
+
+    storage.add_content(paragraphs("alpha", "delta", "gamma"), "script", "a", "A renamed")
+
+    assert storage.model.encoded == [paragraphs("delta")]
+    after = vector_ids(storage, "a")
+    assert set(after) == {paragraphs(word) for word in ("alpha", "delta", "gamma")}
+    assert after[paragraphs("alpha")] == before[paragraphs("alpha")]
+    assert storage.index.ntotal == 3
+    assert {storage.metadata[vector_id]["title"] for vector_id in after.values()} == {"A renamed"}
+
+
+def test_a_corpus_is_embedded_in_batches_and_saved_once(storage, monkeypatch):
+    saves = []
+    real_save = storage._save_faiss_index
+    monkeypatch.setattr(storage, "_save_faiss_index", lambda: (saves.append(1), real_save()))
+    progress = []
+
+    items = [(paragraphs(f"word{number}"), "chapter", f"c{number}", f"C{number}") for number in range(5)]
+    storage.add_contents(items + [("   ", "chapter", "empty", "Empty")], batch_size=2,
+                         progress=lambda done, total: progress.append((done, total)))
+
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    assert len(saves) == 1
+    assert storage.index.ntotal == 5 and "empty" not in storage.content_ids
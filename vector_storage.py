@@ -3,11 +3,15 @@
 
 import os
 import pickle
-from typing import List, Dict, Any, Optional
+import uuid
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from sentence_transformers import SentenceTransformer
 import numpy as np
 from langchain.docstore.document import Document
 from document_chunking import document_chunker
+from embedding_cache import embedding_cache
+from embedding_pool import EmbeddingPool, get_embedding_pool, discard_embedding_pool
+from config import EMBEDDING_BATCH_SIZE, SENTENCE_TRANSFORMER_MODEL
 
 # Try to import FAISS, fallback to ChromaDB if not available
 try:
@@ -27,7 +31,8 @@ class LocalVectorStorage:
     """Handles local vector storage operations using FAISS or ChromaDB."""
     
     def __init__(self):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.model = SentenceTransformer(SENTENCE_TRANSFORMER_MODEL)
+        self.dimension = self.model.get_sentence_embedding_dimension()
         
         if USE_FAISS:
             self._init_faiss()
@@ -35,10 +40,17 @@ class LocalVectorStorage:
             self._init_chromadb()
     
     def _init_faiss(self):
-        """Initialize FAISS-based storage."""
+        """Initialize FAISS-based storage.
+        
+        Vectors are stored under stable integer ids (IndexIDMap), with `documents` and
+        `metadata` keyed by the same ids and `content_ids` listing each content item's ids,
+        so removing an item drops its vectors by id without re-encoding anything else.
+        """
         self.index = None
-        self.documents = []
-        self.metadata = []
+        self.documents: Dict[int, Document] = {}
+        self.metadata: Dict[int, Dict[str, Any]] = {}
+        self.content_ids: Dict[str, List[int]] = {}
+        self.next_id = 0
         self.index_file = "vector_index.faiss"
         self.metadata_file = "vector_metadata.pkl"
         self._load_or_create_faiss_index()
@@ -59,8 +71,13 @@ class LocalVectorStorage:
                 self.index = faiss.read_index(self.index_file)
                 with open(self.metadata_file, 'rb') as f:
                     data = pickle.load(f)
+                if isinstance(data['documents'], list):
+                    self._upgrade_faiss_index(data)
+                else:
                     self.documents = data['documents']
                     self.metadata = data['metadata']
+                    self.content_ids = data['content_ids']
+                    self.next_id = data['next_id']
                 print(f"Loaded FAISS index with {len(self.documents)} documents")
             except Exception as e:
                 print(f"Error loading FAISS index: {e}")
@@ -71,106 +88,257 @@ class LocalVectorStorage:
     def _create_empty_faiss_index(self):
         """Create empty FAISS index."""
         dimension = 384  # all-MiniLM-L6-v2 dimension
-        self.index = faiss.IndexFlatIP(dimension)
-        self.documents = []
-        self.metadata = []
+        self.index = faiss.IndexIDMap(faiss.IndexFlatIP(dimension))
+        self.documents = {}
+        self.metadata = {}
+        self.content_ids = {}
+        self.next_id = 0
+    
+    def _upgrade_faiss_index(self, data: Dict[str, Any]):
+        """Move an index saved with positional ids onto stable ids, reusing its stored vectors."""
+        vectors = self.index.reconstruct_n(0, self.index.ntotal) if self.index.ntotal else None
+        self._create_empty_faiss_index()
+        if vectors is not None:
+            self.index.add_with_ids(vectors, np.arange(len(vectors), dtype='int64'))
+        for vector_id, (doc, metadata) in enumerate(zip(data['documents'], data['metadata'])):
+            self.documents[vector_id] = doc
+            self.metadata[vector_id] = metadata
+            self.content_ids.setdefault(metadata.get('content_id'), []).append(vector_id)
+        self.next_id = len(data['documents'])
+        self._save_faiss_index()
     
     def add_content(self, content: str, content_type: str, content_id: str, title: str):
         """Add content to local vector storage."""
-        if not content.strip():
-            return
+        self.add_contents([(content, content_type, content_id, title)], batch_size=None)
+    
+    def add_contents(self, items: List[Tuple[str, str, str, str]], batch_size: Optional[int] = EMBEDDING_BATCH_SIZE,
+                     progress: Optional[Callable[[int, int], None]] = None, parallel: bool = False):
+        """Add or refresh many (content, content_type, content_id, title) items at once.
         
-        # Remove existing content for this ID
-        self.remove_content(content_id)
+        Each item is re-chunked and its chunks compared with the ones already stored for
+        its content id: unchanged chunks keep their vectors (only their metadata is
+        updated), dropped chunks are deleted, and only new or edited chunks are embedded,
+        in batches of `batch_size`. `progress(done_chunks, total_chunks)` is called after
+        each batch of chunks that needed embedding. With `parallel`, bulk jobs embed through
+        the embedding process pool when EMBEDDING_WORKERS enables it.
+        """
+        items = [item for item in items if item[0].strip()]
+        if not items:
+            return
         
-        # Chunk the content
-        documents = document_chunker.chunk_content(content, content_type, content_id, title)
+        pool = get_embedding_pool() if parallel and batch_size else None
         
-        if not documents:
-            return
+        chunks = {}
+        for content, content_type, content_id, title in items:
+            chunks[content_id] = document_chunker.chunk_content(content, content_type, content_id, title)
         
         if USE_FAISS:
-            self._add_content_faiss(documents)
+            changed, documents = self._diff_chunks_faiss(chunks)
+            if documents:
+                self._add_content_faiss(documents, batch_size, progress, pool)
+            elif changed:
+                self._save_faiss_index()
         else:
-            self._add_content_chromadb(documents)
+            documents = self._diff_chunks_chromadb(chunks)
+            if documents:
+                self._add_content_chromadb(documents, batch_size, progress, pool)
     
-    def _add_content_faiss(self, documents: List[Document]):
-        """Add content using FAISS."""
-        # Generate embeddings
-        texts = [doc.page_content for doc in documents]
-        embeddings = self.model.encode(texts)
+    @staticmethod
+    def _match_chunks(stored: Dict[str, List[Any]], documents: List[Document]) -> Tuple[List[Tuple[Any, Document]], List[Document]]:
+        """Pair new chunks with stored chunks of the same text (popping them from `stored`).
+        
+        Returns (stored id, chunk) pairs for unchanged chunks and the chunks that need embedding;
+        whatever is left in `stored` was dropped.
+        """
+        kept = []
+        new = []
+        for doc in documents:
+            ids = stored.get(doc.page_content)
+            if ids:
+                kept.append((ids.pop(), doc))
+            else:
+                new.append(doc)
+        return kept, new
+    
+    def _diff_chunks_faiss(self, chunks: Dict[str, List[Document]]) -> Tuple[bool, List[Document]]:
+        """Apply chunk changes that need no embedding; returns (index changed, chunks to embed)."""
+        changed = False
+        dropped = []
+        to_embed = []
+        for content_id, documents in chunks.items():
+            stored: Dict[str, List[int]] = {}
+            for vector_id in self.content_ids.pop(content_id, ()):
+                stored.setdefault(self.documents[vector_id].page_content, []).append(vector_id)
+            
+            kept, new = self._match_chunks(stored, documents)
+            for vector_id, doc in kept:
+                if self.metadata[vector_id] != doc.metadata:
+                    self.documents[vector_id] = doc
+                    self.metadata[vector_id] = doc.metadata
+                    changed = True
+            if kept:
+                self.content_ids[content_id] = [vector_id for vector_id, _ in kept]
+            to_embed.extend(new)
+            dropped.extend(vector_id for ids in stored.values() for vector_id in ids)
         
-        # Normalize embeddings for cosine similarity
-        embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        if dropped:
+            self.index.remove_ids(np.array(dropped, dtype='int64'))
+            for vector_id in dropped:
+                del self.documents[vector_id]
+                del self.metadata[vector_id]
+        return changed or bool(dropped), to_embed
+    
+    def _diff_chunks_chromadb(self, chunks: Dict[str, List[Document]]) -> List[Document]:
+        """Apply chunk changes that need no embedding to ChromaDB; returns the chunks to embed."""
+        content_ids = list(chunks)
+        where = {"content_id": content_ids[0]} if len(content_ids) == 1 else {"content_id": {"$in": content_ids}}
+        existing = self.collection.get(where=where, include=["documents", "metadatas"])
         
-        # Add to FAISS index
-        self.index.add(embeddings.astype('float32'))
+        stored: Dict[str, Dict[str, List[str]]] = {}
+        stored_metadata = dict(zip(existing['ids'], existing['metadatas']))
+        for chunk_id, text, metadata in zip(existing['ids'], existing['documents'], existing['metadatas']):
+            stored.setdefault(metadata.get('content_id'), {}).setdefault(text, []).append(chunk_id)
         
-        # Store documents and metadata
-        self.documents.extend(documents)
-        for doc in documents:
-            self.metadata.append(doc.metadata)
+        updated_ids, updated_metadata = [], []
+        to_embed = []
+        for content_id, documents in chunks.items():
+            kept, new = self._match_chunks(stored.get(content_id, {}), documents)
+            for chunk_id, doc in kept:
+                if stored_metadata[chunk_id] != doc.metadata:
+                    updated_ids.append(chunk_id)
+                    updated_metadata.append(doc.metadata)
+            to_embed.extend(new)
+        
+        dropped = [chunk_id for texts in stored.values() for ids in texts.values() for chunk_id in ids]
+        if dropped:
+            self.collection.delete(ids=dropped)
+        if updated_ids:
+            self.collection.update(ids=updated_ids, metadatas=updated_metadata)
+        return to_embed
+    
+    def _encode(self, texts: List[str], batch_size: Optional[int] = None,
+                pool: Optional[EmbeddingPool] = None) -> np.ndarray:
+        """Embed texts and normalize them for cosine similarity."""
+        embeddings = None
+        if pool is not None and not pool.closed:
+            try:
+                embeddings = pool.encode(texts, batch_size)
+            except Exception as e:
+                print(f"Warning: Embedding pool failed, encoding in-process: {e}")
+                discard_embedding_pool()
+        if embeddings is None:
+            if batch_size:
+                embeddings = self.model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+            else:
+                embeddings = self.model.encode(texts)
+        return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    
+    def _embed(self, texts: List[str], batch_size: Optional[int] = None,
+               pool: Optional[EmbeddingPool] = None) -> np.ndarray:
+        """Normalized embeddings for chunk texts, encoding only texts missing from the embedding cache."""
+        try:
+            vectors = embedding_cache.get_many(SENTENCE_TRANSFORMER_MODEL, texts, self.dimension)
+        except Exception as e:
+            print(f"Warning: Could not read embedding cache: {e}")
+            return self._encode(texts, batch_size, pool)
+        
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            encoded = dict(zip(missing, self._encode(missing, batch_size, pool)))
+            vectors = [encoded[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+            try:
+                embedding_cache.put_many(SENTENCE_TRANSFORMER_MODEL, missing, np.vstack(list(encoded.values())))
+            except Exception as e:
+                print(f"Warning: Could not update embedding cache: {e}")
+        return np.vstack(vectors)
+    
+    def _add_content_faiss(self, documents: List[Document], batch_size: Optional[int] = None,
+                           progress: Optional[Callable[[int, int], None]] = None,
+                           pool: Optional[EmbeddingPool] = None):
+        """Add content using FAISS."""
+        # With a pool, each step hands every worker one batch
+        step = (batch_size or len(documents)) * (pool.workers if pool else 1)
+        for start in range(0, len(documents), step):
+            batch = documents[start:start + step]
+            
+            # Generate embeddings and add them to the FAISS index under fresh ids
+            embeddings = self._embed([doc.page_content for doc in batch], batch_size, pool)
+            ids = np.arange(self.next_id, self.next_id + len(batch), dtype='int64')
+            self.index.add_with_ids(embeddings.astype('float32'), ids)
+            self.next_id += len(batch)
+            
+            # Store documents and metadata
+            for vector_id, doc in zip(ids.tolist(), batch):
+                self.documents[vector_id] = doc
+                self.metadata[vector_id] = doc.metadata
+                self.content_ids.setdefault(doc.metadata['content_id'], []).append(vector_id)
+            
+            if progress:
+                progress(start + len(batch), len(documents))
         
-        # Save index
+        # Save index and any newly cached embeddings
         self._save_faiss_index()
+        embedding_cache.flush()
     
-    def _add_content_chromadb(self, documents: List[Document]):
+    def _add_content_chromadb(self, documents: List[Document], batch_size: Optional[int] = None,
+                              progress: Optional[Callable[[int, int], None]] = None,
+                              pool: Optional[EmbeddingPool] = None):
         """Add content using ChromaDB."""
-        texts = [doc.page_content for doc in documents]
-        embeddings = self.model.encode(texts).tolist()
-        
-        ids = [f"{doc.metadata['content_id']}_{doc.metadata['chunk_id']}" for doc in documents]
-        metadatas = [doc.metadata for doc in documents]
+        step = (batch_size or len(documents)) * (pool.workers if pool else 1)
+        for start in range(0, len(documents), step):
+            batch = documents[start:start + step]
+            texts = [doc.page_content for doc in batch]
+            embeddings = self._embed(texts, batch_size, pool).tolist()
+            
+            # Unchanged chunks keep their ids across edits, so new ones get fresh ids
+            ids = [f"{doc.metadata['content_id']}_{uuid.uuid4().hex}" for doc in batch]
+            metadatas = [doc.metadata for doc in batch]
+            
+            self.collection.add(
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas,
+                ids=ids
+            )
+            
+            if progress:
+                progress(start + len(batch), len(documents))
         
-        self.collection.add(
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas,
-            ids=ids
-        )
+        embedding_cache.flush()
     
     def remove_content(self, content_id: str):
         """Remove content from local vector storage."""
+        self.remove_contents([content_id])
+    
+    def remove_contents(self, content_ids: List[str]):
+        """Remove several content items from local vector storage in one pass."""
         if USE_FAISS:
-            self._remove_content_faiss(content_id)
+            if self._remove_content_faiss(set(content_ids)):
+                self._save_faiss_index()
         else:
-            self._remove_content_chromadb(content_id)
+            self._remove_content_chromadb(list(content_ids))
     
-    def _remove_content_faiss(self, content_id: str):
-        """Remove content from FAISS."""
-        indices_to_remove = []
-        for i, metadata in enumerate(self.metadata):
-            if metadata.get('content_id') == content_id:
-                indices_to_remove.append(i)
+    def _remove_content_faiss(self, content_ids: set) -> bool:
+        """Remove content from FAISS by vector id; returns True if anything was removed (not yet saved)."""
+        ids = []
+        for content_id in content_ids:
+            ids.extend(self.content_ids.pop(content_id, ()))
+        if not ids:
+            return False
         
-        if indices_to_remove:
-            # Rebuild index without removed items
-            new_documents = []
-            new_metadata = []
-            new_embeddings = []
-            
-            for i, (doc, meta) in enumerate(zip(self.documents, self.metadata)):
-                if i not in indices_to_remove:
-                    new_documents.append(doc)
-                    new_metadata.append(meta)
-                    embedding = self.model.encode([doc.page_content])
-                    embedding = embedding / np.linalg.norm(embedding, axis=1, keepdims=True)
-                    new_embeddings.append(embedding[0])
-            
-            # Recreate index
-            self._create_empty_faiss_index()
-            if new_embeddings:
-                embeddings_array = np.array(new_embeddings).astype('float32')
-                self.index.add(embeddings_array)
-                self.documents = new_documents
-                self.metadata = new_metadata
-            
-            self._save_faiss_index()
+        self.index.remove_ids(np.array(ids, dtype='int64'))
+        for vector_id in ids:
+            del self.documents[vector_id]
+            del self.metadata[vector_id]
+        return True
     
-    def _remove_content_chromadb(self, content_id: str):
+    def _remove_content_chromadb(self, content_ids: List[str]):
         """Remove content from ChromaDB."""
-        # Get all documents for this content_id
-        results = self.collection.get(where={"content_id": content_id})
+        # Get all documents for these content ids
+        if not content_ids:
+            return
+        where = {"content_id": content_ids[0]} if len(content_ids) == 1 else {"content_id": {"$in": content_ids}}
+        results = self.collection.get(where=where)
         if results['ids']:
             self.collection.delete(ids=results['ids'])
     
@@ -187,15 +355,14 @@ class LocalVectorStorage:
             return []
         
         # Generate query embedding
-        query_embedding = self.model.encode([query])
-        query_embedding = query_embedding / np.linalg.norm(query_embedding, axis=1, keepdims=True)
+        query_embedding = self._encode([query])
         
         # Search
         scores, indices = self.index.search(query_embedding.astype('float32'), min(k * 2, self.index.ntotal))
         
         results = []
         for score, idx in zip(scores[0], indices[0]):
-            if idx >= 0 and idx < len(self.documents):
+            if idx in self.documents:
                 metadata = self.metadata[idx]
                 
                 # Filter by content type if specified
@@ -249,7 +416,9 @@ class LocalVectorStorage:
             with open(self.metadata_file, 'wb') as f:
                 pickle.dump({
                     'documents': self.documents,
-                    'metadata': self.metadata
+                    'metadata': self.metadata,
+                    'content_ids': self.content_ids,
+                    'next_id': self.next_id
                 }, f)
         except Exception as e:
             print(f"Error saving FAISS index: {e}")